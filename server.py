@@ -8,7 +8,7 @@ Tools are organized by category for better maintainability.
 import os
 
 from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
 # Load environment variables
 load_dotenv()
@@ -16,59 +16,86 @@ load_dotenv()
 # Initialize MCP server
 mcp = FastMCP("servicenow-debug")
 
+# Every query tool takes instance: a name from SERVICENOW_INSTANCES (the
+# default instance if empty) or "all" to query every instance in parallel
+
 # Import all tools from modular structure
 from tools.ai import (
-    query_ai_agent_executions,
-    query_ai_roi_analysis,
-    query_now_assist_metadata,
-    query_now_assist_metrics,
+    query_ai_agent_executions_async,
+    query_ai_roi_analysis_async,
+    query_now_assist_metadata_async,
+    query_now_assist_metrics_async,
 )
 from tools.system import (
-    query_incidents,
-    query_rest_messages,
-    query_syslog,
+    follow_syslog_async,
+    query_client_stats,
+    query_incidents_async,
+    query_multi_async,
+    query_rest_messages_async,
+    query_syslog_async,
+    query_syslog_histogram_async,
+    query_syslog_templates_async,
 )
 from tools.workflows import (
-    query_workflow_context,
-    query_workflow_executing,
-    query_workflow_history,
-    query_workflow_log,
+    query_workflow_context_async,
+    query_workflow_executing_async,
+    query_workflow_history_async,
+    query_workflow_log_async,
 )
 
 
 # Register AI tools
 @mcp.tool()
-def ai_agent_executions(
+async def ai_agent_executions(
     status: str = "",
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query AI Agent execution plans (multi-step agentic AI)"""
-    return query_ai_agent_executions(status, limit, minutes_ago)
+    return await query_ai_agent_executions_async(
+        status, limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
 
 
 @mcp.tool()
-def now_assist_metrics(
+async def now_assist_metrics(
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query Now Assist usage metrics (summarization, resolution notes, skills)"""
-    return query_now_assist_metrics(limit, minutes_ago)
+    return await query_now_assist_metrics_async(
+        limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
 
 
 @mcp.tool()
-def now_assist_metadata(
+async def now_assist_metadata(
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query Now Assist metadata with user feedback and prompts"""
-    return query_now_assist_metadata(limit, minutes_ago)
+    return await query_now_assist_metadata_async(
+        limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
 
 
 @mcp.tool()
-def ai_roi_analysis(
+async def ai_roi_analysis(
     table_name: str = "incident",
     breakdown_by: str = "priority",
+    mode: str = "records",
+    days_ago: int = 0,
+    bucket: str = "",
+    instance: str = "",
 ) -> str:
     """
     Analyze AI ROI by comparing resolution times for AI-assisted vs non-AI records.
@@ -78,83 +105,252 @@ def ai_roi_analysis(
     - change_request: Mean Time to Implementation
     - problem: Mean Time to Root Cause
     - sn_customerservice_case: Mean Time to Closure
-
-    breakdown_by: priority, category, group, or none
+    - all: every table above plus cross-table totals, from one AI
+        execution scan
+
+    breakdown_by: priority, category, group, state, or none
+    mode: records (download every record) or aggregate (server-side stats,
+        incident only; other tables fall back to records)
+    days_ago: only count AI executions from the last N days (0 = all time)
+    bucket: day, week or month for the AI vs non-AI delta over time
     """
-    return query_ai_roi_analysis(table_name, breakdown_by)
+    return await query_ai_roi_analysis_async(
+        table_name, breakdown_by, mode, days_ago, bucket, instance
+    )
 
 
 # Register workflow tools
 @mcp.tool()
-def workflow_context(
+async def workflow_context(
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query workflow contexts to see workflow executions"""
-    return query_workflow_context(limit, minutes_ago)
+    return await query_workflow_context_async(
+        limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
 
 
 @mcp.tool()
-def workflow_executing(
+async def workflow_executing(
     workflow_name: str = "",
     limit: int = 20,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query currently executing workflows in real-time"""
-    return query_workflow_executing(workflow_name, limit)
+    return await query_workflow_executing_async(
+        workflow_name, limit, extra_fields, bypass_cache, instance
+    )
 
 
 @mcp.tool()
-def workflow_history(
+async def workflow_history(
     workflow_name: str = "",
     limit: int = 20,
     minutes_ago: int = 1440,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query workflow execution history (completed and failed)"""
-    return query_workflow_history(workflow_name, limit, minutes_ago)
+    return await query_workflow_history_async(
+        workflow_name, limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
 
 
 @mcp.tool()
-def workflow_logs(
+async def workflow_logs(
     workflow_name: str = "",
     level: str = "",
     limit: int = 20,
     minutes_ago: int = 1440,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query detailed workflow logs with error filtering"""
-    return query_workflow_log(workflow_name, level, limit, minutes_ago)
+    return await query_workflow_log_async(
+        workflow_name, level, limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
 
 
 # Register system tools
 @mcp.tool()
-def syslog(
+async def syslog(
     message_contains: str = "",
     source: str = "",
     level: str = "",
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    search: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """
+    Query ServiceNow application logs (syslog).
+
+    search: full-text query over messages (terms, "phrases", OR, NOT),
+    ranked best match first when the local mirror covers the window
+    """
+    return await query_syslog_async(
+        message_contains,
+        source,
+        level,
+        limit,
+        minutes_ago,
+        extra_fields,
+        search,
+        bypass_cache,
+        instance,
+    )
+
+
+@mcp.tool()
+async def syslog_follow(
+    ctx: Context,
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    cursor: str = "",
+    minutes_ago: int = 5,
+    follow_seconds: int = 30,
+    poll_seconds: int = 5,
+    limit: int = 100,
+    extra_fields: str = "",
+    instance: str = "",
 ) -> str:
-    """Query ServiceNow application logs (syslog)"""
-    return query_syslog(message_contains, source, level, limit, minutes_ago)
+    """
+    Follow ServiceNow application logs (syslog) as they are written.
+
+    Polls for entries newer than cursor for follow_seconds and streams them
+    as progress notifications when the client asked for progress; the result
+    then only counts them. Pass the returned cursor to the next call to
+    continue without repeating lines; leave it empty to start minutes_ago back.
+    """
+
+    async def report(entries, delivered):
+        await ctx.report_progress(delivered, None, entries)
+
+    meta = ctx.request_context.meta
+    progress = meta is not None and meta.progressToken is not None
+
+    return await follow_syslog_async(
+        message_contains,
+        source,
+        level,
+        cursor,
+        minutes_ago,
+        follow_seconds,
+        poll_seconds,
+        limit,
+        extra_fields,
+        instance,
+        on_entries=report if progress else None,
+    )
 
 
 @mcp.tool()
-def rest_messages(
+async def syslog_templates(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    minutes_ago: int = 60,
+    max_rows: int = 50000,
+    top: int = 20,
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Summarize ServiceNow application logs (syslog) by message template with counts"""
+    return await query_syslog_templates_async(
+        message_contains,
+        source,
+        level,
+        minutes_ago,
+        max_rows,
+        top,
+        bypass_cache,
+        instance,
+    )
+
+
+@mcp.tool()
+async def syslog_histogram(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    minutes_ago: int = 60,
+    bucket_minutes: int = 0,
+    top_sources: int = 10,
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Count ServiceNow application logs (syslog) per time bucket, level and source"""
+    return await query_syslog_histogram_async(
+        message_contains,
+        source,
+        level,
+        minutes_ago,
+        bucket_minutes,
+        top_sources,
+        bypass_cache,
+        instance,
+    )
+
+
+@mcp.tool()
+async def rest_messages(
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query REST message configurations for outbound integrations"""
-    return query_rest_messages(limit, minutes_ago)
+    return await query_rest_messages_async(
+        limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
 
 
 @mcp.tool()
-def incidents(
+async def incidents(
     number: str = "",
     sys_id: str = "",
     limit: int = 10,
     minutes_ago: int = 1440,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """Query incident records by number or sys_id for AI activity context"""
-    return query_incidents(number, sys_id, limit, minutes_ago)
+    return await query_incidents_async(
+        number, sys_id, limit, minutes_ago, extra_fields, bypass_cache, instance
+    )
+
+
+@mcp.tool()
+async def multi_query(queries: list[dict], instance: str = "") -> str:
+    """
+    Run several query tools in one batched round trip.
+
+    queries: list of {"tool": name, "args": {...}} where name is one of
+    ai_agent_executions, now_assist_metrics, now_assist_metadata,
+    workflow_context, workflow_executing, workflow_history, workflow_logs,
+    syslog, rest_messages or incidents, and args are that tool's parameters
+    (except instance, which applies to the whole call)
+    """
+    return await query_multi_async(queries, instance)
+
+
+@mcp.tool()
+def client_stats() -> str:
+    """Show response cache counters and local mirror state for the ServiceNow client"""
+    return query_client_stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+import pytest
+
+from tools import client, replica
+from tools.ai import roi_state
+from tools.cache import get_cache
+
+from .fake_instance import FakeInstance
+
+
+def _reset():
+    """Drop process-wide clients, cached responses, mirror and ROI state."""
+    client._clients.clear()
+    client._async_clients.clear()
+    get_cache().clear()
+    replica._replica = None
+    roi_state._states.clear()
+
+
+@pytest.fixture
+def instance(monkeypatch):
+    """A running FakeInstance configured as the default instance."""
+    fake = FakeInstance().start()
+    monkeypatch.setenv("SERVICENOW_INSTANCE", fake.url)
+    monkeypatch.setenv("SERVICENOW_USERNAME", "user")
+    monkeypatch.setenv("SERVICENOW_PASSWORD", "password")
+    for name in ("SERVICENOW_INSTANCES", "SERVICENOW_REPLICA_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    _reset()
+    yield fake
+    fake.stop()
+    _reset()
+
+
+@pytest.fixture
+def mirror(instance, monkeypatch, tmp_path):
+    """The local mirror of the fake instance, in a temporary file."""
+    monkeypatch.setenv("SERVICENOW_REPLICA_PATH", str(tmp_path / "replica.db"))
+    return replica.get_replica()
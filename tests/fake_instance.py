@@ -0,0 +1,249 @@
+"""
+In-process fake ServiceNow instance for the tests
+
+Serves the subset of the Table and Aggregate (stats) APIs the tools use over
+real HTTP, so the sync (requests) and async (httpx) clients are exercised
+end to end. Rows are plain dicts of internal values; a reference field may
+be {"value": ..., "display_value": ...}.
+"""
+
+import json
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+CLAUSE = re.compile(
+    r"^([a-z0-9_.]+?)"
+    r"(NOT LIKE|NOT IN|ISNOTEMPTY|ISEMPTY|STARTSWITH|RELATIVEGT|LIKE|IN"
+    r"|>=|<=|!=|>|<|=)(.*)$"
+)
+
+RELATIVE_UNITS = {"minute": 1, "hour": 60, "dayofweek": 1440}
+
+
+def value(field):
+    return field.get("value", "") if isinstance(field, dict) else field
+
+
+def display(field):
+    return field.get("display_value", "") if isinstance(field, dict) else field
+
+
+def _relative(spec):
+    """@minute@ago@N -> the internal timestamp N units ago."""
+    _, unit, _, amount = spec.split("@")
+    moment = datetime.now(timezone.utc) - timedelta(
+        minutes=RELATIVE_UNITS[unit] * int(amount)
+    )
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _matches(row, clause):
+    match = CLAUSE.match(clause)
+    if not match:
+        raise ValueError(f"Unsupported clause {clause!r}")
+    field, op, operand = match.groups()
+    actual = str(value(row.get(field, "")) or "")
+    if op == "ISNOTEMPTY":
+        return bool(actual)
+    if op == "ISEMPTY":
+        return not actual
+    if op == "LIKE":
+        return operand.lower() in actual.lower()
+    if op == "NOT LIKE":
+        return operand.lower() not in actual.lower()
+    if op == "STARTSWITH":
+        return actual.startswith(operand)
+    if op == "IN":
+        return actual in operand.split(",")
+    if op == "NOT IN":
+        return actual not in operand.split(",")
+    if op == "RELATIVEGT":
+        return actual > _relative(operand)
+    return {
+        ">=": actual >= operand,
+        "<=": actual <= operand,
+        "!=": actual != operand,
+        ">": actual > operand,
+        "<": actual < operand,
+        "=": actual == operand,
+    }[op]
+
+
+def query_rows(rows, query):
+    """Filter and order rows by an encoded query (^, ^OR, ^NQ, ORDERBY)."""
+    orders = []
+    groups = []
+    for part in (query or "").split("^NQ"):
+        clauses = []
+        for token in part.split("^"):
+            if token.startswith("ORDERBYDESC"):
+                orders.append((token[len("ORDERBYDESC") :], True))
+            elif token.startswith("ORDERBY"):
+                orders.append((token[len("ORDERBY") :], False))
+            elif token.startswith("OR") and clauses:
+                clauses[-1].append(token[2:])
+            elif token:
+                clauses.append([token])
+        groups.append(clauses)
+
+    selected = [
+        row
+        for row in rows
+        if any(
+            all(any(_matches(row, c) for c in alternatives) for alternatives in group)
+            for group in groups
+        )
+    ]
+    for field, descending in reversed(orders):
+        selected.sort(
+            key=lambda row: str(value(row.get(field, ""))), reverse=descending
+        )
+    return selected
+
+
+def render(row, display_value, fields):
+    if fields:
+        row = {field: row.get(field, "") for field in fields.split(",")}
+    if display_value == "all":
+        return {
+            field: {"value": value(v), "display_value": display(v)}
+            for field, v in row.items()
+        }
+    if display_value == "true":
+        return {field: display(v) for field, v in row.items()}
+    return {field: value(v) for field, v in row.items()}
+
+
+def _numbers(rows, field):
+    return [
+        float(value(row.get(field, ""))) for row in rows if value(row.get(field, ""))
+    ]
+
+
+def stats(rows, params):
+    """Aggregate API result; avg and sum skip empty values like the instance."""
+    group_by = [f for f in params.get("sysparm_group_by", "").split(",") if f]
+    avg_fields = [f for f in params.get("sysparm_avg_fields", "").split(",") if f]
+    sum_fields = [f for f in params.get("sysparm_sum_fields", "").split(",") if f]
+    display_value = params.get("sysparm_display_value", "true")
+
+    groups = {}
+    for row in rows:
+        key = tuple(json.dumps(row.get(field, "")) for field in group_by)
+        groups.setdefault(key, []).append(row)
+
+    result = []
+    for key, members in groups.items():
+        item = {"stats": {"count": str(len(members))}}
+        if avg_fields:
+            item["stats"]["avg"] = {}
+            for field in avg_fields:
+                numbers = _numbers(members, field)
+                item["stats"]["avg"][field] = (
+                    str(sum(numbers) / len(numbers)) if numbers else ""
+                )
+        if sum_fields:
+            item["stats"]["sum"] = {
+                field: str(sum(_numbers(members, field))) for field in sum_fields
+            }
+        if group_by:
+            item["groupby_fields"] = []
+            for field, encoded in zip(group_by, key):
+                group = json.loads(encoded)
+                item["groupby_fields"].append(
+                    {
+                        "field": field,
+                        "value": value(group),
+                        "display_value": (
+                            display(group) if display_value == "true" else value(group)
+                        ),
+                    }
+                )
+        result.append(item)
+    if not group_by:
+        return result[0] if result else {"stats": {"count": "0"}}
+    return result
+
+
+class FakeInstance:
+    """
+    Table and stats API over an in-memory {table: [row]} store.
+
+    Attributes:
+        tables: Rows per table, mutable while the server runs
+        calls: (path, params) of every request, in arrival order
+        on_request: Optional callable(path, params) run before a request is
+            answered, to change rows in the middle of a scan
+        total_count: Send the X-Total-Count header on Table API responses
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.calls = []
+        self.on_request = None
+        self.total_count = True
+        self.lock = threading.Lock()
+        self.server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                status, body, headers = fake.handle(url.path, params)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, header in headers.items():
+                    self.send_header(name, header)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, path, params):
+        with self.lock:
+            self.calls.append((path, params))
+            if self.on_request:
+                self.on_request(path, params)
+            parts = path.strip("/").split("/")  # api, now, table|stats, name
+            kind, table = parts[2], parts[3]
+            rows = query_rows(
+                self.tables.get(table, []), params.get("sysparm_query", "")
+            )
+            if kind == "stats":
+                return 200, {"result": stats(rows, params)}, {}
+            offset = int(params.get("sysparm_offset", 0))
+            limit = int(params.get("sysparm_limit", 10000))
+            page = [
+                render(
+                    row,
+                    params.get("sysparm_display_value", "false"),
+                    params.get("sysparm_fields"),
+                )
+                for row in rows[offset : offset + limit]
+            ]
+            headers = {"X-Total-Count": str(len(rows))} if self.total_count else {}
+            return 200, {"result": page}, headers
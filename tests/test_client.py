@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from tools.client import get_async_client, get_client
+
+START = datetime(2026, 1, 1)
+
+
+def incidents(count):
+    return [
+        {
+            "sys_id": f"inc{i:05d}",
+            "sys_created_on": str(START + timedelta(seconds=i)),
+            "active": "true" if i % 5 else "false",
+        }
+        for i in range(count)
+    ]
+
+
+async def _collect(records):
+    return [record async for record in records]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_parallel_scan_reads_rows_matched_after_the_count(instance, use_async):
+    # 2000 active rows are counted; before the first shard is answered 500
+    # inactive ones become active, so the last planned shard comes back full
+    rows = incidents(2500)
+    instance.tables["incident"] = rows
+
+    def activate(path, params):
+        if "sysparm_offset" in params and instance.on_request:
+            instance.on_request = None
+            for row in rows:
+                row["active"] = "true"
+
+    instance.on_request = activate
+    if use_async:
+        records = asyncio.run(
+            _collect(
+                get_async_client().iter_table_parallel(
+                    "incident", "active=true", ["sys_id"], "false"
+                )
+            )
+        )
+    else:
+        records = list(
+            get_client().iter_table_parallel(
+                "incident", "active=true", ["sys_id"], "false"
+            )
+        )
+
+    assert sorted(r["sys_id"] for r in records) == [r["sys_id"] for r in rows]
+    probes = [
+        params["sysparm_query"]
+        for path, params in instance.calls
+        if params.get("sysparm_limit") == "1"
+    ]
+    assert probes[1].startswith("active=true^sys_created_on<=")
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+START = datetime(2026, 1, 1)
+
+
+def _time(minutes):
+    return (START + timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def incidents(count):
+    return [
+        {
+            "sys_id": f"inc{i:05d}",
+            "number": f"INC{i:07d}",
+            "sys_created_on": _time(i),
+            "sys_updated_on": _time(i),
+            "short_description": f"Incident {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def test_sync_keeps_rows_updated_behind_the_cursor(instance, mirror):
+    # Two keyset pages; between them the first row (already read) and the
+    # last row (not read yet) are updated
+    rows = incidents(1500)
+    instance.tables["incident"] = rows
+    first, last = rows[0], rows[-1]
+
+    def update_mid_scan(path, params):
+        if "^NQ" in params.get("sysparm_query", "") and instance.on_request:
+            instance.on_request = None
+            first["sys_updated_on"] = "2026-06-01 00:00:01"
+            first["short_description"] = "Updated first"
+            last["sys_updated_on"] = "2026-06-01 00:00:02"
+
+    instance.on_request = update_mid_scan
+    mirror.sync("incident")
+    mirror.sync("incident")
+
+    mirrored = mirror.select(
+        "incident", equals={"sys_id": first["sys_id"]}, display_value="false"
+    )
+    assert mirrored[0]["short_description"] == "Updated first"
+    assert mirrored[0]["sys_updated_on"] == "2026-06-01 00:00:01"
+    assert len(mirror.select("incident", display_value="false")) == 1500
+
+
+def test_sync_of_an_unchanged_table_keeps_the_mark(instance, mirror):
+    instance.tables["incident"] = incidents(10)
+    assert mirror.sync("incident") == 10
+    assert mirror.sync("incident") == 1  # The row at the mark itself
+    assert mirror.stats()["incident"]["high_water"] == _time(9)
+
+
+def test_iter_updated_reads_in_keyset_batches(instance, mirror):
+    rows = incidents(25)
+    for row in rows[20:]:
+        row["sys_updated_on"] = _time(12)  # ties are ordered by sys_id
+    instance.tables["incident"] = rows
+    mirror.sync("incident")
+
+    streamed = list(mirror.iter_updated("incident", _time(10), batch_size=4))
+    expected = sorted(rows[10:], key=lambda r: (r["sys_updated_on"], r["sys_id"]))
+    assert [r["sys_id"]["value"] for r in streamed] == [r["sys_id"] for r in expected]
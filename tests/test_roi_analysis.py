@@ -0,0 +1,108 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from tools.ai import query_ai_roi_analysis, query_ai_roi_analysis_async
+
+from .conftest import _reset
+
+START = datetime(2026, 1, 1)
+
+
+def _time(hours):
+    return (START + timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def incidents(count):
+    """Incidents resolved 10 to 59 hours after creation, one per hour."""
+    rows = []
+    for i in range(count):
+        resolution = 10 + i % 50
+        rows.append(
+            {
+                "sys_id": f"inc{i:05d}",
+                "number": f"INC{i:07d}",
+                "sys_created_on": _time(i),
+                "sys_updated_on": _time(i + resolution),
+                "resolved_at": _time(i + resolution),
+                "calendar_stc": str(resolution * 3600),
+                "priority": f"{i % 4 + 1}",
+                "category": ("network", "software", "hardware")[i % 3],
+                "assignment_group": {
+                    "value": f"g{i % 2}",
+                    "display_value": f"G{i % 2}",
+                },
+                "state": "6",
+            }
+        )
+    return rows
+
+
+def execution_plans(numbers):
+    return [
+        {
+            "sys_id": f"plan{i:05d}",
+            "sys_created_on": _time(i),
+            "agent": {"value": "a1", "display_value": "Triage Agent"},
+            "objective": f"Resolve {number}",
+            "state": "complete",
+            "execution_time_sec": "3",
+        }
+        for i, number in enumerate(numbers)
+    ]
+
+
+@pytest.fixture
+def roi_instance(instance):
+    instance.tables["incident"] = incidents(120)
+    instance.tables["sn_aia_execution_plan"] = execution_plans(
+        f"INC{i:07d}" for i in range(0, 120, 4)
+    )
+    return instance
+
+
+@pytest.mark.parametrize("bucket", ["", "week"])
+def test_unknown_breakdown_is_an_error(roi_instance, bucket):
+    expected = "Error: Unknown breakdown_by foo."
+    assert query_ai_roi_analysis(breakdown_by="foo", bucket=bucket).startswith(expected)
+    result = asyncio.run(query_ai_roi_analysis_async(breakdown_by="foo", bucket=bucket))
+    assert result.startswith(expected)
+    assert not roi_instance.calls
+
+
+@pytest.mark.parametrize("bucket", ["", "week"])
+def test_supported_breakdowns_render(roi_instance, bucket):
+    for breakdown_by in ("priority", "state", "none"):
+        result = query_ai_roi_analysis(breakdown_by=breakdown_by, bucket=bucket)
+        assert not result.startswith("Error"), result
+
+
+def _means(report):
+    """The mean and n lines of a report, without records-mode medians."""
+    return [
+        re.sub(r"median [\d.]+, ", "", line)
+        for line in report.splitlines()
+        if "hours (n=" in line or "hours (median" in line or "No data" in line
+    ]
+
+
+def test_aggregate_mode_skips_empty_durations(roi_instance):
+    # Resolved records without a duration (AI-assisted ones included) are
+    # left out of aggregate mode, so it matches records mode without them
+    rows = roi_instance.tables["incident"]
+    for row in rows[1::7]:
+        row["calendar_stc"] = ""
+
+    aggregate = query_ai_roi_analysis(breakdown_by="priority", mode="aggregate")
+    aggregate_async = asyncio.run(
+        query_ai_roi_analysis_async(breakdown_by="priority", mode="aggregate")
+    )
+    _reset()
+    roi_instance.tables["incident"] = [row for row in rows if row["calendar_stc"]]
+    records = query_ai_roi_analysis(breakdown_by="priority")
+
+    assert _means(aggregate) == _means(records)
+    assert _means(aggregate_async) == _means(records)
+    assert "n=26" in aggregate and "n=77" in aggregate
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from tools.system.syslog import query_syslog, query_syslog_async
+from tools.system.syslog_templates import (
+    query_syslog_templates,
+    query_syslog_templates_async,
+)
+
+
+def entries(count):
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        moment = (now - timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")
+        rows.append(
+            {
+                "sys_id": f"log{i:04d}",
+                "sys_created_on": moment,
+                "sys_updated_on": moment,
+                "level": "2" if i % 3 == 0 else "0",
+                "source": "mail" if i % 2 else "workflow",
+                "message": f"Connection timeout {i}" if i % 5 == 0 else f"Ok {i}",
+            }
+        )
+    return rows
+
+
+def test_search_without_full_text_index_queries_the_instance(
+    instance, mirror, monkeypatch
+):
+    instance.tables["syslog"] = entries(30)
+    monkeypatch.setattr(mirror, "indexed", lambda table, field: False)
+
+    for result in (
+        query_syslog(search="timeout", minutes_ago=60),
+        asyncio.run(query_syslog_async(search="timeout", minutes_ago=60)),
+    ):
+        assert not result.startswith("Error")
+        assert "Connection timeout 5" in result
+        assert "Ok 1" not in result
+
+    searched = [
+        params["sysparm_query"]
+        for path, params in instance.calls
+        if path.endswith("/table/syslog") and "sysparm_query" in params
+    ]
+    assert len(searched) == 2
+    assert all("messageLIKEtimeout" in query for query in searched)
+
+
+def test_templates_keep_the_newest_entries_on_both_paths(instance, mirror):
+    rows = entries(30)
+    instance.tables["syslog"] = rows
+    newest, cutoff = rows[0]["sys_created_on"], rows[9]["sys_created_on"]
+
+    results = [
+        query_syslog_templates(minutes_ago=60, max_rows=10, bypass_cache=True),
+        query_syslog_templates(minutes_ago=60, max_rows=10),
+        asyncio.run(
+            query_syslog_templates_async(minutes_ago=60, max_rows=10, bypass_cache=True)
+        ),
+        asyncio.run(query_syslog_templates_async(minutes_ago=60, max_rows=10)),
+    ]
+    assert all(result == results[0] for result in results)
+    assert "10 entries" in results[0]
+    assert newest in results[0] and cutoff in results[0]
+    assert rows[10]["sys_created_on"] not in results[0]
@@ -0,0 +1,92 @@
+"""
+Helpers for the Aggregate (stats) API
+
+/api/now/stats/{table} computes COUNT, AVG and SUM per group on the instance,
+so reports that only need group totals do not have to download every record.
+"""
+
+
+def stats_params(
+    query="", group_by=None, avg_fields=None, sum_fields=None, display_value="true"
+):
+    """
+    Build sysparm_* parameters for a stats API call.
+
+    Args:
+        query: Encoded query filter
+        group_by: Fields to group by, or None for a single total
+        avg_fields: Fields to average per group
+        sum_fields: Fields to sum per group
+        display_value: "true" to group on display values, "false" for internal
+
+    Returns:
+        dict of query parameters
+    """
+    params = {
+        "sysparm_count": "true",
+        "sysparm_display_value": display_value,
+    }
+    if query:
+        params["sysparm_query"] = query
+    if group_by:
+        params["sysparm_group_by"] = ",".join(group_by)
+    if avg_fields:
+        params["sysparm_avg_fields"] = ",".join(avg_fields)
+    if sum_fields:
+        params["sysparm_sum_fields"] = ",".join(sum_fields)
+    return params
+
+
+def parse_number(value):
+    """Parse a numeric field value, which may carry thousands separators."""
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def parse_stats(body, display_value="true"):
+    """
+    Flatten a stats API body into one row per group.
+
+    Args:
+        body: Decoded JSON body of a stats API response
+        display_value: Which group value to key on, matching stats_params
+
+    Returns:
+        list of (group, stats) where group is a tuple of group-by values
+        (empty when not grouped) and stats is
+        {"count": int, "avg": {field: float}, "sum": {field: float}}
+    """
+    result = body.get("result", [])
+    if isinstance(result, dict):
+        result = [result]
+
+    rows = []
+    for item in result:
+        stats = item.get("stats", {})
+        group = tuple(
+            (
+                field.get("display_value", field.get("value", ""))
+                if display_value == "true"
+                else field.get("value", "")
+            )
+            for field in item.get("groupby_fields", [])
+        )
+        rows.append(
+            (
+                group,
+                {
+                    "count": int(parse_number(stats.get("count", 0)) or 0),
+                    "avg": {
+                        field: parse_number(value)
+                        for field, value in stats.get("avg", {}).items()
+                    },
+                    "sum": {
+                        field: parse_number(value)
+                        for field, value in stats.get("sum", {}).items()
+                    },
+                },
+            )
+        )
+    return rows
@@ -2,14 +2,24 @@
 AI and GenAI debugging tools for ServiceNow
 """
 
-from .ai_agent_executions import query_ai_agent_executions
-from .now_assist_metadata import query_now_assist_metadata
-from .now_assist_metrics import query_now_assist_metrics
-from .roi_analysis import query_ai_roi_analysis
+from .ai_agent_executions import (
+    query_ai_agent_executions,
+    query_ai_agent_executions_async,
+)
+from .now_assist_metadata import (
+    query_now_assist_metadata,
+    query_now_assist_metadata_async,
+)
+from .now_assist_metrics import query_now_assist_metrics, query_now_assist_metrics_async
+from .roi_analysis import query_ai_roi_analysis, query_ai_roi_analysis_async
 
 __all__ = [
     "query_ai_agent_executions",
+    "query_ai_agent_executions_async",
     "query_now_assist_metrics",
+    "query_now_assist_metrics_async",
     "query_now_assist_metadata",
+    "query_now_assist_metadata_async",
     "query_ai_roi_analysis",
+    "query_ai_roi_analysis_async",
 ]
@@ -2,15 +2,90 @@
 Query AI Agent execution plans and activity
 """
 
-import os
+from ..client import get_async_client, get_client
+from ..fanout import across_instances
+from ..projection import format_extra_fields, projection
+from ..streaming import (
+    aiter_results,
+    iter_results,
+    render_entries,
+    render_entries_async,
+)
 
-import requests
+TABLE = "sn_aia_execution_plan"
 
+# Fields rendered by _format_entry
+FIELDS = [
+    "sys_created_on",
+    "status",
+    "sys_id",
+    "sys_updated_on",
+]
 
+EMPTY_MESSAGE = "No AI Agent execution plans found matching your criteria."
+
+
+def _build_params(status, limit, minutes_ago, extra_fields):
+    """Build the Table API parameters for a query_ai_agent_executions call."""
+    query_parts = []
+    if status:
+        query_parts.append(f"statusLIKE{status}")
+    query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
+    query = "^".join(query_parts)
+
+    params = {
+        "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
+        "sysparm_limit": limit,
+        "sysparm_display_value": "true",
+        "sysparm_fields": projection(FIELDS, extra_fields),
+        "sysparm_exclude_reference_link": "true",
+    }
+
+    return params
+
+
+def _format_entry(entry, extra_fields):
+    """Render one AI Agent execution plan."""
+    return (
+        f"[{entry.get('sys_created_on')}] Status: {entry.get('status', 'N/A')}\n"
+        f"  Sys ID: {entry.get('sys_id', 'N/A')}\n"
+        f"  Updated: {entry.get('sys_updated_on', 'N/A')}"
+        + format_extra_fields(entry, extra_fields)
+    )
+
+
+def _format_results(response, extra_fields):
+    """Render a Table API response as tool output."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return render_entries(
+        iter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+async def _format_results_async(response, extra_fields):
+    """Async variant of _format_results that decodes the body as it arrives."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return await render_entries_async(
+        aiter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+@across_instances
 def query_ai_agent_executions(
     status: str = "",
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """
     Query AI Agent execution plans to see agentic AI activity (multi-step AI actions).
@@ -22,46 +97,31 @@ def query_ai_agent_executions(
         status: Filter by status (partial match)
         limit: Maximum number of results (default 20)
         minutes_ago: Look back this many minutes (default 60)
+        extra_fields: Comma-separated additional fields to fetch and display
+        bypass_cache: Skip the response cache and always query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
 
     Returns:
         Formatted string with AI Agent execution details
     """
-    INSTANCE = os.getenv("SERVICENOW_INSTANCE")
-    USERNAME = os.getenv("SERVICENOW_USERNAME")
-    PASSWORD = os.getenv("SERVICENOW_PASSWORD")
+    params = _build_params(status, limit, minutes_ago, extra_fields)
+    response = get_client(instance).get_table(TABLE, params, bypass_cache=bypass_cache)
+    return _format_results(response, extra_fields)
 
-    query_parts = []
-    if status:
-        query_parts.append(f"statusLIKE{status}")
-    query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
-    query = "^".join(query_parts)
 
-    url = f"{INSTANCE}/api/now/table/sn_aia_execution_plan"
-    params = {
-        "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
-        "sysparm_limit": limit,
-        "sysparm_display_value": "true",
-    }
-
-    response = requests.get(
-        url,
-        params=params,
-        auth=(USERNAME, PASSWORD),
-        headers={"Accept": "application/json"},
+@across_instances
+async def query_ai_agent_executions_async(
+    status: str = "",
+    limit: int = 20,
+    minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_ai_agent_executions for concurrent tool calls."""
+    params = _build_params(status, limit, minutes_ago, extra_fields)
+    response = await get_async_client(instance).get_table(
+        TABLE, params, bypass_cache=bypass_cache
     )
-
-    if response.status_code != 200:
-        return f"Error: {response.status_code} - {response.text}"
-
-    results = response.json().get("result", [])
-    if not results:
-        return "No AI Agent execution plans found matching your criteria."
-
-    output = []
-    for entry in results:
-        output.append(
-            f"[{entry.get('sys_created_on')}] Status: {entry.get('status', 'N/A')}\n"
-            f"  Sys ID: {entry.get('sys_id', 'N/A')}\n"
-            f"  Updated: {entry.get('sys_updated_on', 'N/A')}"
-        )
-    return "\n---\n".join(output)
+    return await _format_results_async(response, extra_fields)
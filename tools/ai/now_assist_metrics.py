@@ -2,14 +2,121 @@
 Query Now Assist usage metrics and GenAI activity
 """
 
-import os
+from ..client import get_async_client, get_client
+from ..fanout import across_instances
+from ..projection import format_extra_fields, projection
+from ..streaming import (
+    aiter_results,
+    iter_results,
+    render_entries,
+    render_entries_async,
+)
+
+TABLE = "sys_generative_ai_metric"
+
+# Fields rendered by _format_entry
+FIELDS = [
+    "sys_created_on",
+    "name",
+    "type",
+    "source",
+    "value",
+    "sys_id",
+]
+
+EMPTY_MESSAGE = "No Now Assist metrics found matching your criteria."
+
+
+def _build_params(limit, minutes_ago, extra_fields):
+    """Build the Table API parameters for a query_now_assist_metrics call."""
+    query_parts = []
+    query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
+    query = "^".join(query_parts)
+
+    params = {
+        "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
+        "sysparm_limit": limit,
+        "sysparm_display_value": "true",
+        "sysparm_fields": projection(FIELDS, extra_fields),
+        "sysparm_exclude_reference_link": "true",
+    }
+
+    return params
+
+
+def _format_entry(entry, extra_fields):
+    """Render one Now Assist metric."""
+    # Parse the value field if it exists (contains request/response details)
+    value_data = entry.get("value", "")
+    error_msg = ""
+    activity_type = ""
+
+    # Try to extract useful info from value field
+    if "error" in value_data.lower():
+        # Extract error message
+        if '"error":' in value_data:
+            try:
+                import json
 
-import requests
+                value_json = json.loads(value_data)
+                error_msg = value_json.get(
+                    "error", value_json.get("response", {}).get("error", "")
+                )
+            except:
+                error_msg = "Error present (see details)"
+
+    if '"type":' in value_data:
+        try:
+            import json
+
+            value_json = json.loads(value_data)
+            activity_type = value_json.get("type", "")
+        except:
+            pass
+
+    return (
+        f"[{entry.get('sys_created_on')}]\n"
+        f"  Name: {entry.get('name', 'N/A')}\n"
+        f"  Type: {entry.get('type', 'N/A')}\n"
+        f"  Source: {entry.get('source', 'N/A')}\n"
+        + (f"  Activity: {activity_type}\n" if activity_type else "")
+        + (f"  ⚠️ Error: {error_msg}\n" if error_msg else "")
+        + f"  Sys ID: {entry.get('sys_id', 'N/A')}"
+        + format_extra_fields(entry, extra_fields)
+    )
 
 
+def _format_results(response, extra_fields):
+    """Render a Table API response as tool output."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return render_entries(
+        iter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+async def _format_results_async(response, extra_fields):
+    """Async variant of _format_results that decodes the body as it arrives."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return await render_entries_async(
+        aiter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+@across_instances
 def query_now_assist_metrics(
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """
     Query Now Assist usage metrics including privacy operations and GenAI activity.
@@ -26,76 +133,30 @@ def query_now_assist_metrics(
     Args:
         limit: Maximum number of results (default 20)
         minutes_ago: Look back this many minutes (default 60)
+        extra_fields: Comma-separated additional fields to fetch and display
+        bypass_cache: Skip the response cache and always query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
 
     Returns:
         Formatted string with Now Assist metrics
     """
-    INSTANCE = os.getenv("SERVICENOW_INSTANCE")
-    USERNAME = os.getenv("SERVICENOW_USERNAME")
-    PASSWORD = os.getenv("SERVICENOW_PASSWORD")
+    params = _build_params(limit, minutes_ago, extra_fields)
+    response = get_client(instance).get_table(TABLE, params, bypass_cache=bypass_cache)
+    return _format_results(response, extra_fields)
 
-    query_parts = []
-    query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
-    query = "^".join(query_parts)
-
-    url = f"{INSTANCE}/api/now/table/sys_generative_ai_metric"
-    params = {
-        "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
-        "sysparm_limit": limit,
-        "sysparm_display_value": "true",
-    }
 
-    response = requests.get(
-        url,
-        params=params,
-        auth=(USERNAME, PASSWORD),
-        headers={"Accept": "application/json"},
+@across_instances
+async def query_now_assist_metrics_async(
+    limit: int = 20,
+    minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_now_assist_metrics for concurrent tool calls."""
+    params = _build_params(limit, minutes_ago, extra_fields)
+    response = await get_async_client(instance).get_table(
+        TABLE, params, bypass_cache=bypass_cache
     )
-
-    if response.status_code != 200:
-        return f"Error: {response.status_code} - {response.text}"
-
-    results = response.json().get("result", [])
-    if not results:
-        return "No Now Assist metrics found matching your criteria."
-
-    output = []
-    for entry in results:
-        # Parse the value field if it exists (contains request/response details)
-        value_data = entry.get("value", "")
-        error_msg = ""
-        activity_type = ""
-
-        # Try to extract useful info from value field
-        if "error" in value_data.lower():
-            # Extract error message
-            if '"error":' in value_data:
-                try:
-                    import json
-
-                    value_json = json.loads(value_data)
-                    error_msg = value_json.get(
-                        "error", value_json.get("response", {}).get("error", "")
-                    )
-                except:
-                    error_msg = "Error present (see details)"
-
-        if '"type":' in value_data:
-            try:
-                import json
-
-                value_json = json.loads(value_data)
-                activity_type = value_json.get("type", "")
-            except:
-                pass
-
-        output.append(
-            f"[{entry.get('sys_created_on')}]\n"
-            f"  Name: {entry.get('name', 'N/A')}\n"
-            f"  Type: {entry.get('type', 'N/A')}\n"
-            f"  Source: {entry.get('source', 'N/A')}\n"
-            + (f"  Activity: {activity_type}\n" if activity_type else "")
-            + (f"  ⚠️ Error: {error_msg}\n" if error_msg else "")
-            + f"  Sys ID: {entry.get('sys_id', 'N/A')}"
-        )
-    return "\n---\n".join(output)
+    return await _format_results_async(response, extra_fields)
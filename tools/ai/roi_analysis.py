@@ -8,16 +8,33 @@ Compares resolution times for AI-assisted vs non-AI records across:
 - Cases (Time to Closure)
 """
 
-import os
+import asyncio
+import math
 import re
 from collections import defaultdict
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-import requests
+import numpy as np
 
-INSTANCE = os.getenv("SERVICENOW_INSTANCE")
-USERNAME = os.getenv("SERVICENOW_USERNAME")
-PASSWORD = os.getenv("SERVICENOW_PASSWORD")
+from ..aggregate import parse_number, parse_stats, stats_params
+from ..client import ServiceNowAPIError, get_async_client, get_client
+from ..fanout import across_instances
+from ..pagination import PAGE_SIZE, flatten_record
+from ..replica import get_replica
+from ..timestamps import hours_between, parse_column
+from . import roi_stats, roi_trends
+from .roi_state import get_task_aggregates
+
+AI_EXECUTION_TABLE = "sn_aia_execution_plan"
+
+# table_name value that analyzes every table in TABLE_CONFIG
+ALL_TABLES = "all"
+
+UNKNOWN_TABLE = (
+    "Error: Unknown table {table}. Supported: incident, change_request, problem, "
+    "sn_customerservice_case, all"
+)
 
 # Table configuration - maps table name to relevant fields
 TABLE_CONFIG = {
@@ -26,6 +43,7 @@ TABLE_CONFIG = {
         "created_field": "sys_created_on",
         "resolved_field": "resolved_at",
         "metric_name": "Mean Time to Resolution (MTTR)",
+        "duration_field": "calendar_stc",  # Seconds from open to resolve
         "state_field": "state",
         "priority_field": "priority",
         "category_field": "category",
@@ -36,6 +54,7 @@ TABLE_CONFIG = {
         "created_field": "sys_created_on",
         "resolved_field": "closed_at",
         "metric_name": "Mean Time to Implementation",
+        "duration_field": None,
         "state_field": "state",
         "priority_field": "priority",
         "category_field": "category",
@@ -46,6 +65,7 @@ TABLE_CONFIG = {
         "created_field": "sys_created_on",
         "resolved_field": "resolved_at",
         "metric_name": "Mean Time to Root Cause",
+        "duration_field": None,
         "state_field": "state",
         "priority_field": "priority",
         "category_field": "category",
@@ -56,6 +76,7 @@ TABLE_CONFIG = {
         "created_field": "sys_created_on",
         "resolved_field": "closed_at",
         "metric_name": "Mean Time to Closure",
+        "duration_field": None,
         "state_field": "state",
         "priority_field": "priority",
         "category_field": "category",
@@ -63,81 +84,153 @@ TABLE_CONFIG = {
     },
 }
 
+# breakdown_by values mapped to the TABLE_CONFIG key of the field they group on
+BREAKDOWN_FIELDS = {
+    "priority": "priority_field",
+    "category": "category_field",
+    "group": "group_field",
+    "state": "state_field",
+}
 
-def get_ai_assisted_records():
-    """
-    Get all records that used AI agents
+UNKNOWN_BREAKDOWN = (
+    "Error: Unknown breakdown_by {breakdown_by}. Supported: "
+    + ", ".join(BREAKDOWN_FIELDS)
+    + ", none"
+)
 
-    Returns:
-        dict: {table_name: {record_number: [ai_execution_data]}}
-    """
-    url = f"{INSTANCE}/api/now/table/sn_aia_execution_plan"
+# AI-assisted record numbers per numberIN query in aggregate mode
+AI_NUMBER_BATCH = 100
 
-    # Get ALL AI executions to find records that used AI
-    params = {
-        "sysparm_query": "ORDERBYDESCsys_created_on",
-        "sysparm_fields": "sys_id,sys_created_on,agent,objective,state,execution_time_sec",
-        "sysparm_display_value": "true",
-        "sysparm_limit": 1000,
-    }
+TREND_NOTE = "Trends need per-record dates; computed from records instead"
 
-    response = requests.get(
-        url,
-        auth=(USERNAME, PASSWORD),
-        params=params,
-        headers={"Accept": "application/json"},
-    )
+AGGREGATE_NOTE = (
+    "Computed server-side from {field} (aggregate mode; means only, "
+    "use mode=records for medians, percentiles and confidence intervals)"
+)
 
-    if response.status_code != 200:
-        return {}
+AI_EXECUTION_FIELDS = [
+    "sys_id",
+    "sys_created_on",
+    "agent",
+    "objective",
+    "state",
+    "execution_time_sec",
+]
 
-    ai_records = defaultdict(lambda: defaultdict(list))
 
-    records = response.json().get("result", [])
+# Task table for each record number prefix, and one pattern matching any of
+# them, so an objective is scanned once whatever the number of tables.
+# Prefixes are case-sensitive and whole words, so "docs2" is not CS2.
+PREFIX_TABLES = {
+    config["number_prefix"]: table_name for table_name, config in TABLE_CONFIG.items()
+}
+RECORD_NUMBER = re.compile(f"\\b({'|'.join(map(re.escape, PREFIX_TABLES))})\\d+\\b")
 
-    for record in records:
-        objective = record.get("objective", "")
-
-        # Try to match different record types
-        for table_name, config in TABLE_CONFIG.items():
-            prefix = config["number_prefix"]
-            match = re.search(f"{prefix}\\d+", objective, re.IGNORECASE)
-
-            if match:
-                record_number = match.group(0).upper()
-                ai_records[table_name][record_number].append(
-                    {
-                        "time": record.get("sys_created_on"),
-                        "agent": record.get("agent"),
-                        "state": record.get("state"),
-                        "execution_time": record.get("execution_time_sec"),
-                        "objective": objective,
-                    }
-                )
-                break
 
-    return ai_records
+def _add_ai_execution(ai_records, record, tables):
+    """File one AI execution plan under each referenced record of the tables."""
+    objective = record.get("objective", "")
+    # Record number -> table, once per number however often it is mentioned
+    numbers = {
+        match.group(0): PREFIX_TABLES[match.group(1)]
+        for match in RECORD_NUMBER.finditer(objective)
+    }
+    numbers = {number: table for number, table in numbers.items() if table in tables}
+    if not numbers:
+        return
+
+    execution = {
+        "time": record.get("sys_created_on"),
+        "agent": record.get("agent"),
+        "state": record.get("state"),
+        "execution_time": record.get("execution_time_sec"),
+        "objective": objective,
+    }
+    for record_number, table_name in numbers.items():
+        ai_records[table_name][record_number].append(execution)
+
 
+def _ai_execution_query(tables, days_ago=0):
+    """
+    Encoded query for the execution plans that can reference the tables.
 
-def get_task_records(table_name):
+    Most plans are not tied to a task record, so filtering on the record
+    number prefixes in the objective keeps them off the wire. Each prefix is
+    matched followed by a digit, since "LIKECS" alone matches most text.
+    LIKE is still case-insensitive and has no word boundaries, so a few
+    unrelated plans (e.g. "sinc0001") come back and are dropped by
+    RECORD_NUMBER.
     """
-    Get all records from a task table with resolution times
+    query = "^OR".join(
+        f"objectiveLIKE{TABLE_CONFIG[table]['number_prefix']}{digit}"
+        for table in tables
+        for digit in range(10)
+    )
+    if days_ago:
+        query += f"^sys_created_onRELATIVEGT@dayofweek@ago@{days_ago}"
+    return query
+
+
+def get_ai_assisted_records(instance="", tables=None, days_ago=0):
+    """
+    Get all records that used AI agents
+
+    Walks the execution plans whose objective mentions a record number
+    prefix of the tables with a parallel paged scan, so the scan is not
+    capped at a single page of results.
 
     Args:
-        table_name: incident, change_request, problem, etc.
+        instance: Instance name, or "" for the default instance
+        tables: Task tables to collect AI activity for (default: all)
+        days_ago: Only execution plans from the last N days (0 = all time)
 
     Returns:
-        list: Records with resolution time calculated
+        dict: {table_name: {record_number: [ai_execution_data]}}
     """
-    config = TABLE_CONFIG.get(table_name)
-    if not config:
-        return []
+    tables = list(tables or TABLE_CONFIG)
+    replica = get_replica(instance)
+    if replica and replica.covers(AI_EXECUTION_TABLE):
+        records = replica.read(
+            AI_EXECUTION_TABLE, minutes_ago=days_ago * 1440 if days_ago else None
+        )
+    else:
+        records = get_client(instance).iter_table_parallel(
+            AI_EXECUTION_TABLE,
+            _ai_execution_query(tables, days_ago),
+            fields=AI_EXECUTION_FIELDS,
+        )
+
+    ai_records = defaultdict(lambda: defaultdict(list))
+    for record in records:
+        _add_ai_execution(ai_records, record, tables)
+    return ai_records
+
 
-    url = f"{INSTANCE}/api/now/table/{table_name}"
+async def get_ai_assisted_records_async(instance="", tables=None, days_ago=0):
+    """Async variant of get_ai_assisted_records."""
+    tables = list(tables or TABLE_CONFIG)
+    replica = get_replica(instance)
+    if replica and replica.covers(AI_EXECUTION_TABLE):
+        return await asyncio.to_thread(
+            get_ai_assisted_records, instance, tables, days_ago
+        )
+
+    ai_records = defaultdict(lambda: defaultdict(list))
+    async for record in get_async_client(instance).iter_table_parallel(
+        AI_EXECUTION_TABLE,
+        _ai_execution_query(tables, days_ago),
+        fields=AI_EXECUTION_FIELDS,
+    ):
+        _add_ai_execution(ai_records, record, tables)
+    return ai_records
 
-    fields = [
+
+def _task_fields(config):
+    """Fields needed from a task table to compute resolution times."""
+    return [
         "number",
         "sys_id",
+        "sys_updated_on",
         config["created_field"],
         config["resolved_field"],
         config["state_field"],
@@ -146,139 +239,428 @@ def get_task_records(table_name):
         config["group_field"],
     ]
 
-    # Get ALL records to analyze
-    params = {
-        "sysparm_query": "ORDERBYDESCsys_created_on",
-        "sysparm_fields": ",".join(fields),
-        "sysparm_display_value": "true",
-        "sysparm_limit": 1000,
+
+def _task_record(rec, config, resolution_hours):
+    """Flatten a task record with its resolution time."""
+    return {
+        "number": rec.get("number", ""),
+        "sys_id": rec.get("sys_id", ""),
+        "created": rec.get(config["created_field"], ""),
+        "resolved": rec.get(config["resolved_field"], ""),
+        "resolution_hours": resolution_hours,
+        "state": rec.get(config["state_field"], ""),
+        "priority": rec.get(config["priority_field"], ""),
+        "category": rec.get(config["category_field"], ""),
+        "group": rec.get(config["group_field"], ""),
     }
 
-    response = requests.get(
-        url,
-        auth=(USERNAME, PASSWORD),
-        params=params,
-        headers={"Accept": "application/json"},
-    )
 
-    if response.status_code != 200:
-        return []
+def _changed_query(aggregates, mark=""):
+    """Encoded query for task records updated since the last run, up to mark."""
+    clauses = []
+    if aggregates.high_water:
+        # >= so records sharing the mark's second are not missed
+        clauses.append(f"sys_updated_on>={aggregates.high_water}")
+    if mark:
+        clauses.append(f"sys_updated_on<={mark}")
+    return "^".join(clauses)
+
+
+def _internal(rec, field):
+    """Internal value of a sysparm_display_value=all field."""
+    value = rec.get(field, "")
+    return value.get("value", "") if isinstance(value, dict) else value
 
-    records = response.json().get("result", [])
-    processed = []
 
-    for rec in records:
-        created = rec.get(config["created_field"], "")
-        resolved = rec.get(config["resolved_field"], "")
-
-        # Calculate resolution time if resolved
-        resolution_hours = None
-        if created and resolved:
-            try:
-                created_dt = datetime.strptime(created, "%Y-%m-%d %H:%M:%S")
-                resolved_dt = datetime.strptime(resolved, "%Y-%m-%d %H:%M:%S")
-                resolution_hours = (resolved_dt - created_dt).total_seconds() / 3600
-            except:
-                pass
-
-        processed.append(
-            {
-                "number": rec.get("number", ""),
-                "created": created,
-                "resolved": resolved,
-                "resolution_hours": resolution_hours,
-                "state": rec.get(config["state_field"], ""),
-                "priority": rec.get(config["priority_field"], ""),
-                "category": rec.get(config["category_field"], ""),
-                "group": rec.get(config["group_field"], ""),
-            }
+def _process_batch(records, config, aggregates):
+    """
+    Process one batch (list) of raw (sysparm_display_value=all) task records.
+
+    Resolution times are computed from the internal (UTC) values of the
+    whole batch at once; each record is then compacted to the aggregates'
+    TaskEntry, with created and updated kept as internal values.
+
+    Returns:
+        ((sys_id, TaskEntry) pairs, newest internal sys_updated_on or None)
+    """
+    created = [_internal(rec, config["created_field"]) for rec in records]
+    resolved = [_internal(rec, config["resolved_field"]) for rec in records]
+    hours = hours_between(parse_column(created), parse_column(resolved))
+
+    processed = []
+    newest = None
+    for rec, created_at, resolved_at, resolution_hours in zip(
+        records, created, resolved, hours.tolist()
+    ):
+        updated = _internal(rec, "sys_updated_on")
+        newest = max(newest or updated, updated)
+        record = _task_record(
+            flatten_record(rec, "true"),
+            config,
+            None if math.isnan(resolution_hours) else resolution_hours,
         )
+        record["created"] = created_at
+        record["resolved"] = resolved_at
+        record["updated"] = updated
+        processed.append(aggregates.entry(record))
+    return processed, newest
 
-    return processed
 
+def _process_changed(records, config, aggregates):
+    """
+    Process a stream of raw task records one PAGE_SIZE batch at a time.
+
+    Only the compact entries are kept, so a first run over a large table
+    never holds more than one batch of raw records.
 
-def query_ai_roi_analysis(table_name="incident", breakdown_by="priority"):
+    Returns:
+        ((sys_id, TaskEntry) pairs, newest internal sys_updated_on or None)
     """
-    Analyze AI ROI for a specific task table
+    records = iter(records)
+    processed = []
+    newest = None
+    while True:
+        batch = list(islice(records, PAGE_SIZE))
+        if not batch:
+            return processed, newest
+        entries, batch_newest = _process_batch(batch, config, aggregates)
+        processed.extend(entries)
+        newest = max(filter(None, (newest, batch_newest)), default=None)
+
+
+def task_aggregates(table_name, instance=""):
+    """Return the running aggregates of a task table on an instance."""
+    return get_task_aggregates(
+        get_client(instance).instance, table_name, BREAKDOWN_FIELDS
+    )
+
+
+def fetch_changed_records(table_name, aggregates, instance=""):
+    """
+    Get task records updated since the aggregates' last run
+
+    The first run for a table reads it in full. Instance and mirror reads
+    both use keyset pages, processed one batch at a time; on the instance a
+    record updated mid-scan cannot shift them the way it shifts offset
+    shards.
 
     Args:
-        table_name: incident, change_request, problem, sn_customerservice_case
-        breakdown_by: priority, category, group, or none
+        table_name: incident, change_request, problem, etc.
+        aggregates: TaskAggregates of the table
+        instance: Instance name, or "" for the default instance
 
     Returns:
-        Formatted analysis string
+        ((sys_id, TaskEntry) pairs, newest internal sys_updated_on or None)
     """
-    config = TABLE_CONFIG.get(table_name)
-    if not config:
-        return f"Error: Unknown table {table_name}. Supported: incident, change_request, problem, sn_customerservice_case"
+    config = TABLE_CONFIG[table_name]
 
-    # Get AI-assisted records
-    ai_records = get_ai_assisted_records()
-    ai_numbers = set(ai_records.get(table_name, {}).keys())
+    # Read from the local mirror when available
+    replica = get_replica(instance)
+    if replica and replica.covers(table_name):
+        replica.ensure_fresh(table_name)
+        records = replica.iter_updated(table_name, aggregates.high_water)
+        return _process_changed(records, config, aggregates)
+
+    client = get_client(instance)
+    query = _changed_query(aggregates)
+    mark = client.updated_mark(table_name, query)
+    if mark is None:
+        return [], None
+    records = client.iter_table(
+        table_name,
+        _changed_query(aggregates, mark),
+        fields=_task_fields(config),
+        display_value="all",
+    )
+    changed, _ = _process_changed(records, config, aggregates)
+    return changed, mark
 
-    # Get all task records
-    all_records = get_task_records(table_name)
 
-    # Split into AI vs non-AI, only include resolved records
-    with_ai = [
-        r
-        for r in all_records
-        if r["number"] in ai_numbers and r["resolution_hours"] is not None
-    ]
-    without_ai = [
-        r
-        for r in all_records
-        if r["number"] not in ai_numbers and r["resolution_hours"] is not None
+async def fetch_changed_records_async(table_name, aggregates, instance=""):
+    """Async variant of fetch_changed_records."""
+    replica = get_replica(instance)
+    if replica and replica.covers(table_name):
+        return await asyncio.to_thread(
+            fetch_changed_records, table_name, aggregates, instance
+        )
+
+    client = get_async_client(instance)
+    query = _changed_query(aggregates)
+    mark = await client.updated_mark(table_name, query)
+    if mark is None:
+        return [], None
+    changed = []
+    batch = []
+    async for rec in client.iter_table(
+        table_name,
+        _changed_query(aggregates, mark),
+        fields=_task_fields(TABLE_CONFIG[table_name]),
+        display_value="all",
+    ):
+        batch.append(rec)
+        if len(batch) >= PAGE_SIZE:
+            changed += await _process_batch_async(batch, table_name, aggregates)
+            batch = []
+    changed += await _process_batch_async(batch, table_name, aggregates)
+    return changed, mark
+
+
+async def _process_batch_async(records, table_name, aggregates):
+    """Process a batch in a worker thread, off the event loop."""
+    entries, _ = await asyncio.to_thread(
+        _process_batch, records, TABLE_CONFIG[table_name], aggregates
+    )
+    return entries
+
+
+def _new_summary(total):
+    """
+    Empty summary; aggregates are [count, total resolution hours] pairs.
+
+    "samples" holds the RunningStats behind the aggregates, keyed the same
+    way, when they come from the incrementally maintained task aggregates.
+    """
+    return {
+        "total": total,
+        "with_ai": [0, 0.0],
+        "without_ai": [0, 0.0],
+        "with_ai_groups": defaultdict(lambda: [0, 0.0]),
+        "without_ai_groups": defaultdict(lambda: [0, 0.0]),
+        "ai_tasks": {},
+        "samples": None,
+        "trend": None,
+    }
+
+
+def _add_time(aggregate, hours, count=1):
+    aggregate[0] += count
+    aggregate[1] += hours
+
+
+def _mean(aggregate):
+    return aggregate[1] / aggregate[0]
+
+
+def _grouped(breakdown_by):
+    return bool(breakdown_by) and breakdown_by != "none"
+
+
+def _summarize_state(table_name, breakdown_by, ai_records, aggregates, bucket=""):
+    """Snapshot the running aggregates of a task table into a summary."""
+    summary = _new_summary(0)
+    samples = {}
+    with aggregates.lock:
+        summary["total"] = len(aggregates.records)
+        for number in ai_records.get(table_name, {}):
+            record = aggregates.record(number)
+            if record:
+                summary["ai_tasks"][number] = record
+
+        for side, with_ai in (("with_ai", True), ("without_ai", False)):
+            stats = aggregates.side(with_ai)
+            samples[side] = stats and stats.copy()
+            if stats:
+                _add_time(summary[side], stats.total, stats.count)
+            if _grouped(breakdown_by):
+                groups = aggregates.groups(breakdown_by, with_ai)
+                samples[f"{side}_groups"] = {
+                    group: stats.copy() for group, stats in groups.items()
+                }
+                for group, stats in groups.items():
+                    _add_time(
+                        summary[f"{side}_groups"][group], stats.total, stats.count
+                    )
+        if bucket:
+            cols = roi_trends.columns(
+                aggregates.records.values(),
+                (
+                    aggregates.breakdowns.index(breakdown_by)
+                    if _grouped(breakdown_by)
+                    else None
+                ),
+            )
+
+    summary["samples"] = samples
+    if bucket:
+        summary["trend"] = roi_trends.trend(cols, bucket)
+    return summary
+
+
+def _summarize_aggregates(table_name, breakdown_by, total, resolved_groups, ai_tasks):
+    """
+    Build the same aggregates from stats API group totals.
+
+    The non-AI side is the resolved total minus the AI-assisted records,
+    which are the only task records fetched individually. Both sides count
+    only records with a duration, so the resolved totals are summed over
+    those records alone.
+    """
+    summary = _new_summary(total)
+    resolved = [0, 0.0]
+    resolved_by_group = defaultdict(lambda: [0, 0.0])
+    duration_field = TABLE_CONFIG[table_name]["duration_field"]
+    for group, stats in resolved_groups:
+        hours = (stats["sum"].get(duration_field) or 0.0) / 3600
+        _add_time(resolved, hours, stats["count"])
+        if _grouped(breakdown_by):
+            _add_time(resolved_by_group[group[0]], hours, stats["count"])
+
+    for r in ai_tasks:
+        summary["ai_tasks"].setdefault(r["number"], r)
+        if r["resolution_hours"] is None:
+            continue
+        _add_time(summary["with_ai"], r["resolution_hours"])
+        if _grouped(breakdown_by):
+            _add_time(summary["with_ai_groups"][r[breakdown_by]], r["resolution_hours"])
+
+    _add_time(
+        summary["without_ai"],
+        resolved[1] - summary["with_ai"][1],
+        resolved[0] - summary["with_ai"][0],
+    )
+    for group, aggregate in resolved_by_group.items():
+        with_ai = summary["with_ai_groups"].get(group, [0, 0.0])
+        if aggregate[0] > with_ai[0]:
+            _add_time(
+                summary["without_ai_groups"][group],
+                aggregate[1] - with_ai[1],
+                aggregate[0] - with_ai[0],
+            )
+
+    return summary
+
+
+def _group_line(aggregate, stats):
+    """One side of a breakdown group: mean, plus the median when sampled."""
+    if not aggregate:
+        return "No data"
+    if not stats:
+        return f"{_mean(aggregate):.1f} hours (n={aggregate[0]})"
+    return (
+        f"{_mean(aggregate):.1f} hours "
+        f"(median {roi_stats.describe(stats)['median']:.1f}, n={aggregate[0]})"
+    )
+
+
+def _distribution_lines(with_ai, without_ai):
+    """Robust statistics and bootstrap intervals for the overall comparison."""
+    ai = roi_stats.describe(with_ai)
+    non_ai = roi_stats.describe(without_ai)
+    interval = roi_stats.bootstrap_delta(without_ai, with_ai)
+    trimmed = f"Trimmed mean ({roi_stats.TRIM_PROPORTION:.0%})"
+
+    lines = [f"  {'Hours':<22}{'With AI':>10}{'Without AI':>12}{'Saved':>9}"]
+    for label, key in (
+        ("Std dev", "stdev"),
+        ("Median", "median"),
+        ("P90", "p90"),
+        (trimmed, "trimmed_mean"),
+    ):
+        saved = "" if key == "stdev" else f"{non_ai[key] - ai[key]:>9.1f}"
+        lines.append(f"  {label:<22}{ai[key]:>10.1f}{non_ai[key]:>12.1f}{saved}")
+    lines.append(
+        f"  {roi_stats.CONFIDENCE:.0%} CI on time saved: "
+        f"mean {interval['mean'][0]:.1f} to {interval['mean'][1]:.1f} hours, "
+        f"median {interval['median'][0]:.1f} to {interval['median'][1]:.1f} hours"
+    )
+    lines.append("")
+    return lines
+
+
+def _hours(value):
+    return "-" if np.isnan(value) else f"{value:.1f}h"
+
+
+def _trend_lines(trend, breakdown_by):
+    """Per-bucket AI vs non-AI table, plus rolling delta per breakdown group."""
+    bucket = trend["bucket"]
+    totals = trend["totals"]
+    delta = totals["means"][0] - totals["means"][1]
+    rolling = totals["rolling_means"][0] - totals["rolling_means"][1]
+
+    lines = [
+        f"TREND BY {bucket.upper()} "
+        f"(rolling delta over {roi_trends.TREND_WINDOW} {bucket}s):",
+        "-" * 80,
+        f"  {bucket.capitalize() + ' of':<12}{'AI n':>7}{'AI avg':>9}"
+        f"{'Non-AI n':>10}{'Non-AI avg':>12}{'Delta':>9}{'Rolling':>10}",
     ]
+    for i, label in enumerate(trend["labels"]):
+        lines.append(
+            f"  {label:<12}{totals['counts'][1][i]:>7}"
+            f"{_hours(totals['means'][1][i]):>9}"
+            f"{totals['counts'][0][i]:>10}{_hours(totals['means'][0][i]):>12}"
+            f"{_hours(delta[i]):>9}{_hours(rolling[i]):>10}"
+        )
+    lines.append("  Delta = non-AI minus AI average hours (positive: AI faster)")
+    lines.append("")
+
+    if _grouped(breakdown_by):
+        lines.append(f"ROLLING DELTA BY {breakdown_by.upper()} (first -> latest):")
+        lines.append("-" * 80)
+        group_rolling = trend["rolling_means"]
+        for index, group in enumerate(trend["groups"]):
+            deltas = group_rolling[index][0] - group_rolling[index][1]
+            known = deltas[~np.isnan(deltas)]
+            if not len(known):
+                lines.append(f"  {group}: No AI vs non-AI overlap")
+                continue
+            lines.append(f"  {group}: {_hours(known[0])} -> {_hours(known[-1])}")
+        lines.append("")
+    return lines
+
+
+def _build_report(table_name, breakdown_by, ai_records, summary, note=""):
+    """Render the AI vs non-AI comparison for one task table."""
+    config = TABLE_CONFIG[table_name]
+    ai_numbers = set(ai_records.get(table_name, {}).keys())
+    with_ai = summary["with_ai"]
+    without_ai = summary["without_ai"]
+    samples = summary["samples"]
 
     # Build output
     output = []
     output.append(f"AI ROI ANALYSIS - {table_name.upper().replace('_', ' ')}")
     output.append("=" * 80)
     output.append(f"Metric: {config['metric_name']}")
-    output.append(f"Total records: {len(all_records)}")
-    output.append(f"  - Resolved: {len(with_ai) + len(without_ai)}")
+    if note:
+        output.append(note)
+    output.append(f"Total records: {summary['total']}")
+    output.append(f"  - Resolved: {with_ai[0] + without_ai[0]}")
     output.append(
-        f"  - With AI: {len(with_ai)} resolved ({len(ai_numbers)} total AI activity)"
+        f"  - With AI: {with_ai[0]} resolved ({len(ai_numbers)} total AI activity)"
     )
-    output.append(f"  - Without AI: {len(without_ai)} resolved")
+    output.append(f"  - Without AI: {without_ai[0]} resolved")
     output.append("")
 
     # Overall comparison
-    if with_ai and without_ai:
-        avg_with_ai = sum(r["resolution_hours"] for r in with_ai) / len(with_ai)
-        avg_without_ai = sum(r["resolution_hours"] for r in without_ai) / len(
-            without_ai
-        )
+    if with_ai[0] and without_ai[0]:
+        avg_with_ai = _mean(with_ai)
+        avg_without_ai = _mean(without_ai)
         improvement = ((avg_without_ai - avg_with_ai) / avg_without_ai) * 100
         time_saved = avg_without_ai - avg_with_ai
 
         output.append(f"OVERALL {config['metric_name'].upper()}:")
         output.append("-" * 80)
-        output.append(f"  With AI:     {avg_with_ai:.1f} hours (n={len(with_ai)})")
-        output.append(
-            f"  Without AI:  {avg_without_ai:.1f} hours (n={len(without_ai)})"
-        )
+        output.append(f"  With AI:     {avg_with_ai:.1f} hours (n={with_ai[0]})")
+        output.append(f"  Without AI:  {avg_without_ai:.1f} hours (n={without_ai[0]})")
         output.append(
             f"  Improvement: {improvement:.1f}% {'faster' if improvement > 0 else 'slower'}"
         )
         output.append(f"  Time saved:  {time_saved:.1f} hours per record")
         output.append("")
+        if samples:
+            output.extend(
+                _distribution_lines(samples["with_ai"], samples["without_ai"])
+            )
 
         # Breakdown analysis
-        if breakdown_by and breakdown_by != "none":
+        if _grouped(breakdown_by):
             output.append(f"BREAKDOWN BY {breakdown_by.upper()}:")
             output.append("-" * 80)
 
-            # Group by breakdown field
-            with_ai_groups = defaultdict(list)
-            without_ai_groups = defaultdict(list)
-
-            for r in with_ai:
-                with_ai_groups[r[breakdown_by]].append(r["resolution_hours"])
-
-            for r in without_ai:
-                without_ai_groups[r[breakdown_by]].append(r["resolution_hours"])
+            with_ai_groups = summary["with_ai_groups"]
+            without_ai_groups = summary["without_ai_groups"]
 
             # Get all unique groups
             all_groups = set(
@@ -286,38 +668,28 @@ def query_ai_roi_analysis(table_name="incident", breakdown_by="priority"):
             )
 
             for group in sorted(all_groups):
-                ai_times = with_ai_groups.get(group, [])
-                non_ai_times = without_ai_groups.get(group, [])
+                ai_times = with_ai_groups.get(group)
+                non_ai_times = without_ai_groups.get(group)
 
+                ai_line = _group_line(
+                    ai_times, samples and samples["with_ai_groups"].get(group)
+                )
+                non_ai_line = _group_line(
+                    non_ai_times, samples and samples["without_ai_groups"].get(group)
+                )
+                output.append(f"  {group}:")
+                output.append(f"    With AI:    {ai_line}")
+                output.append(f"    Without AI: {non_ai_line}")
                 if ai_times and non_ai_times:
-                    avg_ai = sum(ai_times) / len(ai_times)
-                    avg_non_ai = sum(non_ai_times) / len(non_ai_times)
+                    avg_ai = _mean(ai_times)
+                    avg_non_ai = _mean(non_ai_times)
                     improvement = ((avg_non_ai - avg_ai) / avg_non_ai) * 100
-
-                    output.append(f"  {group}:")
-                    output.append(
-                        f"    With AI:    {avg_ai:.1f} hours (n={len(ai_times)})"
-                    )
-                    output.append(
-                        f"    Without AI: {avg_non_ai:.1f} hours (n={len(non_ai_times)})"
-                    )
                     output.append(f"    Improvement: {improvement:.1f}%")
-                elif ai_times:
-                    avg_ai = sum(ai_times) / len(ai_times)
-                    output.append(f"  {group}:")
-                    output.append(
-                        f"    With AI:    {avg_ai:.1f} hours (n={len(ai_times)})"
-                    )
-                    output.append(f"    Without AI: No data")
-                elif non_ai_times:
-                    avg_non_ai = sum(non_ai_times) / len(non_ai_times)
-                    output.append(f"  {group}:")
-                    output.append(f"    With AI:    No data")
-                    output.append(
-                        f"    Without AI: {avg_non_ai:.1f} hours (n={len(non_ai_times)})"
-                    )
                 output.append("")
 
+        if summary["trend"]:
+            output.extend(_trend_lines(summary["trend"], breakdown_by))
+
         # AI activity details
         if ai_numbers:
             output.append("AI ACTIVITY DETAILS:")
@@ -335,7 +707,7 @@ def query_ai_roi_analysis(table_name="incident", breakdown_by="priority"):
                 if len(executions) > 3:
                     output.append(f"    ... and {len(executions) - 3} more")
 
-    elif not with_ai and not without_ai:
+    elif not with_ai[0] and not without_ai[0]:
         output.append("INSUFFICIENT DATA:")
         output.append("-" * 80)
         output.append(f"  No resolved records found")
@@ -349,15 +721,15 @@ def query_ai_roi_analysis(table_name="incident", breakdown_by="priority"):
     else:
         output.append("INSUFFICIENT DATA FOR COMPARISON:")
         output.append("-" * 80)
-        output.append(f"  Resolved with AI: {len(with_ai)}")
-        output.append(f"  Resolved without AI: {len(without_ai)}")
+        output.append(f"  Resolved with AI: {with_ai[0]}")
+        output.append(f"  Resolved without AI: {without_ai[0]}")
         output.append("")
         output.append("Need at least 1 resolved record in each category for comparison")
         output.append("")
         if ai_numbers:
             output.append("Records with AI activity:")
             for number in sorted(ai_numbers):
-                rec = next((r for r in all_records if r["number"] == number), None)
+                rec = summary["ai_tasks"].get(number)
                 if rec:
                     status = (
                         f"Resolved in {rec['resolution_hours']:.1f} hours"
@@ -367,3 +739,369 @@ def query_ai_roi_analysis(table_name="incident", breakdown_by="priority"):
                     output.append(f"  {number}: {status}")
 
     return "\n".join(output)
+
+
+def _aggregate_mode_note(table_name, breakdown_by):
+    """Return why aggregate mode cannot serve a request, or "" if it can."""
+    config = TABLE_CONFIG[table_name]
+    if not config["duration_field"]:
+        return (
+            f"Note: aggregate mode needs a duration field, which {table_name} "
+            "lacks; analyzed from records instead"
+        )
+    return ""
+
+
+def _aggregate_requests(table_name, breakdown_by):
+    """
+    Stats API parameters for the total count and the resolved group totals.
+
+    The stats API averages over non-empty values only, so resolved records
+    without a duration are filtered out and the duration is summed.
+    """
+    config = TABLE_CONFIG[table_name]
+    duration_field = config["duration_field"]
+    group_by = None
+    if _grouped(breakdown_by):
+        group_by = [config[BREAKDOWN_FIELDS[breakdown_by]]]
+    return (
+        stats_params(),
+        stats_params(
+            query=f"{config['resolved_field']}ISNOTEMPTY^{duration_field}ISNOTEMPTY",
+            group_by=group_by,
+            sum_fields=[duration_field],
+        ),
+    )
+
+
+def _ai_task_params(config, numbers):
+    """Table API parameters for one batch of AI-assisted task records."""
+    return {
+        "sysparm_query": f"numberIN{','.join(numbers)}",
+        "sysparm_fields": ",".join(_task_fields(config) + [config["duration_field"]]),
+        "sysparm_display_value": "true",
+        "sysparm_exclude_reference_link": "true",
+        "sysparm_limit": len(numbers),
+    }
+
+
+def _process_aggregate_record(rec, config):
+    """Flatten a display-value task record, timed by the duration field."""
+    processed = _task_record(rec, config, None)
+    duration = parse_number(rec.get(config["duration_field"], ""))
+    processed["resolution_hours"] = (
+        duration / 3600 if processed["resolved"] and duration is not None else None
+    )
+    return processed
+
+
+def _number_batches(numbers):
+    numbers = sorted(numbers)
+    return [
+        numbers[i : i + AI_NUMBER_BATCH]
+        for i in range(0, len(numbers), AI_NUMBER_BATCH)
+    ]
+
+
+def _stats_rows(response):
+    if response.status_code != 200:
+        raise ServiceNowAPIError(response)
+    return parse_stats(response.json())
+
+
+def summarize_aggregates(table_name, breakdown_by, ai_records, instance=""):
+    """
+    Summarize a task table with the stats API.
+
+    Only the group totals and the AI-assisted task records cross the wire.
+    """
+    config = TABLE_CONFIG[table_name]
+    client = get_client(instance)
+    total_params, resolved_params = _aggregate_requests(table_name, breakdown_by)
+    total = _stats_rows(client.get_stats(table_name, total_params))
+    resolved_groups = _stats_rows(client.get_stats(table_name, resolved_params))
+    ai_tasks = [
+        _process_aggregate_record(rec, config)
+        for numbers in _number_batches(ai_records.get(table_name, {}))
+        for rec in client.get_records(table_name, _ai_task_params(config, numbers))
+    ]
+    return _summarize_aggregates(
+        table_name,
+        breakdown_by,
+        total[0][1]["count"] if total else 0,
+        resolved_groups,
+        ai_tasks,
+    )
+
+
+async def summarize_aggregates_async(table_name, breakdown_by, ai_records, instance=""):
+    """Async variant of summarize_aggregates; issues all reads concurrently."""
+    config = TABLE_CONFIG[table_name]
+    client = get_async_client(instance)
+    total_params, resolved_params = _aggregate_requests(table_name, breakdown_by)
+    total_response, resolved_response, *batches = await asyncio.gather(
+        client.get_stats(table_name, total_params),
+        client.get_stats(table_name, resolved_params),
+        *(
+            client.get_records(table_name, _ai_task_params(config, numbers))
+            for numbers in _number_batches(ai_records.get(table_name, {}))
+        ),
+    )
+    total = _stats_rows(total_response)
+    ai_tasks = [
+        _process_aggregate_record(rec, config) for batch in batches for rec in batch
+    ]
+    return _summarize_aggregates(
+        table_name,
+        breakdown_by,
+        total[0][1]["count"] if total else 0,
+        _stats_rows(resolved_response),
+        ai_tasks,
+    )
+
+
+def _plan_tables(tables, breakdown_by, mode, bucket=""):
+    """
+    Split tables into those summarized by the stats API and those from
+    the running aggregates.
+
+    Returns:
+        (pushed tables, local tables, {table: note})
+    """
+    if mode == "aggregate" and bucket:
+        notes = {table: TREND_NOTE for table in tables}
+    else:
+        notes = {
+            table: (
+                _aggregate_mode_note(table, breakdown_by) if mode == "aggregate" else ""
+            )
+            for table in tables
+        }
+    pushed = [t for t in tables if mode == "aggregate" and not notes[t]]
+    local = [t for t in tables if t not in pushed]
+    for table in pushed:
+        notes[table] = AGGREGATE_NOTE.format(
+            field=TABLE_CONFIG[table]["duration_field"]
+        )
+    return pushed, local, notes
+
+
+def analyze_tables(tables, breakdown_by, mode, days_ago=0, bucket="", instance=""):
+    """
+    Summarize several task tables from one AI execution plan scan
+
+    The execution plans and the changed records of every table are fetched
+    concurrently; tables summarized by the stats API follow once the AI
+    record numbers are known. days_ago limits the AI execution plans
+    considered, not the task records. bucket (day, week or month) adds a
+    trend of each table's AI vs non-AI delta over time.
+
+    Returns:
+        (ai_records, {table: summary}, {table: note})
+    """
+    pushed, local, notes = _plan_tables(tables, breakdown_by, mode, bucket)
+    states = {table: task_aggregates(table, instance) for table in local}
+
+    with ThreadPoolExecutor(max_workers=len(tables) + 1) as pool:
+        ai_future = pool.submit(get_ai_assisted_records, instance, tables, days_ago)
+        fetches = {
+            table: pool.submit(fetch_changed_records, table, states[table], instance)
+            for table in local
+        }
+        ai_records = ai_future.result()
+        pushed_futures = {
+            table: pool.submit(
+                summarize_aggregates, table, breakdown_by, ai_records, instance
+            )
+            for table in pushed
+        }
+
+        summaries = {}
+        for table, future in fetches.items():
+            changed, newest = future.result()
+            states[table].apply(changed, ai_records.get(table, {}), newest)
+            summaries[table] = _summarize_state(
+                table, breakdown_by, ai_records, states[table], bucket
+            )
+        for table, future in pushed_futures.items():
+            summaries[table] = future.result()
+
+    return ai_records, summaries, notes
+
+
+async def analyze_tables_async(
+    tables, breakdown_by, mode, days_ago=0, bucket="", instance=""
+):
+    """Async variant of analyze_tables."""
+    pushed, local, notes = _plan_tables(tables, breakdown_by, mode, bucket)
+    states = {table: task_aggregates(table, instance) for table in local}
+
+    ai_records, *fetched = await asyncio.gather(
+        get_ai_assisted_records_async(instance, tables, days_ago),
+        *(
+            fetch_changed_records_async(table, states[table], instance)
+            for table in local
+        ),
+    )
+    # The AI record numbers are needed to split the stats API aggregates
+    pushed_summaries = await asyncio.gather(
+        *(
+            summarize_aggregates_async(table, breakdown_by, ai_records, instance)
+            for table in pushed
+        )
+    )
+
+    summaries = dict(zip(pushed, pushed_summaries))
+    for table, (changed, newest) in zip(local, fetched):
+        # Folding records in and building trends is CPU-bound; keep it off
+        # the event loop like replica reads
+        await asyncio.to_thread(
+            states[table].apply, changed, ai_records.get(table, {}), newest
+        )
+        summaries[table] = await asyncio.to_thread(
+            _summarize_state, table, breakdown_by, ai_records, states[table], bucket
+        )
+    return ai_records, summaries, notes
+
+
+def _build_cross_table_report(ai_records, summaries):
+    """Per-table and combined totals for an all-tables report."""
+    output = []
+    output.append("AI ROI ANALYSIS - ALL TABLES")
+    output.append("=" * 80)
+    output.append(
+        f"  {'Table':<26}{'Records':>9}{'AI n':>7}{'AI avg':>9}"
+        f"{'Non-AI n':>10}{'Non-AI avg':>12}{'Faster':>8}"
+    )
+
+    totals = {"records": 0, "ai_activity": 0, "with_ai": 0, "without_ai": 0}
+    hours_saved = 0.0
+    for table, summary in summaries.items():
+        with_ai = summary["with_ai"]
+        without_ai = summary["without_ai"]
+        totals["records"] += summary["total"]
+        totals["ai_activity"] += len(ai_records.get(table, {}))
+        totals["with_ai"] += with_ai[0]
+        totals["without_ai"] += without_ai[0]
+
+        ai_avg = f"{_mean(with_ai):.1f}h" if with_ai[0] else "-"
+        non_ai_avg = f"{_mean(without_ai):.1f}h" if without_ai[0] else "-"
+        change = "-"
+        if with_ai[0] and without_ai[0]:
+            improvement = (_mean(without_ai) - _mean(with_ai)) / _mean(without_ai)
+            change = f"{improvement:.0%}"
+            # Hours the AI-assisted records took less than the non-AI average
+            hours_saved += (_mean(without_ai) - _mean(with_ai)) * with_ai[0]
+        output.append(
+            f"  {table:<26}{summary['total']:>9}{with_ai[0]:>7}{ai_avg:>9}"
+            f"{without_ai[0]:>10}{non_ai_avg:>12}{change:>8}"
+        )
+
+    output.append("-" * 80)
+    output.append(f"Total records: {totals['records']}")
+    output.append(
+        f"  - With AI: {totals['with_ai']} resolved "
+        f"({totals['ai_activity']} total AI activity)"
+    )
+    output.append(f"  - Without AI: {totals['without_ai']} resolved")
+    output.append(
+        f"Estimated time saved on AI-assisted records: {hours_saved:.1f} hours"
+    )
+    return "\n".join(output)
+
+
+def _report(table_name, breakdown_by, ai_records, summaries, notes):
+    """Render one table's report, or the combined report for all tables."""
+    if table_name != ALL_TABLES:
+        return _build_report(
+            table_name,
+            breakdown_by,
+            ai_records,
+            summaries[table_name],
+            notes[table_name],
+        )
+    sections = [_build_cross_table_report(ai_records, summaries)]
+    for table, summary in summaries.items():
+        sections.append(
+            _build_report(table, breakdown_by, ai_records, summary, notes[table])
+        )
+    return "\n\n".join(sections)
+
+
+def _tables(table_name):
+    return list(TABLE_CONFIG) if table_name == ALL_TABLES else [table_name]
+
+
+@across_instances
+def query_ai_roi_analysis(
+    table_name="incident",
+    breakdown_by="priority",
+    mode="records",
+    days_ago=0,
+    bucket="",
+    instance="",
+):
+    """
+    Analyze AI ROI for a task table, or for all of them
+
+    Args:
+        table_name: incident, change_request, problem, sn_customerservice_case,
+            or all for a combined report over every table
+        breakdown_by: priority, category, group, state, or none
+        mode: records (download task records and compute locally) or
+            aggregate (push counts and duration sums down to the stats API)
+        days_ago: Only count AI executions from the last N days (0 = all
+            time); records assisted earlier count as without AI
+        bucket: day, week or month to add the AI vs non-AI delta per
+            period, with a rolling average; empty for no trend
+        instance: Named instance to analyze (default instance if empty), or
+            "all" to analyze every configured instance
+
+    Returns:
+        Formatted analysis string
+    """
+    if table_name != ALL_TABLES and table_name not in TABLE_CONFIG:
+        return UNKNOWN_TABLE.format(table=table_name)
+    if bucket and bucket not in roi_trends.BUCKETS:
+        return f"Error: Unknown bucket {bucket}. Supported: day, week, month"
+    if _grouped(breakdown_by) and breakdown_by not in BREAKDOWN_FIELDS:
+        return UNKNOWN_BREAKDOWN.format(breakdown_by=breakdown_by)
+
+    try:
+        ai_records, summaries, notes = analyze_tables(
+            _tables(table_name), breakdown_by, mode, days_ago, bucket, instance
+        )
+    except ServiceNowAPIError as e:
+        return f"Error: {e.status_code} - {e.text}"
+
+    return _report(table_name, breakdown_by, ai_records, summaries, notes)
+
+
+@across_instances
+async def query_ai_roi_analysis_async(
+    table_name="incident",
+    breakdown_by="priority",
+    mode="records",
+    days_ago=0,
+    bucket="",
+    instance="",
+):
+    """Async variant of query_ai_roi_analysis; fetches all tables concurrently."""
+    if table_name != ALL_TABLES and table_name not in TABLE_CONFIG:
+        return UNKNOWN_TABLE.format(table=table_name)
+    if bucket and bucket not in roi_trends.BUCKETS:
+        return f"Error: Unknown bucket {bucket}. Supported: day, week, month"
+    if _grouped(breakdown_by) and breakdown_by not in BREAKDOWN_FIELDS:
+        return UNKNOWN_BREAKDOWN.format(breakdown_by=breakdown_by)
+
+    try:
+        ai_records, summaries, notes = await analyze_tables_async(
+            _tables(table_name), breakdown_by, mode, days_ago, bucket, instance
+        )
+    except ServiceNowAPIError as e:
+        return f"Error: {e.status_code} - {e.text}"
+
+    # Medians, percentiles and bootstrap intervals are CPU-bound too
+    return await asyncio.to_thread(
+        _report, table_name, breakdown_by, ai_records, summaries, notes
+    )
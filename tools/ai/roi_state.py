@@ -0,0 +1,170 @@
+"""
+Incrementally maintained aggregates for the AI ROI analysis
+
+The ROI report is requested many times a day. Instead of downloading and
+processing the whole task table each time, a TaskAggregates per instance and
+table keeps RunningStats for every breakdown x group x AI flag, plus each
+record's last contribution. A run only fetches records whose sys_updated_on
+is at or after the previous run's high-water mark, removes their old
+contribution and adds the new one. Records whose AI flag flipped because new
+execution plans reference them are moved between sides.
+
+Only a small TaskEntry tuple is kept per record, holding what removing its
+contribution and rebuilding the trend need, so the state stays a fraction
+of the size of the records it summarizes.
+
+Like the local mirror, incremental updates do not see deleted records; the
+state lives in the server process and is rebuilt on restart.
+"""
+
+import sys
+import threading
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+from .roi_stats import RunningStats
+
+# Breakdown key for the ungrouped totals of each side
+OVERALL = (None, None)
+
+# What a record contributes: groups holds its value of each breakdown, in
+# TaskAggregates.breakdowns order; created and updated are internal values
+TaskEntry = namedtuple(
+    "TaskEntry", "number created updated resolution_hours with_ai groups"
+)
+
+
+def _shared(value):
+    """Intern string values, which repeat across many records."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TaskAggregates:
+    """
+    Running ROI aggregates for one task table on one instance.
+
+    Aggregates are keyed by (breakdown, group, with_ai), where breakdown is
+    a processed record field (priority, category, group, state) or None for
+    the overall totals.
+    """
+
+    def __init__(self, breakdowns):
+        self.breakdowns = tuple(breakdowns)
+        self.high_water = None
+        self.records = {}  # sys_id -> TaskEntry
+        self.numbers = {}  # number -> sys_id
+        self.ai_numbers = set()
+        self.aggregates = defaultdict(RunningStats)
+        self.lock = threading.Lock()
+
+    def entry(self, record):
+        """
+        Compact a processed task record.
+
+        Returns:
+            (sys_id, TaskEntry); with_ai is set when the entry is applied
+        """
+        return record["sys_id"], TaskEntry(
+            record["number"],
+            record["created"],
+            record["updated"],
+            record["resolution_hours"],
+            False,
+            tuple(_shared(record[breakdown]) for breakdown in self.breakdowns),
+        )
+
+    def _keys(self, entry):
+        """Aggregate keys a resolved entry contributes to."""
+        yield OVERALL + (entry.with_ai,)
+        for breakdown, group in zip(self.breakdowns, entry.groups):
+            yield (breakdown, group, entry.with_ai)
+
+    def apply(self, changed, ai_numbers, high_water):
+        """
+        Fold changed records and the current AI-assisted numbers in.
+
+        Args:
+            changed: (sys_id, TaskEntry) pairs from entry() for the records
+                updated since high_water
+            ai_numbers: Record numbers with AI activity as of this run
+            high_water: sys_updated_on mark to fetch from on the next run
+        """
+        ai_numbers = set(ai_numbers)
+        deltas = defaultdict(lambda: ([], []))
+
+        def file(entry, sign):
+            if entry.resolution_hours is None:
+                return
+            for key in self._keys(entry):
+                values, signs = deltas[key]
+                values.append(entry.resolution_hours)
+                signs.append(sign)
+
+        with self.lock:
+            updated = dict(changed)
+            for number in self.ai_numbers ^ ai_numbers:
+                sys_id = self.numbers.get(number)
+                if sys_id in self.records and sys_id not in updated:
+                    updated[sys_id] = self.records[sys_id]
+
+            for sys_id, entry in updated.items():
+                previous = self.records.get(sys_id)
+                if previous and previous.updated > entry.updated:
+                    continue  # A concurrent run already filed a newer version
+                if previous:
+                    file(previous, -1)
+                entry = entry._replace(with_ai=entry.number in ai_numbers)
+                file(entry, 1)
+                self.records[sys_id] = entry
+                self.numbers[entry.number] = sys_id
+
+            for key, (values, signs) in deltas.items():
+                self.aggregates[key].update(np.array(values), np.array(signs))
+                if not self.aggregates[key].count:
+                    del self.aggregates[key]
+
+            self.ai_numbers = ai_numbers
+            self.high_water = max(
+                filter(None, (self.high_water, high_water)), default=None
+            )
+
+    def side(self, with_ai):
+        """Overall RunningStats for one side, or None if it has no records."""
+        return self.aggregates.get(OVERALL + (with_ai,))
+
+    def groups(self, breakdown, with_ai):
+        """{group: RunningStats} for one side of a breakdown."""
+        return {
+            key[1]: stats
+            for key, stats in self.aggregates.items()
+            if key[0] == breakdown and key[2] == with_ai
+        }
+
+    def record(self, number):
+        """
+        Return a number's resolution hours, created value and breakdown
+        values as a dict, or None.
+        """
+        entry = self.records.get(self.numbers.get(number))
+        if entry is None:
+            return None
+        return {
+            "number": entry.number,
+            "created": entry.created,
+            "resolution_hours": entry.resolution_hours,
+            **dict(zip(self.breakdowns, entry.groups)),
+        }
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def get_task_aggregates(instance_url, table, breakdowns):
+    """Return the process-wide aggregates for a table on an instance."""
+    with _states_lock:
+        key = (instance_url, table)
+        if key not in _states:
+            _states[key] = TaskAggregates(breakdowns)
+        return _states[key]
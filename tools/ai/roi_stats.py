@@ -0,0 +1,174 @@
+"""
+Resolution-time statistics for the AI ROI analysis
+
+Each side of the comparison (AI-assisted or not, overall and per breakdown
+group) is a RunningStats: count, sum and sum of squares plus a log-bucket
+quantile sketch. All of them support removal, so the aggregates can be
+maintained incrementally as records change, and summary statistics and
+bootstrap confidence intervals are computed from the sketch buckets with
+NumPy instead of from the individual records.
+"""
+
+import math
+import os
+
+import numpy as np
+
+# Fraction cut from each end for the trimmed mean
+TRIM_PROPORTION = 0.1
+
+# Bootstrap resamples for confidence intervals on the AI vs non-AI delta
+BOOTSTRAP_RESAMPLES = int(os.getenv("SERVICENOW_ROI_BOOTSTRAP", "2000"))
+
+CONFIDENCE = 0.95
+
+# Relative accuracy of sketch quantiles; hours span many orders of
+# magnitude, so buckets are log-spaced (a few hundred cover minutes to years)
+SKETCH_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+
+# Values below this many hours (including zero and negative durations from
+# bad data) share the lowest bucket
+SKETCH_MIN_HOURS = 1 / 60
+
+
+class RunningStats:
+    """Count, sum, sum of squares and quantile sketch of resolution hours."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.buckets = {}
+
+    def update(self, values, signs):
+        """
+        Add (sign 1) or remove (sign -1) values.
+
+        Args:
+            values: Array of resolution hours
+            signs: Array of 1 / -1, aligned with values
+        """
+        values = np.asarray(values, dtype=float)
+        signs = np.asarray(signs, dtype=float)
+        if not len(values):
+            return
+        self.count += int(signs.sum())
+        self.total += float(signs @ values)
+        self.squares += float(signs @ (values * values))
+
+        index = np.ceil(
+            np.log(np.maximum(values, SKETCH_MIN_HOURS)) / math.log(SKETCH_GAMMA)
+        ).astype(int)
+        keys, inverse = np.unique(index, return_inverse=True)
+        for key, delta in zip(
+            keys.tolist(), np.bincount(inverse, weights=signs).tolist()
+        ):
+            count = self.buckets.get(key, 0) + int(delta)
+            if count:
+                self.buckets[key] = count
+            else:
+                self.buckets.pop(key, None)
+
+    def copy(self):
+        """Return an independent snapshot."""
+        snapshot = RunningStats()
+        snapshot.count = self.count
+        snapshot.total = self.total
+        snapshot.squares = self.squares
+        snapshot.buckets = dict(self.buckets)
+        return snapshot
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+    @property
+    def stdev(self):
+        if self.count < 2:
+            return 0.0
+        variance = (self.squares - self.total * self.total / self.count) / (
+            self.count - 1
+        )
+        return math.sqrt(max(variance, 0.0))
+
+    def bins(self):
+        """Return (representative hours, counts) of the sketch, ascending."""
+        keys = np.array(sorted(self.buckets), dtype=float)
+        counts = np.array([self.buckets[k] for k in sorted(self.buckets)])
+        return 2 * SKETCH_GAMMA**keys / (SKETCH_GAMMA + 1), counts
+
+
+def _quantile(values, cumulative, q):
+    """Sketch quantile from ascending bin values and cumulative counts."""
+    rank = q * (cumulative[-1] - 1)
+    return float(values[np.searchsorted(cumulative, rank, side="right")])
+
+
+def describe(stats):
+    """
+    Summarize one side of the comparison.
+
+    The mean and standard deviation are exact; quantiles and the trimmed
+    mean are within SKETCH_ACCURACY.
+
+    Returns:
+        dict with n, mean, stdev, median, p90 and trimmed_mean
+    """
+    values, counts = stats.bins()
+    cumulative = np.cumsum(counts)
+    n = int(cumulative[-1])
+    cut = int(n * TRIM_PROPORTION)
+    # Per-bin counts left after cutting `cut` values from each end
+    kept = np.clip(
+        np.minimum(cumulative, n - cut) - np.maximum(cumulative - counts, cut),
+        0,
+        None,
+    )
+    return {
+        "n": stats.count,
+        "mean": stats.mean,
+        "stdev": stats.stdev,
+        "median": _quantile(values, cumulative, 0.5),
+        "p90": _quantile(values, cumulative, 0.9),
+        "trimmed_mean": float(kept @ values / kept.sum()),
+    }
+
+
+def _resample(stats, resamples, rng):
+    """Bootstrap means and medians of one side, vectorized over resamples."""
+    values, counts = stats.bins()
+    n = int(counts.sum())
+    draws = rng.multinomial(n, counts / n, size=resamples)
+    # Shift bucketed means so they are centered on the exact mean
+    means = draws @ values / n + (stats.mean - counts @ values / n)
+    middle = np.argmax(np.cumsum(draws, axis=1) >= (n + 1) // 2, axis=1)
+    return means, values[middle]
+
+
+def bootstrap_delta(
+    baseline, treated, resamples=BOOTSTRAP_RESAMPLES, confidence=CONFIDENCE, seed=0
+):
+    """
+    Bootstrap confidence intervals on baseline minus treated.
+
+    A fixed seed keeps the interval stable for the same data.
+
+    Args:
+        baseline: RunningStats of resolution hours without AI
+        treated: RunningStats of resolution hours with AI
+        resamples: Number of bootstrap resamples
+        confidence: Two-sided confidence level
+
+    Returns:
+        dict of {"mean": (low, high), "median": (low, high)} in hours saved
+    """
+    rng = np.random.default_rng(seed)
+    base_means, base_medians = _resample(baseline, resamples, rng)
+    treated_means, treated_medians = _resample(treated, resamples, rng)
+    tail = (1 - confidence) / 2 * 100
+    bounds = [tail, 100 - tail]
+    return {
+        "mean": tuple(np.percentile(base_means - treated_means, bounds).tolist()),
+        "median": tuple(np.percentile(base_medians - treated_medians, bounds).tolist()),
+    }
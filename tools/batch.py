@@ -0,0 +1,87 @@
+"""
+Helpers for the Batch API
+
+/api/now/v1/batch runs several REST requests on the instance and returns all
+of their results in one response, so independent Table API reads share a
+single round trip. Each serviced request comes back with its status, headers
+and a base64-encoded body.
+"""
+
+import base64
+import os
+import uuid
+from urllib.parse import urlencode
+
+BATCH_PATH = "/api/now/v1/batch"
+
+# Maximum reads packed into one batch request
+BATCH_SIZE = int(os.getenv("SERVICENOW_BATCH_SIZE", "10"))
+
+# Headers describing the inner response's wire encoding, which no longer
+# applies once its body has been unpacked from the batch
+_TRANSPORT_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def table_path(table, sys_id=""):
+    """Return the Table API path for a table or single record."""
+    path = f"/api/now/table/{table}"
+    return f"{path}/{sys_id}" if sys_id else path
+
+
+def batch_body(reads):
+    """
+    Build the JSON body of a batch request.
+
+    Args:
+        reads: list of (path, params) GETs; their index is used as the id
+
+    Returns:
+        dict ready to POST to BATCH_PATH
+    """
+    return {
+        "batch_request_id": uuid.uuid4().hex,
+        "rest_requests": [
+            {
+                "id": str(index),
+                "method": "GET",
+                "url": f"{path}?{urlencode(params)}" if params else path,
+                "headers": [
+                    {"name": "Accept", "value": "application/json"},
+                    {"name": "Content-Type", "value": "application/json"},
+                ],
+                "exclude_response_headers": False,
+            }
+            for index, (path, params) in enumerate(reads)
+        ],
+    }
+
+
+def parse_batch(body):
+    """
+    Unpack the serviced requests of a batch response.
+
+    Args:
+        body: Decoded JSON body of a batch response
+
+    Returns:
+        dict of {index: (status_code, headers dict, content bytes)}; reads
+        the instance did not service are absent
+    """
+    results = {}
+    for item in body.get("serviced_requests", []):
+        headers = {
+            h.get("name", ""): h.get("value", "")
+            for h in item.get("headers", [])
+            if h.get("name", "").lower() not in _TRANSPORT_HEADERS
+        }
+        results[int(item["id"])] = (
+            int(item.get("status_code", 500)),
+            headers,
+            base64.b64decode(item.get("body") or b""),
+        )
+    return results
+
+
+def chunks(items, size=BATCH_SIZE):
+    """Split a list into batch-sized slices."""
+    return [items[i : i + size] for i in range(0, len(items), size)]
@@ -0,0 +1,150 @@
+"""
+In-process response cache for Table API reads
+
+Tools rebuild the same sysparm_query strings on every call, and the assistant
+often repeats a call seconds later. Successful responses are kept for a short,
+per-table TTL in a size-bounded LRU keyed on the canonical form of the query,
+so repeated and reordered-but-equivalent queries are served locally.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Default seconds a cached response stays fresh
+DEFAULT_TTL = float(os.getenv("SERVICENOW_CACHE_TTL", "30"))
+
+# Maximum number of cached responses before LRU eviction
+MAX_ENTRIES = int(os.getenv("SERVICENOW_CACHE_SIZE", "256"))
+
+# Per-table TTL overrides in seconds (0 disables caching for a table)
+TABLE_TTLS = {
+    "sys_rest_message": 600,  # Integration config, rarely changes
+    "wf_context": 120,
+    "wf_executing": 10,  # Real-time view
+    "syslog": 15,
+}
+
+
+def canonical_query(query):
+    """
+    Normalize an encoded query so equivalent filters share a cache key.
+
+    AND terms (a clause plus any ^OR clauses bound to it) are sorted within
+    each ^NQ group; ORDERBY clauses keep their order since it is significant.
+    """
+    if not query:
+        return ""
+
+    groups = []
+    orders = []
+    for group in query.split("^NQ"):
+        terms = []
+        for clause in group.split("^"):
+            clause = clause.strip()
+            if not clause:
+                continue
+            if clause.startswith("ORDERBY"):
+                orders.append(clause)
+            elif clause.startswith("OR") and terms:
+                terms[-1].append(clause)
+            else:
+                terms.append([clause])
+        terms = sorted("^".join([t[0]] + sorted(t[1:])) for t in terms)
+        if terms:
+            groups.append("^".join(terms))
+
+    return "^NQ".join(sorted(groups)) + "|" + "^".join(orders)
+
+
+def cache_key(instance, table, params, sys_id=""):
+    """
+    Build the cache key for a Table API read.
+
+    Keyed on (instance, table, sys_id, canonical query, field set,
+    display_value, limit) plus any other sysparm_* parameters.
+    """
+    params = dict(params or {})
+    query = canonical_query(params.pop("sysparm_query", ""))
+    fields = params.pop("sysparm_fields", "")
+    fields = ",".join(sorted(f.strip() for f in fields.split(",") if f.strip()))
+    display_value = str(params.pop("sysparm_display_value", "false"))
+    limit = str(params.pop("sysparm_limit", ""))
+    rest = tuple(sorted((k, str(v)) for k, v in params.items()))
+    return (instance, table, sys_id, query, fields, display_value, limit, rest)
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL + LRU cache of successful responses.
+
+    Shared by the blocking and asyncio clients.
+    """
+
+    def __init__(
+        self, max_entries=MAX_ENTRIES, default_ttl=DEFAULT_TTL, table_ttls=None
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.table_ttls = dict(TABLE_TTLS if table_ttls is None else table_ttls)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, table):
+        """Return the TTL in seconds for a table."""
+        return self.table_ttls.get(table, self.default_ttl)
+
+    def get(self, key):
+        """Return a fresh cached response or None, counting the hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, table, response):
+        """Store a response under key for the table's TTL."""
+        ttl = self.ttl_for(table)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+            }
+
+
+_cache = ResponseCache()
+
+
+def get_cache():
+    """Return the process-wide response cache."""
+    return _cache
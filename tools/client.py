@@ -0,0 +1,859 @@
+"""
+Shared ServiceNow HTTP client
+
+Every tool module goes through one pooled session so that back-to-back tool
+calls reuse keep-alive connections instead of paying a fresh TCP+TLS
+handshake and re-reading credentials from the environment on each call.
+
+ServiceNowClient is the blocking transport used by scripts and sync callers.
+AsyncServiceNowClient is the asyncio transport used by the MCP server so that
+concurrent tool calls overlap on the event loop instead of queueing.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .batch import BATCH_PATH, batch_body, chunks, parse_batch, table_path
+from .cache import cache_key, get_cache
+from .pagination import (
+    MAX_WORKERS,
+    PAGE_SIZE,
+    flatten_record,
+    freeze_query,
+    mark_params,
+    next_cursor,
+    page_params,
+    plan_offsets,
+    probe_params,
+    shard_params,
+)
+from .ratelimit import get_limiter
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .streaming import aiter_results, iter_results, wants_stream
+
+DEFAULT_HEADERS = {"Accept": "application/json"}
+
+# Connection pool size per host; sized for a handful of concurrent tool calls
+POOL_SIZE = int(os.getenv("SERVICENOW_POOL_SIZE", "10"))
+
+# Seconds to wait for the instance before giving up on a request
+TIMEOUT = float(os.getenv("SERVICENOW_TIMEOUT", "60"))
+
+
+class ServiceNowAPIError(Exception):
+    """Raised when the instance rejects a request in the middle of a scan."""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.text = response.text
+        super().__init__(f"{self.status_code} - {self.text}")
+
+
+def _mark(response):
+    """Parse an updated_mark probe response."""
+    if response.status_code != 200:
+        raise ServiceNowAPIError(response)
+    newest = response.json().get("result", [])
+    return newest[0].get("sys_updated_on") or None if newest else None
+
+
+def _batch_response(status_code, headers, content):
+    """Wrap one serviced batch read as an already-read requests.Response."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = "utf-8"
+    response._content = content
+    response._content_consumed = True
+    return response
+
+
+def _unique_misses(keys, responses):
+    """Indices of the first read for each key not answered from the cache."""
+    seen = set()
+    misses = []
+    for index, (key, response) in enumerate(zip(keys, responses)):
+        if response is None and key not in seen:
+            seen.add(key)
+            misses.append(index)
+    return misses
+
+
+def _share_duplicates(keys, responses):
+    """Give repeated reads the batched response of their first occurrence."""
+    answered = {}
+    for index, key in enumerate(keys):
+        if responses[index] is not None:
+            answered.setdefault(key, responses[index])
+        elif key in answered:
+            responses[index] = answered[key]
+
+
+class ServiceNowClient:
+    """
+    Keep-alive HTTP client for a single ServiceNow instance.
+
+    Owns the connection pool, basic auth credentials and default headers.
+    """
+
+    def __init__(
+        self, instance, username, password, pool_size=POOL_SIZE, timeout=TIMEOUT
+    ):
+        self.instance = (instance or "").rstrip("/")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.auth = (username, password)
+        self.session.headers.update(DEFAULT_HEADERS)
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._flights = SingleFlight()
+
+    def get(self, path, params=None, stream=False, table=""):
+        """
+        Issue a GET against the instance.
+
+        Requests are paced by the shared rate limiter, and 429/503 responses
+        are retried with backoff before being returned to the caller.
+
+        Args:
+            path: API path starting with / (e.g., /api/now/table/syslog)
+            params: Query string parameters
+            stream: Leave the body unread so it can be decoded incrementally;
+                error bodies are always read
+            table: Table whose rate budget the request counts against
+
+        Returns:
+            requests.Response
+        """
+        return self._send("GET", path, stream=stream, table=table, params=params)
+
+    def post(self, path, body, table=""):
+        """Issue a JSON POST against the instance, paced and retried like get()."""
+        return self._send("POST", path, table=table, json=body)
+
+    def _send(self, method, path, stream=False, table="", **kwargs):
+        limiter = get_limiter()
+        attempt = 0
+        while True:
+            wait = limiter.reserve(self.instance, table)
+            if wait:
+                time.sleep(wait)
+            response = self.session.request(
+                method,
+                f"{self.instance}{path}",
+                timeout=self.timeout,
+                stream=stream,
+                **kwargs,
+            )
+            if stream and response.status_code != 200:
+                response.content
+            if not limiter.should_retry(response, attempt):
+                return response
+            time.sleep(limiter.backoff(self.instance, response, attempt))
+            attempt += 1
+
+    def get_table(self, table, params=None, sys_id="", bypass_cache=False):
+        """
+        Read from the Table API.
+
+        Successful responses are served from and stored in the shared
+        response cache unless bypass_cache is set, and identical concurrent
+        reads share one request. Reads of more than STREAM_MIN_ROWS rows are
+        streamed instead and are neither cached nor shared.
+
+        Args:
+            table: Table name (e.g., incident)
+            params: sysparm_* query parameters
+            sys_id: Optional sys_id for a single-record lookup
+            bypass_cache: Always hit the instance and do not store the result
+
+        Returns:
+            requests.Response
+        """
+        path = table_path(table, sys_id)
+        if wants_stream(params):
+            return self.get(path, params, stream=True, table=table)
+
+        key = cache_key(self.instance, table, params, sys_id)
+        return self._cached_get(path, params, table, key, bypass_cache)
+
+    def _cached_get(self, path, params, table, key, bypass_cache):
+        """Serve a buffered GET from the cache or one shared upstream request."""
+        cache = get_cache()
+        if not bypass_cache:
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+        def fetch():
+            response = self.get(path, params, table=table)
+            if response.status_code == 200 and not bypass_cache:
+                cache.put(key, table, response)
+            return response
+
+        return self._flights.do(key, fetch)
+
+    def get_tables(self, reads, bypass_cache=False):
+        """
+        Read several Table API queries in as few round trips as possible.
+
+        Cached reads are answered locally and the rest are packed into Batch
+        API requests of up to BATCH_SIZE reads. Reads the instance does not
+        service in a batch (or a rejected batch) fall back to get_table().
+
+        Args:
+            reads: list of (table, params, sys_id)
+            bypass_cache: Always hit the instance and do not store the results
+
+        Returns:
+            list of requests.Response in the order of reads
+        """
+        cache = get_cache()
+        keys = [cache_key(self.instance, *read) for read in reads]
+        responses = [None if bypass_cache else cache.get(key) for key in keys]
+        pending = _unique_misses(keys, responses)
+
+        for chunk in chunks(pending):
+            for index, response in zip(chunk, self._batch([reads[i] for i in chunk])):
+                responses[index] = response
+                if response is not None and response.status_code == 200:
+                    if not bypass_cache:
+                        cache.put(keys[index], reads[index][0], response)
+        _share_duplicates(keys, responses)
+
+        for index, response in enumerate(responses):
+            if response is None:
+                table, params, sys_id = reads[index]
+                responses[index] = self.get_table(table, params, sys_id, bypass_cache)
+        return responses
+
+    def _batch(self, reads):
+        """POST one batch of reads; None for each read left unserviced."""
+        body = batch_body(
+            [(table_path(table, sys_id), params) for table, params, sys_id in reads]
+        )
+        response = self.post(BATCH_PATH, body)
+        if response.status_code != 200:
+            return [None] * len(reads)
+        results = parse_batch(response.json())
+        return [
+            _batch_response(*results[i]) if i in results else None
+            for i in range(len(reads))
+        ]
+
+    def get_stats(self, table, params=None, bypass_cache=False):
+        """
+        Read group counts and averages from the Aggregate (stats) API.
+
+        Cached and coalesced like get_table.
+
+        Args:
+            table: Table name (e.g., incident)
+            params: sysparm_* parameters, see aggregate.stats_params
+            bypass_cache: Always hit the instance and do not store the result
+
+        Returns:
+            requests.Response
+        """
+        key = ("stats",) + cache_key(self.instance, table, params)
+        return self._cached_get(
+            f"/api/now/stats/{table}", params, table, key, bypass_cache
+        )
+
+    def get_records(self, table, params):
+        """
+        Fetch one page of a table and return its decoded records.
+
+        Identical concurrent calls share one request and its result list,
+        which callers must treat as read-only.
+
+        Raises:
+            ServiceNowAPIError: If the request fails
+        """
+
+        def fetch():
+            response = self.get_table(table, params, bypass_cache=True)
+            if response.status_code != 200:
+                raise ServiceNowAPIError(response)
+            return list(iter_results(response))
+
+        key = ("records",) + cache_key(self.instance, table, params)
+        return self._flights.do(key, fetch)
+
+    def iter_table(
+        self,
+        table,
+        query="",
+        fields=None,
+        display_value="true",
+        page_size=PAGE_SIZE,
+        descending=False,
+    ):
+        """
+        Stream every matching row of a table, one keyset page at a time.
+
+        Args:
+            table: Table name (e.g., incident)
+            query: Encoded query filter (no ORDERBY, no ^NQ)
+            fields: Field names to return, or None for all fields
+            display_value: "true", "false" or "all"
+            page_size: Rows per page
+            descending: Stream newest first instead of oldest first
+
+        Yields:
+            dict per record
+
+        Raises:
+            ServiceNowAPIError: If any page request fails
+        """
+        cursor = None
+        while True:
+            params = page_params(
+                query, fields, display_value, page_size, cursor, descending
+            )
+            response = self.get_table(table, params, bypass_cache=True)
+            if response.status_code != 200:
+                raise ServiceNowAPIError(response)
+
+            count = 0
+            for record in iter_results(response):
+                count += 1
+                cursor = next_cursor(record)
+                yield flatten_record(record, display_value)
+
+            if count < page_size:
+                return
+
+    def updated_mark(self, table, query=""):
+        """
+        Return the newest internal sys_updated_on matching query, or None.
+
+        See pagination.mark_params for how incremental scans use it.
+
+        Raises:
+            ServiceNowAPIError: If the probe fails
+        """
+        response = self.get_table(table, mark_params(query), bypass_cache=True)
+        return _mark(response)
+
+    def iter_table_parallel(
+        self,
+        table,
+        query="",
+        fields=None,
+        display_value="true",
+        page_size=PAGE_SIZE,
+        max_workers=MAX_WORKERS,
+    ):
+        """
+        Stream every matching row of a table using concurrent offset shards.
+
+        A one-row probe finds the newest row and freezes the scan at it; a
+        second probe reads X-Total-Count for the frozen query. Small results
+        fall back to a single request, large ones are split into page_size
+        shards fetched by up to max_workers threads over the shared
+        connection pool, and the final shard keeps reading until a short page
+        in case more rows match than were counted. If the instance sends no
+        X-Total-Count, the scan falls back to iter_table. Rows are yielded in
+        scan order and at most max_workers pages are held in memory at once.
+
+        Args:
+            table: Table name (e.g., incident)
+            query: Encoded query filter (no ORDERBY, no ^NQ)
+            fields: Field names to return, or None for all fields
+            display_value: "true", "false" or "all"
+            page_size: Rows per shard
+            max_workers: Maximum concurrent shard requests
+
+        Yields:
+            dict per record
+
+        Raises:
+            ServiceNowAPIError: If the probe or any shard request fails
+        """
+        response = self.get_table(table, probe_params(query), bypass_cache=True)
+        if response.status_code != 200:
+            raise ServiceNowAPIError(response)
+
+        newest = response.json().get("result", [])
+        if not newest:
+            return
+        if "X-Total-Count" not in response.headers:
+            # Shards cannot be planned without the count; page sequentially
+            yield from self.iter_table(table, query, fields, display_value, page_size)
+            return
+        query = freeze_query(query, newest[0])
+        offsets = plan_offsets(self._frozen_total(table, query), page_size) or [0]
+
+        def fetch(offset):
+            params = shard_params(query, fields, display_value, page_size, offset)
+            return self.get_records(table, params)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            for offset in offsets:
+                pending.append(pool.submit(fetch, offset))
+                if len(pending) < max_workers:
+                    continue
+                page = pending.popleft().result()
+                for record in page:
+                    yield flatten_record(record, display_value)
+            while pending:
+                page = pending.popleft().result()
+                for record in page:
+                    yield flatten_record(record, display_value)
+
+        offset = offsets[-1]
+        while len(page) >= page_size:
+            offset += page_size
+            page = fetch(offset)
+            for record in page:
+                yield flatten_record(record, display_value)
+
+    def _frozen_total(self, table, query):
+        """Return X-Total-Count for a frozen parallel-scan query."""
+        response = self.get_table(table, probe_params(query), bypass_cache=True)
+        if response.status_code != 200:
+            raise ServiceNowAPIError(response)
+        return int(response.headers.get("X-Total-Count", 0))
+
+    def close(self):
+        """Release pooled connections."""
+        self.session.close()
+
+
+class AsyncServiceNowClient:
+    """
+    Asyncio HTTP client for a single ServiceNow instance.
+
+    Mirrors ServiceNowClient on top of httpx so responses expose the same
+    status_code / text / json() interface to the tool renderers.
+    """
+
+    def __init__(
+        self, instance, username, password, pool_size=POOL_SIZE, timeout=TIMEOUT
+    ):
+        self.instance = (instance or "").rstrip("/")
+        self.http = httpx.AsyncClient(
+            auth=(username or "", password or ""),
+            headers=DEFAULT_HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+        self._flights = AsyncSingleFlight()
+
+    def _cache_key(self, table, params, sys_id=""):
+        # Kept apart from the blocking client's entries: the async renderers
+        # cannot read a cached requests.Response
+        return ("async",) + cache_key(self.instance, table, params, sys_id)
+
+    async def get(self, path, params=None, stream=False, table=""):
+        """
+        Issue a GET against the instance.
+
+        Requests are paced by the shared rate limiter, and 429/503 responses
+        are retried with backoff before being returned to the caller.
+
+        Args:
+            path: API path starting with / (e.g., /api/now/table/syslog)
+            params: Query string parameters
+            stream: Leave the body unread so it can be decoded incrementally;
+                error bodies are always read
+            table: Table whose rate budget the request counts against
+
+        Returns:
+            httpx.Response
+        """
+        return await self._send("GET", path, stream=stream, table=table, params=params)
+
+    async def post(self, path, body, table=""):
+        """Issue a JSON POST against the instance, paced and retried like get()."""
+        return await self._send("POST", path, table=table, json=body)
+
+    async def _send(self, method, path, stream=False, table="", **kwargs):
+        limiter = get_limiter()
+        attempt = 0
+        while True:
+            wait = limiter.reserve(self.instance, table)
+            if wait:
+                await asyncio.sleep(wait)
+            request = self.http.build_request(
+                method, f"{self.instance}{path}", **kwargs
+            )
+            response = await self.http.send(request, stream=stream)
+            if stream and response.status_code != 200:
+                await response.aread()
+            if not limiter.should_retry(response, attempt):
+                return response
+            await asyncio.sleep(limiter.backoff(self.instance, response, attempt))
+            attempt += 1
+
+    async def get_table(self, table, params=None, sys_id="", bypass_cache=False):
+        """
+        Read from the Table API.
+
+        Successful responses are served from and stored in the shared
+        response cache unless bypass_cache is set, and identical concurrent
+        reads share one request. Reads of more than STREAM_MIN_ROWS rows are
+        streamed instead and are neither cached nor shared.
+
+        Args:
+            table: Table name (e.g., incident)
+            params: sysparm_* query parameters
+            sys_id: Optional sys_id for a single-record lookup
+            bypass_cache: Always hit the instance and do not store the result
+
+        Returns:
+            httpx.Response
+        """
+        path = table_path(table, sys_id)
+        if wants_stream(params):
+            return await self.get(path, params, stream=True, table=table)
+
+        key = self._cache_key(table, params, sys_id)
+        return await self._cached_get(path, params, table, key, bypass_cache)
+
+    async def _cached_get(self, path, params, table, key, bypass_cache):
+        """Serve a buffered GET from the cache or one shared upstream request."""
+        cache = get_cache()
+        if not bypass_cache:
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+        async def fetch():
+            response = await self.get(path, params, table=table)
+            if response.status_code == 200 and not bypass_cache:
+                cache.put(key, table, response)
+            return response
+
+        return await self._flights.do(key, fetch)
+
+    async def get_tables(self, reads, bypass_cache=False):
+        """Async variant of ServiceNowClient.get_tables; batches run concurrently."""
+        cache = get_cache()
+        keys = [self._cache_key(*read) for read in reads]
+        responses = [None if bypass_cache else cache.get(key) for key in keys]
+        pending = _unique_misses(keys, responses)
+
+        batches = chunks(pending)
+        results = await asyncio.gather(
+            *(self._batch([reads[i] for i in chunk]) for chunk in batches)
+        )
+        for chunk, batch in zip(batches, results):
+            for index, response in zip(chunk, batch):
+                responses[index] = response
+                if response is not None and response.status_code == 200:
+                    if not bypass_cache:
+                        cache.put(keys[index], reads[index][0], response)
+        _share_duplicates(keys, responses)
+
+        fallback = [i for i, response in enumerate(responses) if response is None]
+        fetched = await asyncio.gather(
+            *(
+                self.get_table(reads[i][0], reads[i][1], reads[i][2], bypass_cache)
+                for i in fallback
+            )
+        )
+        for index, response in zip(fallback, fetched):
+            responses[index] = response
+        return responses
+
+    async def _batch(self, reads):
+        """Async variant of ServiceNowClient._batch."""
+        body = batch_body(
+            [(table_path(table, sys_id), params) for table, params, sys_id in reads]
+        )
+        response = await self.post(BATCH_PATH, body)
+        if response.status_code != 200:
+            return [None] * len(reads)
+        results = parse_batch(response.json())
+        return [
+            (
+                httpx.Response(
+                    results[i][0], headers=results[i][1], content=results[i][2]
+                )
+                if i in results
+                else None
+            )
+            for i in range(len(reads))
+        ]
+
+    async def get_stats(self, table, params=None, bypass_cache=False):
+        """
+        Read group counts and averages from the Aggregate (stats) API.
+
+        Cached and coalesced like get_table.
+
+        Args:
+            table: Table name (e.g., incident)
+            params: sysparm_* parameters, see aggregate.stats_params
+            bypass_cache: Always hit the instance and do not store the result
+
+        Returns:
+            httpx.Response
+        """
+        key = ("stats",) + self._cache_key(table, params)
+        return await self._cached_get(
+            f"/api/now/stats/{table}", params, table, key, bypass_cache
+        )
+
+    async def get_records(self, table, params):
+        """Async variant of ServiceNowClient.get_records."""
+
+        async def fetch():
+            response = await self.get_table(table, params, bypass_cache=True)
+            if response.status_code != 200:
+                raise ServiceNowAPIError(response)
+            return [record async for record in aiter_results(response)]
+
+        key = ("records",) + cache_key(self.instance, table, params)
+        return await self._flights.do(key, fetch)
+
+    async def iter_table(
+        self,
+        table,
+        query="",
+        fields=None,
+        display_value="true",
+        page_size=PAGE_SIZE,
+        descending=False,
+    ):
+        """Async variant of ServiceNowClient.iter_table."""
+        cursor = None
+        while True:
+            params = page_params(
+                query, fields, display_value, page_size, cursor, descending
+            )
+            response = await self.get_table(table, params, bypass_cache=True)
+            if response.status_code != 200:
+                raise ServiceNowAPIError(response)
+
+            count = 0
+            async for record in aiter_results(response):
+                count += 1
+                cursor = next_cursor(record)
+                yield flatten_record(record, display_value)
+
+            if count < page_size:
+                return
+
+    async def updated_mark(self, table, query=""):
+        """Async variant of ServiceNowClient.updated_mark."""
+        response = await self.get_table(table, mark_params(query), bypass_cache=True)
+        return _mark(response)
+
+    async def iter_table_parallel(
+        self,
+        table,
+        query="",
+        fields=None,
+        display_value="true",
+        page_size=PAGE_SIZE,
+        max_workers=MAX_WORKERS,
+    ):
+        """Async variant of ServiceNowClient.iter_table_parallel."""
+        response = await self.get_table(table, probe_params(query), bypass_cache=True)
+        if response.status_code != 200:
+            raise ServiceNowAPIError(response)
+
+        newest = response.json().get("result", [])
+        if not newest:
+            return
+        if "X-Total-Count" not in response.headers:
+            async for record in self.iter_table(
+                table, query, fields, display_value, page_size
+            ):
+                yield record
+            return
+        query = freeze_query(query, newest[0])
+        total = await self._frozen_total(table, query)
+        offsets = plan_offsets(total, page_size) or [0]
+
+        async def fetch(offset):
+            params = shard_params(query, fields, display_value, page_size, offset)
+            return await self.get_records(table, params)
+
+        pending = deque()
+        try:
+            for offset in offsets:
+                pending.append(asyncio.ensure_future(fetch(offset)))
+                if len(pending) < max_workers:
+                    continue
+                page = await pending.popleft()
+                for record in page:
+                    yield flatten_record(record, display_value)
+            while pending:
+                page = await pending.popleft()
+                for record in page:
+                    yield flatten_record(record, display_value)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        offset = offsets[-1]
+        while len(page) >= page_size:
+            offset += page_size
+            page = await fetch(offset)
+            for record in page:
+                yield flatten_record(record, display_value)
+
+    async def _frozen_total(self, table, query):
+        """Async variant of ServiceNowClient._frozen_total."""
+        response = await self.get_table(table, probe_params(query), bypass_cache=True)
+        if response.status_code != 200:
+            raise ServiceNowAPIError(response)
+        return int(response.headers.get("X-Total-Count", 0))
+
+    async def aclose(self):
+        """Release pooled connections."""
+        await self.http.aclose()
+
+
+# Instance name that fans a tool call out to every configured instance
+ALL_INSTANCES = "all"
+
+# Name of the single instance configured by the unprefixed variables
+DEFAULT_INSTANCE = "default"
+
+
+def _env_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name).upper()
+
+
+def instance_configs():
+    """
+    Return the configured instances as {name: settings}.
+
+    With SERVICENOW_INSTANCES unset, the single instance from
+    SERVICENOW_INSTANCE / _USERNAME / _PASSWORD is named "default".
+    Otherwise SERVICENOW_INSTANCES lists the names (e.g. dev,test,prod) and
+    each is read from SERVICENOW_<NAME>_INSTANCE / _USERNAME / _PASSWORD,
+    with optional SERVICENOW_<NAME>_POOL_SIZE and SERVICENOW_<NAME>_RATE_LIMIT.
+    """
+    names = [
+        name.strip()
+        for name in os.getenv("SERVICENOW_INSTANCES", "").split(",")
+        if name.strip()
+    ]
+    if not names:
+        return {
+            DEFAULT_INSTANCE: {
+                "instance": os.getenv("SERVICENOW_INSTANCE"),
+                "username": os.getenv("SERVICENOW_USERNAME"),
+                "password": os.getenv("SERVICENOW_PASSWORD"),
+                "pool_size": POOL_SIZE,
+                "rate_limit": None,
+            }
+        }
+
+    configs = {}
+    for name in names:
+        prefix = f"SERVICENOW_{_env_name(name)}_"
+        rate_limit = os.getenv(f"{prefix}RATE_LIMIT")
+        configs[name] = {
+            "instance": os.getenv(f"{prefix}INSTANCE"),
+            "username": os.getenv(f"{prefix}USERNAME"),
+            "password": os.getenv(f"{prefix}PASSWORD"),
+            "pool_size": int(os.getenv(f"{prefix}POOL_SIZE", POOL_SIZE)),
+            "rate_limit": float(rate_limit) if rate_limit else None,
+        }
+    return configs
+
+
+def instance_names():
+    """Return the configured instance names, default first."""
+    names = list(instance_configs())
+    default = default_instance()
+    return [default] + [name for name in names if name != default]
+
+
+def default_instance():
+    """Return the name used when a tool call does not pick an instance."""
+    names = list(instance_configs())
+    preferred = os.getenv("SERVICENOW_DEFAULT_INSTANCE", "")
+    return preferred if preferred in names else names[0]
+
+
+def resolve_instance(instance=""):
+    """
+    Map an instance argument to a configured name.
+
+    Raises:
+        ValueError: If the name is not configured
+    """
+    if not instance:
+        return default_instance()
+    if instance not in instance_configs():
+        raise ValueError(
+            f"Unknown instance {instance}. Configured: {', '.join(instance_names())}"
+        )
+    return instance
+
+
+def _new_client(cls, name):
+    config = instance_configs()[name]
+    client = cls(
+        config["instance"],
+        config["username"],
+        config["password"],
+        pool_size=config["pool_size"],
+    )
+    if config["rate_limit"] is not None:
+        get_limiter().instance_rates[client.instance] = config["rate_limit"]
+    return client
+
+
+_clients = {}
+_async_clients = {}
+_client_lock = threading.Lock()
+
+
+def get_client(instance=""):
+    """
+    Return the process-wide client for an instance, creating it on first use.
+
+    Each named instance gets its own connection pool and rate budget.
+    Credentials are read lazily so that server.py can load .env first.
+
+    Args:
+        instance: Instance name, or "" for the default instance
+
+    Raises:
+        ValueError: If the instance is not configured
+    """
+    name = resolve_instance(instance)
+    client = _clients.get(name)
+    if client is None:
+        with _client_lock:
+            if name not in _clients:
+                _clients[name] = _new_client(ServiceNowClient, name)
+            client = _clients[name]
+    return client
+
+
+def get_async_client(instance=""):
+    """
+    Return the process-wide asyncio client for an instance.
+
+    Must be called from the event loop that will use it (the MCP server loop).
+    """
+    name = resolve_instance(instance)
+    if name not in _async_clients:
+        _async_clients[name] = _new_client(AsyncServiceNowClient, name)
+    return _async_clients[name]
@@ -0,0 +1,386 @@
+"""
+Bulk export of table data to compressed files
+
+A time range is split into slices of sys_created_on. Each slice is streamed
+with parallel offset shards (ServiceNowClient.iter_table_parallel) and
+written as one or more chunk files: gzip-compressed NDJSON, or Parquet when
+pyarrow is installed. A checkpoint file next to the chunks records the
+export's parameters and every finished slice, so an interrupted export
+resumes at the first unfinished slice instead of starting over.
+
+Chunks are written to a temporary name and renamed when complete, so a
+directory never holds a truncated chunk under its final name.
+"""
+
+import gzip
+import json
+import math
+import os
+from datetime import datetime, timedelta, timezone
+
+from .ai.roi_analysis import TABLE_CONFIG
+from .client import get_client
+from .timestamps import format_datetime, parse_datetime
+
+# Tables that can be exported, with the ROI task tables
+EXPORT_TABLES = ("syslog", "wf_log", "sys_generative_ai_metric") + tuple(TABLE_CONFIG)
+
+FORMATS = ("ndjson", "parquet")
+
+# Hours of sys_created_on per slice (the unit of checkpointing)
+SLICE_HOURS = 24
+
+# Rows per chunk file
+CHUNK_ROWS = 100000
+
+# Days ending now exported when a new export is given no range
+DAYS = 1
+
+# Settings of a new export that the caller leaves unset (None)
+DEFAULTS = {
+    "format": "ndjson",
+    "query": "",
+    "fields": None,
+    "display_value": "false",
+    "slice_hours": SLICE_HOURS,
+    "chunk_rows": CHUNK_ROWS,
+    "instance": "",
+}
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+
+def _require_pyarrow():
+    """Import pyarrow for Parquet output, with an install hint if missing."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet export needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def time_slices(since, until, slice_hours=SLICE_HOURS):
+    """
+    Split [since, until) into consecutive slices.
+
+    Args:
+        since, until: Internal (UTC) "YYYY-MM-DD HH:MM:SS" values
+        slice_hours: Slice length in hours
+
+    Returns:
+        list of (start, end) internal values
+    """
+    start, end = parse_datetime(since), parse_datetime(until)
+    if start is None or end is None or start >= end:
+        raise ValueError(f"Invalid time range {since!r} to {until!r}")
+    step = timedelta(hours=slice_hours)
+    count = math.ceil((end - start) / step)
+    edges = [min(start + i * step, end) for i in range(count + 1)]
+    return [(format_datetime(a), format_datetime(b)) for a, b in zip(edges, edges[1:])]
+
+
+def _slice_query(query, start, end):
+    clauses = [query] if query else []
+    clauses += [f"sys_created_on>={start}", f"sys_created_on<{end}"]
+    return "^".join(clauses)
+
+
+def _columns(records):
+    """
+    Flatten records into string columns for Parquet.
+
+    display_value=all fields become two columns, field and field_display.
+    """
+    names = {}
+    rows = []
+    for record in records:
+        row = {}
+        for field, value in record.items():
+            if isinstance(value, dict):
+                row[field] = value.get("value")
+                row[f"{field}_display"] = value.get("display_value")
+            else:
+                row[field] = value
+        names.update(dict.fromkeys(row))
+        rows.append(row)
+    return {
+        name: [None if row.get(name) is None else str(row[name]) for row in rows]
+        for name in names
+    }
+
+
+class ChunkWriter:
+    """
+    One chunk file, written to a temporary name and renamed on close().
+
+    NDJSON rows go straight to the gzip stream; Parquet needs whole columns,
+    so its rows are held until close().
+    """
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.temporary = f"{path}.tmp"
+        self.rows = 0
+        self.records = []
+        self.handle = None
+        if fmt != "parquet":
+            self.handle = gzip.open(self.temporary, "wt", encoding="utf-8")
+
+    def write(self, record):
+        if self.handle:
+            self.handle.write(json.dumps(record, ensure_ascii=False))
+            self.handle.write("\n")
+        else:
+            self.records.append(record)
+        self.rows += 1
+
+    def close(self):
+        if self.handle:
+            self.handle.close()
+        else:
+            pyarrow = _require_pyarrow()
+            pyarrow.parquet.write_table(
+                pyarrow.table(_columns(self.records)),
+                self.temporary,
+                compression="zstd",
+            )
+        os.replace(self.temporary, self.path)
+
+    def discard(self):
+        """Drop an unfinished chunk."""
+        if self.handle:
+            self.handle.close()
+        if os.path.exists(self.temporary):
+            os.remove(self.temporary)
+
+
+def _slice_prefix(table, start):
+    stamp = start.replace("-", "").replace(":", "").replace(" ", "T")
+    return f"{table}-{stamp}-"
+
+
+def _chunk_name(table, start, part, fmt):
+    extension = "parquet" if fmt == "parquet" else "ndjson.gz"
+    return f"{_slice_prefix(table, start)}{part:04d}.{extension}"
+
+
+def _remove_partial(out_dir, table, start):
+    """Delete chunks left by an interrupted attempt at a slice."""
+    prefix = _slice_prefix(table, start)
+    for name in os.listdir(out_dir):
+        if name.startswith(prefix):
+            os.remove(os.path.join(out_dir, name))
+
+
+class Checkpoint:
+    """Export parameters and finished slices, saved as JSON after each slice."""
+
+    def __init__(self, path, settings, done=None, files=None, rows=0):
+        self.path = path
+        self.settings = settings
+        self.done = list(done or [])
+        self.files = list(files or [])
+        self.rows = rows
+
+    @classmethod
+    def load(cls, path):
+        """Return the checkpoint stored at path, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as handle:
+            state = json.load(handle)
+        return cls(
+            path, state["settings"], state["done"], state["files"], state["rows"]
+        )
+
+    def save(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "settings": self.settings,
+                    "done": self.done,
+                    "files": self.files,
+                    "rows": self.rows,
+                },
+                handle,
+                indent=2,
+            )
+        os.replace(temporary, self.path)
+
+    @property
+    def finished(self):
+        """True once every slice of the range has been exported."""
+        settings = self.settings
+        slices = time_slices(
+            settings["since"], settings["until"], settings["slice_hours"]
+        )
+        return len(self.done) >= len(slices)
+
+    def finish_slice(self, start, files, rows):
+        self.done.append(start)
+        self.files.extend(files)
+        self.rows += rows
+        self.save()
+
+
+def _check_resume(checkpoint, requested):
+    """
+    Refuse to resume a checkpoint with different settings.
+
+    Raises:
+        ValueError: Naming the settings that differ
+    """
+    changed = [
+        name
+        for name, value in requested.items()
+        if checkpoint.settings.get(name) != value
+    ]
+    if changed:
+        raise ValueError(
+            f"{checkpoint.path} is an unfinished export with different "
+            f"{', '.join(changed)}; resume it with its own settings or restart"
+        )
+
+
+def export_table(
+    table,
+    out_dir,
+    since=None,
+    until=None,
+    fmt=None,
+    query=None,
+    fields=None,
+    display_value=None,
+    slice_hours=None,
+    chunk_rows=None,
+    instance=None,
+    restart=False,
+    on_slice=None,
+):
+    """
+    Export a table's rows created in [since, until) to chunk files.
+
+    If out_dir holds an unfinished checkpoint for the table, the export
+    resumes it unless restart is set. Settings left as None are taken from
+    the checkpoint; any other setting must match it.
+
+    Args:
+        table: One of EXPORT_TABLES
+        out_dir: Directory for the chunk files and checkpoint
+        since, until: Internal (UTC) "YYYY-MM-DD HH:MM:SS" bounds; a new
+            export defaults to the last DAYS days
+        fmt: "ndjson" (gzip, default) or "parquet"
+        query: Additional encoded query filter
+        fields: Field names to export, or None for all fields
+        display_value: "false" (default) for internal values, "true" for
+            display values, "all" for both
+        slice_hours: Hours of sys_created_on per slice (default SLICE_HOURS)
+        chunk_rows: Maximum rows per chunk file (default CHUNK_ROWS)
+        instance: Named instance to export from (default instance if empty)
+        restart: Ignore an existing checkpoint and start over
+        on_slice: Optional callable(start, rows, finished, total) called
+            after each slice, and once with rows=None for each slice a
+            resumed export skips
+
+    Returns:
+        The Checkpoint of the finished export
+
+    Raises:
+        ValueError: If the table, format or time range is not supported, or
+            an unfinished checkpoint has different settings
+        ServiceNowAPIError: If a request fails; finished slices are kept
+    """
+    requested = {
+        name: value
+        for name, value in {
+            "since": since,
+            "until": until,
+            "format": fmt,
+            "query": query,
+            "fields": fields,
+            "display_value": display_value,
+            "slice_hours": slice_hours,
+            "chunk_rows": chunk_rows,
+            "instance": instance,
+        }.items()
+        if value is not None
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{table}{CHECKPOINT_SUFFIX}")
+    checkpoint = None if restart else Checkpoint.load(path)
+    if checkpoint and checkpoint.finished:
+        checkpoint = None  # A new export; chunks of overlapping slices are replaced
+    if checkpoint:
+        _check_resume(checkpoint, requested)
+    else:
+        if table not in EXPORT_TABLES:
+            raise ValueError(
+                f"Unknown table {table}. Supported: {', '.join(EXPORT_TABLES)}"
+            )
+        default_since, default_until = days_range(DAYS)
+        settings = {
+            "table": table,
+            "since": default_since,
+            "until": default_until,
+            **DEFAULTS,
+            **requested,
+        }
+        if settings["format"] not in FORMATS:
+            raise ValueError(
+                f"Unknown format {settings['format']}. "
+                f"Supported: {', '.join(FORMATS)}"
+            )
+        checkpoint = Checkpoint(path, settings)
+    settings = checkpoint.settings
+    table = settings["table"]
+    if settings["format"] == "parquet":
+        _require_pyarrow()
+
+    slices = time_slices(settings["since"], settings["until"], settings["slice_hours"])
+    checkpoint.save()
+    client = get_client(settings["instance"])
+    for start, end in slices:
+        if start in checkpoint.done:
+            if on_slice:
+                on_slice(start, None, len(checkpoint.done), len(slices))
+            continue
+        _remove_partial(out_dir, table, start)
+        files = []
+        rows = 0
+        chunk = None
+        try:
+            for record in client.iter_table_parallel(
+                table,
+                _slice_query(settings["query"], start, end),
+                settings["fields"],
+                settings["display_value"],
+            ):
+                if chunk is None:
+                    name = _chunk_name(table, start, len(files), settings["format"])
+                    chunk = ChunkWriter(os.path.join(out_dir, name), settings["format"])
+                    files.append(name)
+                chunk.write(record)
+                rows += 1
+                if chunk.rows >= settings["chunk_rows"]:
+                    chunk.close()
+                    chunk = None
+            if chunk:
+                chunk.close()
+        except BaseException:
+            if chunk:
+                chunk.discard()
+            raise
+
+        checkpoint.finish_slice(start, files, rows)
+        if on_slice:
+            on_slice(start, rows, len(checkpoint.done), len(slices))
+    return checkpoint
+
+
+def days_range(days, now=None):
+    """Return (since, until) internal values for the last `days` days."""
+    until = now or datetime.now(timezone.utc)
+    return format_datetime(until - timedelta(days=days)), format_datetime(until)
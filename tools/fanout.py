@@ -0,0 +1,76 @@
+"""
+Instance selection and fan-out for query tools
+
+Every query tool takes an instance argument. across_instances validates it
+and, for instance="all", runs the tool against every configured instance in
+parallel and merges the outputs under one header per instance.
+"""
+
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import ALL_INSTANCES, instance_names, resolve_instance
+
+
+def merge_outputs(names, outputs):
+    """Join per-instance tool outputs under one header per instance."""
+    return "\n\n".join(
+        f"=== INSTANCE: {name} ===\n{output}" for name, output in zip(names, outputs)
+    )
+
+
+def across_instances(function):
+    """
+    Decorate a query function that takes an instance argument.
+
+    Unknown instance names are reported as an error string, like any other
+    tool error; instance="all" calls the function once per configured
+    instance, concurrently, and merges the results.
+    """
+    signature = inspect.signature(function)
+
+    def plan(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        instance = bound.arguments["instance"]
+        if instance == ALL_INSTANCES:
+            return bound.arguments, instance_names()
+        resolve_instance(instance)
+        return bound.arguments, None
+
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                arguments, names = plan(args, kwargs)
+            except ValueError as e:
+                return f"Error: {e}"
+            if names is None:
+                return await function(**arguments)
+            outputs = await asyncio.gather(
+                *(function(**{**arguments, "instance": name}) for name in names)
+            )
+            return merge_outputs(names, outputs)
+
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        try:
+            arguments, names = plan(args, kwargs)
+        except ValueError as e:
+            return f"Error: {e}"
+        if names is None:
+            return function(**arguments)
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            outputs = list(
+                pool.map(
+                    lambda name: function(**{**arguments, "instance": name}), names
+                )
+            )
+        return merge_outputs(names, outputs)
+
+    return wrapper
@@ -0,0 +1,154 @@
+"""
+Pagination helpers for full Table API scans
+
+Sequential scans use keyset pagination: deep sysparm_offset paging gets
+slower with every page because the instance has to skip all earlier rows, so
+pages are ordered by (sys_created_on, sys_id) and each request asks only for
+rows strictly after the last row already seen.
+
+Parallel scans trade that for wall-clock time: a one-row probe finds the
+newest sys_created_on, the scan is frozen at it, a second probe reads
+X-Total-Count for the frozen query, and fixed offset shards are fetched
+concurrently, the last one reading on until a short page.
+"""
+
+import os
+
+# Page size used by full-table scans
+PAGE_SIZE = 1000
+
+KEYSET_ORDER = "ORDERBYsys_created_on^ORDERBYsys_id"
+KEYSET_ORDER_DESC = "ORDERBYDESCsys_created_on^ORDERBYDESCsys_id"
+KEYSET_FIELDS = ["sys_created_on", "sys_id"]
+
+# Concurrent shard requests per parallel scan
+MAX_WORKERS = int(os.getenv("SERVICENOW_MAX_WORKERS", "4"))
+
+
+def page_params(query, fields, display_value, page_size, cursor=None, descending=False):
+    """
+    Build sysparm_* parameters for one keyset page.
+
+    Args:
+        query: Encoded query filter (no ORDERBY, no ^NQ)
+        fields: Field names to return, or None for all fields
+        display_value: "true", "false" or "all"
+        page_size: Rows per page
+        cursor: (sys_created_on, sys_id) of the last row seen, or None
+        descending: Page newest first instead of oldest first
+
+    Returns:
+        dict of query parameters
+    """
+    clauses = [query] if query else []
+    if cursor:
+        created, sys_id = cursor
+        # (created > t) OR (created = t AND sys_id > id), mirrored when
+        # descending
+        op = "<" if descending else ">"
+        after = clauses + [f"sys_created_on{op}{created}"]
+        tie = clauses + [f"sys_created_on={created}", f"sys_id{op}{sys_id}"]
+        encoded = "^".join(after) + "^NQ" + "^".join(tie)
+    else:
+        encoded = "^".join(clauses)
+
+    order = KEYSET_ORDER_DESC if descending else KEYSET_ORDER
+    params = {
+        "sysparm_query": f"{encoded}^{order}" if encoded else order,
+        "sysparm_limit": page_size,
+        # The cursor needs internal values, so display values are requested
+        # alongside them and flattened back in flatten_record()
+        "sysparm_display_value": "all" if display_value == "true" else display_value,
+        "sysparm_exclude_reference_link": "true",
+    }
+    if fields:
+        missing = [f for f in KEYSET_FIELDS if f not in fields]
+        params["sysparm_fields"] = ",".join(list(fields) + missing)
+    return params
+
+
+def flatten_record(record, display_value):
+    """
+    Collapse a sysparm_display_value=all record back to display values.
+
+    Records fetched with display_value other than "true" are returned as-is.
+    """
+    if display_value != "true":
+        return record
+    return {
+        field: (
+            value.get("display_value", value.get("value", ""))
+            if isinstance(value, dict)
+            else value
+        )
+        for field, value in record.items()
+    }
+
+
+def next_cursor(record):
+    """Return the (sys_created_on, sys_id) cursor for a raw page row."""
+    values = []
+    for field in KEYSET_FIELDS:
+        value = record.get(field, "")
+        if isinstance(value, dict):
+            value = value.get("value", "")
+        values.append(value)
+    return tuple(values)
+
+
+def probe_params(query):
+    """
+    Build parameters for the count-first probe of a parallel scan.
+
+    Returns the newest matching row (raw values) and, in the X-Total-Count
+    header, the number of matching rows.
+    """
+    order = "ORDERBYDESCsys_created_on"
+    return {
+        "sysparm_query": f"{query}^{order}" if query else order,
+        "sysparm_limit": 1,
+        "sysparm_fields": ",".join(KEYSET_FIELDS),
+        "sysparm_display_value": "false",
+    }
+
+
+def mark_params(query):
+    """
+    Build parameters for a one-row probe of the newest sys_updated_on.
+
+    Incremental scans filter on sys_updated_on but page in sys_created_on
+    order, so a row updated behind the cursor is not seen again. Bounding
+    the scan by the probed mark (sys_updated_on<=mark) and resuming from
+    the mark, rather than from the newest row seen, leaves such rows for
+    the next scan instead of skipping them.
+    """
+    order = "ORDERBYDESCsys_updated_on"
+    return {
+        "sysparm_query": f"{query}^{order}" if query else order,
+        "sysparm_limit": 1,
+        "sysparm_fields": "sys_updated_on",
+        "sysparm_display_value": "false",
+    }
+
+
+def freeze_query(query, newest):
+    """
+    Pin a scan to rows created no later than the probe's newest row.
+
+    Rows inserted while the shards are being fetched would otherwise shift
+    the offsets and produce duplicates.
+    """
+    bound = f"sys_created_on<={newest.get('sys_created_on', '')}"
+    return f"{query}^{bound}" if query else bound
+
+
+def plan_offsets(total, page_size):
+    """Split a scan of total rows into sysparm_offset shard starts."""
+    return list(range(0, total, page_size))
+
+
+def shard_params(query, fields, display_value, page_size, offset):
+    """Build parameters for one offset shard of a parallel scan."""
+    params = page_params(query, fields, display_value, page_size)
+    params["sysparm_offset"] = offset
+    return params
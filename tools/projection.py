@@ -0,0 +1,36 @@
+"""
+Field projections for tool queries
+
+Each tool declares the fields it renders so the instance only serializes
+(and resolves display values for) those columns instead of every column on
+wide tables. Callers can ask for extra fields, which are appended to both
+the projection and the rendered output.
+"""
+
+
+def parse_extra_fields(extra_fields):
+    """Split a comma-separated extra_fields argument into field names."""
+    return [f.strip() for f in (extra_fields or "").split(",") if f.strip()]
+
+
+def projection(fields, extra_fields=""):
+    """
+    Build the sysparm_fields value for a tool.
+
+    Args:
+        fields: The tool's default field list
+        extra_fields: Comma-separated fields requested by the caller
+
+    Returns:
+        Comma-separated field list without duplicates
+    """
+    extras = [f for f in parse_extra_fields(extra_fields) if f not in fields]
+    return ",".join(list(fields) + extras)
+
+
+def format_extra_fields(entry, extra_fields):
+    """Render caller-requested extra fields as indented "name: value" lines."""
+    return "".join(
+        f"\n  {field}: {entry.get(field, 'N/A')}"
+        for field in parse_extra_fields(extra_fields)
+    )
@@ -0,0 +1,218 @@
+"""
+Client-side rate limiting for ServiceNow REST calls
+
+Parallel scans and concurrent tool calls can burst past the instance's REST
+rate-limit rules, which answer with 429 (or 503 while the node is shedding
+load). Every request first takes a token from a per-instance bucket and a
+per-table bucket; throttled responses are retried with jittered exponential
+backoff that honors Retry-After, and pause the instance bucket so concurrent
+callers back off too instead of piling on.
+"""
+
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Sustained requests per second and burst size per instance
+INSTANCE_RATE = float(os.getenv("SERVICENOW_RATE_LIMIT", "20"))
+INSTANCE_BURST = float(os.getenv("SERVICENOW_RATE_BURST", "40"))
+
+# Sustained requests per second and burst size per table, so one hot table
+# cannot take the whole instance budget
+TABLE_RATE = float(os.getenv("SERVICENOW_TABLE_RATE_LIMIT", "10"))
+TABLE_BURST = float(os.getenv("SERVICENOW_TABLE_RATE_BURST", "20"))
+
+# Per-table rate overrides in requests per second (0 disables the table bucket)
+TABLE_RATES = {}
+
+# Responses that are retried with backoff
+RETRY_STATUSES = (429, 503)
+
+# Retries after the first attempt, and the backoff envelope in seconds
+MAX_RETRIES = int(os.getenv("SERVICENOW_MAX_RETRIES", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header into seconds.
+
+    Accepts both delta-seconds and HTTP-date forms; returns None when the
+    header is missing or unparseable.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+
+    reserve() always takes a token and returns how long the caller must wait
+    before using it, so the same bucket serves threads (time.sleep) and the
+    event loop (asyncio.sleep).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        """Take one token and return the seconds until it is available."""
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+    def pause(self, now, seconds):
+        """Hold every reservation until now + seconds."""
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class RateLimiter:
+    """
+    Thread-safe per-instance and per-table token buckets plus retry policy.
+
+    Shared by the blocking and asyncio clients.
+    """
+
+    def __init__(
+        self,
+        instance_rate=INSTANCE_RATE,
+        instance_burst=INSTANCE_BURST,
+        table_rate=TABLE_RATE,
+        table_burst=TABLE_BURST,
+        table_rates=None,
+        max_retries=MAX_RETRIES,
+    ):
+        self.instance_rate = instance_rate
+        self.instance_burst = instance_burst
+        self.table_rate = table_rate
+        self.table_burst = table_burst
+        self.table_rates = dict(TABLE_RATES if table_rates is None else table_rates)
+        # Per-instance rate overrides, keyed by instance URL
+        self.instance_rates = {}
+        self.max_retries = max_retries
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    def _bucket(self, key, rate, burst):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def _buckets_for(self, instance, table):
+        buckets = []
+        rate = self.instance_rates.get(instance, self.instance_rate)
+        if rate > 0:
+            buckets.append(self._bucket((instance, ""), rate, self.instance_burst))
+        rate = self.table_rates.get(table, self.table_rate)
+        if table and rate > 0:
+            buckets.append(self._bucket((instance, table), rate, self.table_burst))
+        return buckets
+
+    def reserve(self, instance, table=""):
+        """
+        Take a token from the instance and table buckets.
+
+        Returns:
+            float: Seconds to wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                [b.reserve(now) for b in self._buckets_for(instance, table)],
+                default=0.0,
+            )
+            self.requests += 1
+            if wait > 0:
+                self.delayed += 1
+                self.waited += wait
+            return wait
+
+    def should_retry(self, response, attempt):
+        """Return True if a response is throttled and retries remain."""
+        if response.status_code not in RETRY_STATUSES:
+            return False
+        with self._lock:
+            self.throttled += 1
+        return attempt < self.max_retries
+
+    def backoff(self, instance, response, attempt):
+        """
+        Record a throttled response and return the seconds to wait.
+
+        Retry-After is honored when present; otherwise the delay is full
+        jitter over BACKOFF_BASE * 2**attempt, capped at BACKOFF_MAX. The
+        instance bucket is paused for the same delay.
+        """
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+        else:
+            # Spread callers released by the same Retry-After
+            delay = min(delay, BACKOFF_MAX) + random.uniform(0, BACKOFF_BASE)
+        with self._lock:
+            self.retries += 1
+            bucket = self._buckets.get((instance, ""))
+            if bucket is not None:
+                bucket.pause(time.monotonic(), delay)
+        return delay
+
+    def stats(self):
+        """Return a snapshot of the limiter counters and bucket levels."""
+        with self._lock:
+            now = time.monotonic()
+            buckets = {}
+            for (instance, table), bucket in self._buckets.items():
+                bucket._refill(now)
+                buckets[(instance, table or "*")] = {
+                    "rate": bucket.rate,
+                    "capacity": bucket.capacity,
+                    "tokens": bucket.tokens,
+                    "paused_for": max(0.0, bucket.paused_until - now),
+                }
+            return {
+                "requests": self.requests,
+                "delayed": self.delayed,
+                "waited": self.waited,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "buckets": buckets,
+            }
+
+
+_limiter = RateLimiter()
+
+
+def get_limiter():
+    """Return the process-wide rate limiter."""
+    return _limiter
@@ -0,0 +1,485 @@
+"""
+Optional local SQLite mirror of the tables the tools read
+
+When SERVICENOW_REPLICA_PATH is set, selected tables are copied into a local
+SQLite file and kept up to date incrementally: each sync only asks the
+instance for rows whose sys_updated_on is at or after the table's high-water
+mark. Tools that support the replica answer from indexed local rows whenever
+the mirror is fresh enough and covers the requested time window, so repeat
+questions cost milliseconds instead of a remote scan.
+
+Message fields of high-volume log tables (FULL_TEXT) are also indexed in an
+FTS5 table with the trigram tokenizer, kept in step with the rows by
+triggers. Substring filters on those fields are answered from the index
+instead of a scan, and search() adds token and phrase queries ranked by
+bm25. SQLite builds without FTS5 fall back to plain scans.
+
+Deleted rows are not detected by incremental sync; rebuild the file if that
+matters for a table.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from .client import default_instance, get_client
+from .pagination import PAGE_SIZE, flatten_record
+from .timestamps import format_datetime
+
+# Tables that can be mirrored. max_age is the default staleness bound in
+# seconds before a read triggers a sync; initial_days limits the first sync
+# of high-volume tables (None = whole table).
+REPLICA_TABLES = {
+    "incident": {"max_age": 300, "initial_days": None},
+    "change_request": {"max_age": 900, "initial_days": None},
+    "problem": {"max_age": 900, "initial_days": None},
+    "sn_customerservice_case": {"max_age": 900, "initial_days": None},
+    "sn_aia_execution_plan": {"max_age": 300, "initial_days": None},
+    "syslog": {"max_age": 60, "initial_days": 1},
+    "wf_history": {"max_age": 300, "initial_days": 7},
+    "sys_generative_ai_metric": {"max_age": 300, "initial_days": 7},
+}
+
+# Tables whose message field is full-text indexed: table -> field
+FULL_TEXT = {"syslog": "message"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    table_name TEXT NOT NULL,
+    sys_id TEXT NOT NULL,
+    number TEXT,
+    sys_created_on TEXT,
+    sys_updated_on TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (table_name, sys_id)
+);
+CREATE INDEX IF NOT EXISTS records_created
+    ON records (table_name, sys_created_on);
+CREATE INDEX IF NOT EXISTS records_updated
+    ON records (table_name, sys_updated_on);
+CREATE INDEX IF NOT EXISTS records_number
+    ON records (table_name, number);
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_name TEXT PRIMARY KEY,
+    high_water TEXT,
+    covered_since TEXT,
+    last_sync REAL
+);
+"""
+
+# Rows keep their rowid across upserts, so the index is keyed by it
+FULL_TEXT_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS records_text
+    USING fts5(content, tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS records_text_insert AFTER INSERT ON records
+WHEN new.table_name IN ({tables}) BEGIN
+    INSERT INTO records_text (rowid, content)
+    VALUES (new.rowid, {content});
+END;
+CREATE TRIGGER IF NOT EXISTS records_text_update AFTER UPDATE ON records
+WHEN new.table_name IN ({tables}) BEGIN
+    UPDATE records_text SET content = {content} WHERE rowid = new.rowid;
+END;
+"""
+
+
+def _raw(value):
+    """Return the internal value of a sysparm_display_value=all field."""
+    if isinstance(value, dict):
+        return value.get("value", "")
+    return value or ""
+
+
+def _full_text_schema():
+    """FULL_TEXT_SCHEMA with the indexed tables and field expressions filled in."""
+    tables = ", ".join(f"'{table}'" for table in FULL_TEXT)
+    cases = " ".join(
+        f"WHEN '{table}' THEN json_extract(new.data, '$.{field}.value')"
+        for table, field in FULL_TEXT.items()
+    )
+    return FULL_TEXT_SCHEMA.format(
+        tables=tables, content=f"CASE new.table_name {cases} END"
+    )
+
+
+def _utc_ago(minutes):
+    """Return now - minutes as a ServiceNow internal (UTC) timestamp."""
+    moment = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    return format_datetime(moment)
+
+
+class Replica:
+    """
+    SQLite mirror with per-table sys_updated_on high-water marks.
+
+    Rows are stored as sysparm_display_value=all JSON so either display or
+    internal values can be served back.
+    """
+
+    def __init__(self, path, tables=None, max_ages=None):
+        self.path = path
+        self.tables = {
+            name: dict(config)
+            for name, config in REPLICA_TABLES.items()
+            if tables is None or name in tables
+        }
+        for name, max_age in (max_ages or {}).items():
+            if name in self.tables:
+                self.tables[name]["max_age"] = max_age
+        self._table_locks = {name: threading.Lock() for name in self.tables}
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self.full_text = self._create_full_text()
+
+    def _create_full_text(self):
+        """Create the full-text index, backfilling it for existing files."""
+        try:
+            with self._connect() as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'records_text'"
+                ).fetchone()
+                conn.executescript(_full_text_schema())
+                if not exists:
+                    for table, field in FULL_TEXT.items():
+                        conn.execute(
+                            "INSERT INTO records_text (rowid, content)"
+                            " SELECT rowid, json_extract(data, ?) FROM records"
+                            " WHERE table_name = ?",
+                            (f"$.{field}.value", table),
+                        )
+        except sqlite3.OperationalError:
+            return False  # SQLite without FTS5 or the trigram tokenizer
+        return True
+
+    def indexed(self, table, field):
+        """Return True if substring and search filters on field use the index."""
+        return self.full_text and FULL_TEXT.get(table) == field
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def enabled(self, table):
+        """Return True if the table is mirrored."""
+        return table in self.tables
+
+    def _state(self, conn, table):
+        row = conn.execute(
+            "SELECT high_water, covered_since, last_sync FROM sync_state"
+            " WHERE table_name = ?",
+            (table,),
+        ).fetchone()
+        return row or (None, None, None)
+
+    def sync(self, table, client=None):
+        """
+        Pull rows updated since the table's high-water mark.
+
+        The scan is bounded by the newest sys_updated_on probed before it
+        starts, which becomes the new high-water mark.
+
+        Returns:
+            int: Number of rows upserted
+        """
+        config = self.tables[table]
+        client = client or get_client()
+
+        with self._table_locks[table]:
+            with self._connect() as conn:
+                high_water, covered_since, _ = self._state(conn, table)
+
+            if high_water:
+                # >= so rows sharing the mark's second are not missed
+                query = f"sys_updated_on>={high_water}"
+            elif config["initial_days"]:
+                covered_since = _utc_ago(config["initial_days"] * 1440)
+                query = f"sys_updated_on>={covered_since}"
+            else:
+                query = ""
+
+            started = time.time()
+            count = 0
+            batch = []
+            # Rows updated after the probe are left for the next sync, which
+            # resumes from the mark (see pagination.mark_params)
+            mark = client.updated_mark(table, query)
+            records = ()
+            if mark:
+                bound = f"sys_updated_on<={mark}"
+                records = client.iter_table(
+                    table,
+                    query=f"{query}^{bound}" if query else bound,
+                    display_value="all",
+                )
+            for record in records:
+                updated = _raw(record.get("sys_updated_on"))
+                batch.append(
+                    (
+                        table,
+                        _raw(record.get("sys_id")),
+                        _raw(record.get("number")) or None,
+                        _raw(record.get("sys_created_on")),
+                        updated,
+                        json.dumps(record),
+                    )
+                )
+                if len(batch) >= 500:
+                    count += self._upsert(batch)
+                    batch = []
+            count += self._upsert(batch)
+
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                    (table, mark or high_water, covered_since, started),
+                )
+            return count
+
+    def _upsert(self, rows):
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            # An upsert rather than INSERT OR REPLACE keeps each row's rowid,
+            # which the full-text index is keyed by
+            conn.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (table_name, sys_id) DO UPDATE SET"
+                " number = excluded.number,"
+                " sys_created_on = excluded.sys_created_on,"
+                " sys_updated_on = excluded.sys_updated_on,"
+                " data = excluded.data",
+                rows,
+            )
+        return len(rows)
+
+    def ensure_fresh(self, table, client=None):
+        """Sync the table if its last sync is older than its staleness bound."""
+        with self._connect() as conn:
+            _, _, last_sync = self._state(conn, table)
+        if last_sync is None or time.time() - last_sync > self.tables[table]["max_age"]:
+            self.sync(table, client)
+
+    def covers(self, table, minutes_ago=None):
+        """
+        Return True if the mirror holds every row for the requested window.
+
+        Args:
+            table: Table name
+            minutes_ago: Look-back window, or None for the whole table
+        """
+        if not self.enabled(table):
+            return False
+        if self.tables[table]["initial_days"] is None:
+            return True
+        if minutes_ago is None:
+            return False
+        return minutes_ago <= self.tables[table]["initial_days"] * 1440
+
+    def select(
+        self,
+        table,
+        minutes_ago=None,
+        time_field="sys_created_on",
+        like=None,
+        equals=None,
+        order_by="sys_created_on",
+        descending=True,
+        limit=None,
+        display_value="true",
+        updated_since=None,
+        search=None,
+    ):
+        """
+        Read mirrored rows with encoded-query-like filters.
+
+        Args:
+            table: Table name
+            minutes_ago: Only rows whose time_field is within this window
+            time_field: sys_created_on or sys_updated_on
+            like: {field: substring} case-insensitive matches (fieldLIKEvalue)
+            equals: {field: value} internal-value matches (field=value)
+            order_by: sys_created_on or sys_updated_on
+            descending: Sort newest first
+            limit: Maximum rows, or None for all
+            display_value: "true" for display values, "false" for internal,
+                "all" for both
+            updated_since: Only rows whose sys_updated_on is at or after this
+                internal timestamp
+            search: FTS5 query over the table's full-text field (terms,
+                "phrases", AND/OR/NOT); rows are returned best match first
+
+        Returns:
+            list of record dicts
+
+        Raises:
+            ValueError: If search is given for a table without a full-text
+                index, or is not a valid FTS5 query
+        """
+        where = ["table_name = ?"]
+        args = [table]
+        # Filters answered by the full-text index, which then drives the scan
+        text_where = []
+        text_args = []
+        if search:
+            if not self.indexed(table, FULL_TEXT.get(table)):
+                raise ValueError(f"No full-text index for {table}")
+            text_where.append("records_text MATCH ?")
+            text_args.append(search)
+        if minutes_ago is not None:
+            where.append(f"{time_field} >= ?")
+            args.append(_utc_ago(minutes_ago))
+        if updated_since:
+            where.append("sys_updated_on >= ?")
+            args.append(updated_since)
+        for field, value in (like or {}).items():
+            if self.indexed(table, field):
+                text_where.append("content LIKE ?")
+                text_args.append(f"%{value}%")
+                continue
+            if field == "number":
+                where.append("number LIKE ?")
+            else:
+                where.append("json_extract(data, ?) LIKE ?")
+                args.append(f"$.{field}.value")
+            args.append(f"%{value}%")
+        for field, value in (equals or {}).items():
+            if field == "sys_id":
+                where.append("sys_id = ?")
+            else:
+                where.append("json_extract(data, ?) = ?")
+                args.append(f"$.{field}.value")
+            args.append(str(value))
+
+        sql = "SELECT data FROM records"
+        if text_where:
+            sql = (
+                "SELECT data FROM ("
+                f" SELECT rowid AS text_rowid{', rank' if search else ''}"
+                f" FROM records_text WHERE {' AND '.join(text_where)}"
+                ") CROSS JOIN records ON records.rowid = text_rowid"
+            )
+            args = text_args + args
+        sql += f" WHERE {' AND '.join(where)} ORDER BY"
+        if search:
+            # bm25 rank; lower is a better match
+            sql += " rank,"
+        sql += f" {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+
+        with self._connect() as conn:
+            try:
+                rows = conn.execute(sql, args).fetchall()
+            except sqlite3.OperationalError as e:
+                if not search:
+                    raise
+                raise ValueError(f"Invalid search {search!r}: {e}")
+
+        records = [json.loads(row[0]) for row in rows]
+        if display_value == "all":
+            return records
+        if display_value == "true":
+            return [flatten_record(r, "true") for r in records]
+        return [{k: _raw(v) for k, v in r.items()} for r in records]
+
+    def iter_updated(self, table, updated_since=None, batch_size=PAGE_SIZE):
+        """
+        Stream mirrored rows in sys_updated_on order, one batch at a time.
+
+        Batches are keyset reads on (sys_updated_on, sys_id), so scanning a
+        large table holds one batch of rows in memory rather than all of
+        them.
+
+        Args:
+            table: Table name
+            updated_since: Only rows whose sys_updated_on is at or after this
+                internal timestamp
+            batch_size: Rows per read
+
+        Yields:
+            record dict with display_value=all fields
+        """
+        # ("t", "") sorts before every (t, sys_id), so the first batch
+        # starts at updated_since inclusive
+        cursor = (updated_since or "", "")
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT sys_updated_on, sys_id, data FROM records"
+                    " WHERE table_name = ? AND (sys_updated_on, sys_id) > (?, ?)"
+                    " ORDER BY sys_updated_on, sys_id LIMIT ?",
+                    (table, *cursor, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield json.loads(row[2])
+            if len(rows) < batch_size:
+                return
+            cursor = rows[-1][:2]
+
+    def read(self, table, client=None, **filters):
+        """Sync the table if stale, then select() from it."""
+        self.ensure_fresh(table, client)
+        return self.select(table, **filters)
+
+    def stats(self):
+        """Return per-table row counts and sync state."""
+        with self._connect() as conn:
+            counts = dict(
+                conn.execute(
+                    "SELECT table_name, COUNT(*) FROM records GROUP BY table_name"
+                ).fetchall()
+            )
+            states = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    "SELECT table_name, high_water, last_sync FROM sync_state"
+                ).fetchall()
+            }
+        return {
+            table: {
+                "rows": counts.get(table, 0),
+                "high_water": states.get(table, (None, None))[0],
+                "last_sync": states.get(table, (None, None))[1],
+                "max_age": config["max_age"],
+            }
+            for table, config in self.tables.items()
+        }
+
+
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_replica(instance=""):
+    """
+    Return the process-wide replica, or None if replica mode is off.
+
+    The mirror copies the default instance only, so None is also returned
+    for any other named instance.
+
+    Configured with:
+        SERVICENOW_REPLICA_PATH: SQLite file to mirror into (enables the mode)
+        SERVICENOW_REPLICA_TABLES: Optional comma-separated subset of tables
+        SERVICENOW_REPLICA_MAX_AGE_<TABLE>: Staleness bound in seconds
+    """
+    global _replica
+    path = os.getenv("SERVICENOW_REPLICA_PATH")
+    if not path or (instance and instance != default_instance()):
+        return None
+    if _replica is None:
+        with _replica_lock:
+            if _replica is None:
+                tables = os.getenv("SERVICENOW_REPLICA_TABLES")
+                tables = [t.strip() for t in tables.split(",")] if tables else None
+                max_ages = {
+                    name: float(
+                        os.environ[f"SERVICENOW_REPLICA_MAX_AGE_{name.upper()}"]
+                    )
+                    for name in REPLICA_TABLES
+                    if f"SERVICENOW_REPLICA_MAX_AGE_{name.upper()}" in os.environ
+                }
+                _replica = Replica(path, tables, max_ages)
+    return _replica
@@ -0,0 +1,105 @@
+"""
+Coalescing of identical in-flight requests
+
+Concurrent tool calls often issue the same query at the same moment (for
+example ai_roi_analysis and ai_agent_executions both reading
+sn_aia_execution_plan). The first caller for a key makes the upstream call;
+callers arriving while it is in flight wait for it and share its result
+instead of sending a duplicate request.
+"""
+
+import asyncio
+import threading
+import weakref
+
+_groups = weakref.WeakSet()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe coalescing of identical blocking calls."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+        _groups.add(self)
+
+    def do(self, key, fn):
+        """
+        Run fn() unless a call for key is already in flight.
+
+        Args:
+            key: Hashable identity of the request
+            fn: Zero-argument callable making the upstream call
+
+        Returns:
+            The result of the in-flight call (exceptions are shared too)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    Coalescing of identical coroutine calls on one event loop.
+
+    The upstream call runs as its own task, so a caller that is cancelled
+    does not cancel the request for the others waiting on it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+        _groups.add(self)
+
+    async def do(self, key, fn):
+        """Async variant of SingleFlight.do; fn is a coroutine function."""
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+
+def flight_stats():
+    """Return upstream calls made and calls served by sharing, over all groups."""
+    groups = list(_groups)
+    return {
+        "calls": sum(g.calls for g in groups),
+        "shared": sum(g.shared for g in groups),
+    }
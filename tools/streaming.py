@@ -0,0 +1,154 @@
+"""
+Incremental decoding of Table API responses
+
+response.json() holds the raw body, its decoded form and the rendered output
+in memory at the same time. For large responses the records of the "result"
+array are instead decoded one at a time as bytes arrive, and the tool
+renderers consume them as an iterator, so peak memory is bounded by one
+record plus the rendered output.
+"""
+
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+# Responses asking for more rows than this are streamed instead of buffered
+# (and therefore bypass the response cache)
+STREAM_MIN_ROWS = 500
+
+_RESULT_ARRAY = re.compile(r'"result"\s*:\s*\[')
+_SKIP = " \t\r\n,"
+
+# Drop consumed text from the buffer once this many characters are behind us
+_COMPACT_AT = 256 * 1024
+
+
+class ResultStreamDecoder:
+    """
+    Push decoder for the records of a {"result": [...]} body.
+
+    feed() accepts text fragments in order and returns every record that is
+    now complete; finish() checks the array was closed.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self.done = False
+
+    def feed(self, text):
+        """Add a text fragment and return the records it completed."""
+        self._buffer += text
+        records = []
+        if self.done:
+            return records
+
+        if not self._in_array:
+            match = _RESULT_ARRAY.search(self._buffer)
+            if not match:
+                return records
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        while True:
+            while self._pos < len(buffer) and buffer[self._pos] in _SKIP:
+                self._pos += 1
+            if self._pos >= len(buffer):
+                break
+            if buffer[self._pos] == "]":
+                self.done = True
+                break
+            try:
+                record, end = self._decoder.raw_decode(buffer, self._pos)
+            except json.JSONDecodeError:
+                # Record is split across fragments; wait for more text
+                break
+            records.append(record)
+            self._pos = end
+
+        if self._pos > _COMPACT_AT:
+            self._buffer = self._buffer[self._pos :]
+            self._pos = 0
+        return records
+
+    def finish(self):
+        """Raise ValueError if the body ended before the result array did."""
+        if self._in_array and not self.done:
+            raise ValueError("Truncated Table API response: result array not closed")
+
+
+def _text_chunks(byte_chunks):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in byte_chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_results(response):
+    """
+    Yield the records of a requests.Response "result" array as they arrive.
+
+    Works for both streamed and already-buffered responses; a streamed
+    response is closed once exhausted.
+    """
+    decoder = ResultStreamDecoder()
+    try:
+        for text in _text_chunks(response.iter_content(chunk_size=CHUNK_SIZE)):
+            yield from decoder.feed(text)
+        decoder.finish()
+    finally:
+        response.close()
+
+
+async def aiter_results(response):
+    """Async variant of iter_results for httpx.Response."""
+    decoder = ResultStreamDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    try:
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            for record in decoder.feed(utf8.decode(chunk)):
+                yield record
+        for record in decoder.feed(utf8.decode(b"", final=True)):
+            yield record
+        decoder.finish()
+    finally:
+        await response.aclose()
+
+
+def render_entries(entries, format_entry, empty_message):
+    """
+    Render records one by one and join them with the tool separator.
+
+    Args:
+        entries: Iterable of record dicts
+        format_entry: Callable rendering one record to a string
+        empty_message: Returned when there are no records
+
+    Returns:
+        Formatted tool output
+    """
+    output = [format_entry(entry) for entry in entries]
+    if not output:
+        return empty_message
+    return "\n---\n".join(output)
+
+
+async def render_entries_async(entries, format_entry, empty_message):
+    """Async variant of render_entries for an async iterator of records."""
+    output = [format_entry(entry) async for entry in entries]
+    if not output:
+        return empty_message
+    return "\n---\n".join(output)
+
+
+def wants_stream(params):
+    """Return True if a Table API read is large enough to stream."""
+    try:
+        return int((params or {}).get("sysparm_limit") or 0) > STREAM_MIN_ROWS
+    except (TypeError, ValueError):
+        return False
@@ -2,12 +2,33 @@
 System debugging tools for ServiceNow
 """
 
-from .incidents import query_incidents
-from .rest_messages import query_rest_messages
-from .syslog import query_syslog
+from .client_stats import query_client_stats
+from .incidents import query_incidents, query_incidents_async
+from .multi_query import query_multi, query_multi_async
+from .rest_messages import query_rest_messages, query_rest_messages_async
+from .syslog import (
+    follow_syslog,
+    follow_syslog_async,
+    query_syslog,
+    query_syslog_async,
+)
+from .syslog_histogram import query_syslog_histogram, query_syslog_histogram_async
+from .syslog_templates import query_syslog_templates, query_syslog_templates_async
 
 __all__ = [
     "query_syslog",
+    "query_syslog_async",
+    "follow_syslog",
+    "follow_syslog_async",
+    "query_syslog_templates",
+    "query_syslog_templates_async",
+    "query_syslog_histogram",
+    "query_syslog_histogram_async",
     "query_rest_messages",
+    "query_rest_messages_async",
     "query_incidents",
+    "query_incidents_async",
+    "query_multi",
+    "query_multi_async",
+    "query_client_stats",
 ]
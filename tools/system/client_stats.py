@@ -0,0 +1,92 @@
+"""
+Report the state of the shared ServiceNow client (instances, response
+cache counters, rate limiter state, request coalescing, local mirror sync state)
+"""
+
+from ..cache import get_cache
+from ..client import default_instance, instance_configs, instance_names
+from ..ratelimit import get_limiter
+from ..replica import get_replica
+from ..singleflight import flight_stats
+
+
+def query_client_stats() -> str:
+    """
+    Report response cache counters, rate limiter state and local mirror state
+    for the shared ServiceNow client.
+
+    Useful when checking whether repeated tool calls are being served from
+    the local cache or are reaching the instance.
+
+    Returns:
+        Formatted string with cache, limiter and mirror statistics
+    """
+    cache = get_cache()
+    stats = cache.stats()
+    configs = instance_configs()
+    names_by_url = {
+        (config["instance"] or "").rstrip("/"): name for name, config in configs.items()
+    }
+
+    output = []
+    output.append("INSTANCES:")
+    for name in instance_names():
+        marker = " (default)" if name == default_instance() else ""
+        output.append(
+            f"  {name}{marker}: {configs[name]['instance'] or 'not configured'}"
+        )
+    output.append("")
+    output.append("RESPONSE CACHE:")
+    output.append(f"  Entries: {stats['entries']} (max {stats['max_entries']})")
+    output.append(f"  Hits: {stats['hits']}")
+    output.append(f"  Misses: {stats['misses']}")
+    output.append(f"  Hit rate: {stats['hit_rate']:.1f}%")
+    output.append(f"  Evictions: {stats['evictions']}")
+    output.append(f"  Default TTL: {cache.default_ttl:.0f}s")
+    for table, ttl in sorted(cache.table_ttls.items()):
+        output.append(f"    {table}: {ttl:.0f}s")
+
+    limiter = get_limiter()
+    limits = limiter.stats()
+    output.append("")
+    output.append("RATE LIMITER:")
+    output.append(
+        f"  Instance budget: {limiter.instance_rate:g} req/s "
+        f"(burst {limiter.instance_burst:g})"
+    )
+    output.append(
+        f"  Table budget: {limiter.table_rate:g} req/s "
+        f"(burst {limiter.table_burst:g})"
+    )
+    output.append(f"  Requests: {limits['requests']}")
+    output.append(
+        f"  Delayed: {limits['delayed']} ({limits['waited']:.1f}s total wait)"
+    )
+    output.append(f"  Throttled (429/503): {limits['throttled']}")
+    output.append(f"  Retries: {limits['retries']}")
+    for (instance, table), bucket in sorted(limits["buckets"].items()):
+        paused = f", paused {bucket['paused_for']:.1f}s" if bucket["paused_for"] else ""
+        output.append(
+            f"    {names_by_url.get(instance, instance)}/{table}: {max(bucket['tokens'], 0):.1f}/{bucket['capacity']:g} "
+            f"tokens at {bucket['rate']:g} req/s{paused}"
+        )
+
+    flights = flight_stats()
+    output.append("")
+    output.append("REQUEST COALESCING:")
+    output.append(f"  Upstream reads: {flights['calls']}")
+    output.append(f"  Served from an identical in-flight read: {flights['shared']}")
+
+    replica = get_replica()
+    output.append("")
+    if replica is None:
+        output.append("LOCAL MIRROR: disabled (set SERVICENOW_REPLICA_PATH to enable)")
+    else:
+        output.append(f"LOCAL MIRROR: {replica.path}")
+        for table, state in replica.stats().items():
+            output.append(
+                f"  {table}: {state['rows']} rows, "
+                f"high-water {state['high_water'] or 'never synced'}, "
+                f"max age {state['max_age']:.0f}s"
+            )
+    return "\n".join(output)
@@ -2,45 +2,54 @@
 Query incident records for context when investigating AI activity
 """
 
-import os
-
-import requests
-
-
-def query_incidents(
-    number: str = "",
-    sys_id: str = "",
-    limit: int = 10,
-    minutes_ago: int = 1440,
-) -> str:
-    """
-    Query incident records to get context about tickets involved in AI operations.
-
-    Use this when you need to look up incident details by number or sys_id,
-    especially when investigating AI Agent or Now Assist activity on specific incidents.
-
-    Args:
-        number: Incident number (e.g., INC0009005) - partial match supported
-        sys_id: Incident sys_id for exact lookup
-        limit: Maximum number of results (default 10)
-        minutes_ago: Look back this many minutes (default 1440 = 24 hours)
-
-    Returns:
-        Formatted string with incident details
-    """
-    INSTANCE = os.getenv("SERVICENOW_INSTANCE")
-    USERNAME = os.getenv("SERVICENOW_USERNAME")
-    PASSWORD = os.getenv("SERVICENOW_PASSWORD")
-
+import asyncio
+
+from ..client import get_async_client, get_client
+from ..fanout import across_instances
+from ..projection import format_extra_fields, projection
+from ..replica import get_replica
+from ..streaming import (
+    aiter_results,
+    iter_results,
+    render_entries,
+    render_entries_async,
+)
+
+TABLE = "incident"
+
+# Fields rendered by _format_entry
+FIELDS = [
+    "number",
+    "short_description",
+    "description",
+    "state",
+    "priority",
+    "urgency",
+    "impact",
+    "category",
+    "assigned_to",
+    "assignment_group",
+    "sys_created_on",
+    "sys_updated_on",
+    "work_notes",
+    "close_notes",
+    "sys_id",
+]
+
+EMPTY_MESSAGE = "No incidents found matching your criteria."
+
+
+def _build_params(number, sys_id, limit, minutes_ago, extra_fields):
+    """Build the Table API parameters for a query_incidents call."""
     # Build query
     query_parts = []
 
     if sys_id:
         # Direct sys_id lookup
-        url = f"{INSTANCE}/api/now/table/incident/{sys_id}"
         params = {
             "sysparm_display_value": "true",
-            "sysparm_fields": "number,short_description,description,state,priority,urgency,impact,category,assigned_to,assignment_group,sys_created_on,sys_updated_on,work_notes,close_notes,sys_id",
+            "sysparm_fields": projection(FIELDS, extra_fields),
+            "sysparm_exclude_reference_link": "true",
         }
     else:
         # Query-based lookup
@@ -49,21 +58,74 @@ def query_incidents(
         query_parts.append(f"sys_updated_onRELATIVEGT@minute@ago@{minutes_ago}")
         query = "^".join(query_parts)
 
-        url = f"{INSTANCE}/api/now/table/incident"
         params = {
             "sysparm_query": f"{query}^ORDERBYDESCsys_updated_on",
             "sysparm_limit": limit,
             "sysparm_display_value": "true",
-            "sysparm_fields": "number,short_description,description,state,priority,urgency,impact,category,assigned_to,assignment_group,sys_created_on,sys_updated_on,work_notes,close_notes,sys_id",
+            "sysparm_fields": projection(FIELDS, extra_fields),
+            "sysparm_exclude_reference_link": "true",
         }
 
-    response = requests.get(
-        url,
-        params=params,
-        auth=(USERNAME, PASSWORD),
-        headers={"Accept": "application/json"},
+    return params
+
+
+def _read_replica(replica, number, sys_id, limit, minutes_ago):
+    """Answer a query_incidents call from the local mirror."""
+    if sys_id:
+        return replica.read(TABLE, equals={"sys_id": sys_id}, limit=1)
+    return replica.read(
+        TABLE,
+        minutes_ago=minutes_ago,
+        time_field="sys_updated_on",
+        like={"number": number} if number else None,
+        order_by="sys_updated_on",
+        limit=limit,
+    )
+
+
+def _format_entry(entry, extra_fields):
+    """Render one incident record."""
+    # Truncate long fields for readability
+    description = entry.get("description", "N/A")
+    if len(description) > 200:
+        description = description[:200] + "..."
+
+    work_notes = entry.get("work_notes", "")
+    if work_notes and len(work_notes) > 200:
+        work_notes = work_notes[:200] + "..."
+
+    close_notes = entry.get("close_notes", "")
+    if close_notes and len(close_notes) > 200:
+        close_notes = close_notes[:200] + "..."
+
+    return (
+        f"[{entry.get('number', 'N/A')}] {entry.get('short_description', 'N/A')}\n"
+        f"  State: {entry.get('state', 'N/A')}\n"
+        f"  Priority: {entry.get('priority', 'N/A')} (Urgency: {entry.get('urgency', 'N/A')}, Impact: {entry.get('impact', 'N/A')})\n"
+        f"  Category: {entry.get('category', 'N/A')}\n"
+        f"  Assigned To: {entry.get('assigned_to', 'Unassigned')}\n"
+        f"  Assignment Group: {entry.get('assignment_group', 'N/A')}\n"
+        f"  Created: {entry.get('sys_created_on', 'N/A')}\n"
+        f"  Updated: {entry.get('sys_updated_on', 'N/A')}\n"
+        f"  Description: {description}\n"
+        + (f"  Work Notes: {work_notes}\n" if work_notes else "")
+        + (f"  Close Notes: {close_notes}\n" if close_notes else "")
+        + f"  Sys ID: {entry.get('sys_id', 'N/A')}"
+        + format_extra_fields(entry, extra_fields)
     )
 
+
+def _format_entries(entries, extra_fields):
+    """Render incident records as tool output."""
+    return render_entries(
+        entries,
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+def _check_response(response, sys_id):
+    """Return an error message for a failed response, or None."""
     if response.status_code == 404:
         return f"Incident not found with sys_id: {sys_id}"
 
@@ -73,44 +135,113 @@ def query_incidents(
     if response.status_code != 200:
         return f"Error: {response.status_code} - {response.text}"
 
+    return None
+
+
+def _format_results(response, sys_id, extra_fields):
+    """Render a Table API response as tool output."""
+    error = _check_response(response, sys_id)
+    if error:
+        return error
+
     # Handle both single record (sys_id lookup) and list responses
     if sys_id:
         result = response.json().get("result", {})
         if not result:
             return f"Incident not found with sys_id: {sys_id}"
-        results = [result]
-    else:
-        results = response.json().get("result", [])
-        if not results:
-            return "No incidents found matching your criteria."
-
-    output = []
-    for entry in results:
-        # Truncate long fields for readability
-        description = entry.get("description", "N/A")
-        if len(description) > 200:
-            description = description[:200] + "..."
-
-        work_notes = entry.get("work_notes", "")
-        if work_notes and len(work_notes) > 200:
-            work_notes = work_notes[:200] + "..."
-
-        close_notes = entry.get("close_notes", "")
-        if close_notes and len(close_notes) > 200:
-            close_notes = close_notes[:200] + "..."
-
-        output.append(
-            f"[{entry.get('number', 'N/A')}] {entry.get('short_description', 'N/A')}\n"
-            f"  State: {entry.get('state', 'N/A')}\n"
-            f"  Priority: {entry.get('priority', 'N/A')} (Urgency: {entry.get('urgency', 'N/A')}, Impact: {entry.get('impact', 'N/A')})\n"
-            f"  Category: {entry.get('category', 'N/A')}\n"
-            f"  Assigned To: {entry.get('assigned_to', 'Unassigned')}\n"
-            f"  Assignment Group: {entry.get('assignment_group', 'N/A')}\n"
-            f"  Created: {entry.get('sys_created_on', 'N/A')}\n"
-            f"  Updated: {entry.get('sys_updated_on', 'N/A')}\n"
-            f"  Description: {description}\n"
-            + (f"  Work Notes: {work_notes}\n" if work_notes else "")
-            + (f"  Close Notes: {close_notes}\n" if close_notes else "")
-            + f"  Sys ID: {entry.get('sys_id', 'N/A')}"
+        return _format_entries([result], extra_fields)
+
+    return _format_entries(iter_results(response), extra_fields)
+
+
+async def _format_results_async(response, sys_id, extra_fields):
+    """Async variant of _format_results that decodes the body as it arrives."""
+    error = _check_response(response, sys_id)
+    if error:
+        return error
+
+    if sys_id:
+        result = response.json().get("result", {})
+        if not result:
+            return f"Incident not found with sys_id: {sys_id}"
+        return _format_entries([result], extra_fields)
+
+    return await render_entries_async(
+        aiter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+@across_instances
+def query_incidents(
+    number: str = "",
+    sys_id: str = "",
+    limit: int = 10,
+    minutes_ago: int = 1440,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """
+    Query incident records to get context about tickets involved in AI operations.
+
+    Use this when you need to look up incident details by number or sys_id,
+    especially when investigating AI Agent or Now Assist activity on specific incidents.
+
+    Args:
+        number: Incident number (e.g., INC0009005) - partial match supported
+        sys_id: Incident sys_id for exact lookup
+        limit: Maximum number of results (default 10)
+        minutes_ago: Look back this many minutes (default 1440 = 24 hours)
+        extra_fields: Comma-separated additional fields to fetch and display
+        bypass_cache: Skip the response cache and local mirror and always
+            query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
+
+    Returns:
+        Formatted string with incident details
+    """
+    replica = get_replica(instance)
+    if replica and not bypass_cache and replica.covers(TABLE):
+        results = _read_replica(replica, number, sys_id, limit, minutes_ago)
+        if results:
+            return _format_entries(results, extra_fields)
+        if not sys_id:
+            return EMPTY_MESSAGE
+        # A sys_id missing locally may have been created since the last sync
+
+    params = _build_params(number, sys_id, limit, minutes_ago, extra_fields)
+    response = get_client(instance).get_table(
+        TABLE, params, sys_id=sys_id, bypass_cache=bypass_cache
+    )
+    return _format_results(response, sys_id, extra_fields)
+
+
+@across_instances
+async def query_incidents_async(
+    number: str = "",
+    sys_id: str = "",
+    limit: int = 10,
+    minutes_ago: int = 1440,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_incidents for concurrent tool calls."""
+    replica = get_replica(instance)
+    if replica and not bypass_cache and replica.covers(TABLE):
+        results = await asyncio.to_thread(
+            _read_replica, replica, number, sys_id, limit, minutes_ago
         )
-    return "\n---\n".join(output)
+        if results:
+            return _format_entries(results, extra_fields)
+        if not sys_id:
+            return EMPTY_MESSAGE
+
+    params = _build_params(number, sys_id, limit, minutes_ago, extra_fields)
+    response = await get_async_client(instance).get_table(
+        TABLE, params, sys_id=sys_id, bypass_cache=bypass_cache
+    )
+    return await _format_results_async(response, sys_id, extra_fields)
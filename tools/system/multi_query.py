@@ -0,0 +1,152 @@
+"""
+Run several query tools in one batched round trip
+"""
+
+import inspect
+
+from ..ai import ai_agent_executions, now_assist_metadata, now_assist_metrics
+from ..client import get_async_client, get_client
+from ..fanout import across_instances
+from ..workflows import context, executing, history, logs
+from . import incidents, rest_messages, syslog
+
+# MCP tool name -> (tool module, name of its query function)
+TOOLS = {
+    "ai_agent_executions": (ai_agent_executions, "query_ai_agent_executions"),
+    "now_assist_metrics": (now_assist_metrics, "query_now_assist_metrics"),
+    "now_assist_metadata": (now_assist_metadata, "query_now_assist_metadata"),
+    "workflow_context": (context, "query_workflow_context"),
+    "workflow_executing": (executing, "query_workflow_executing"),
+    "workflow_history": (history, "query_workflow_history"),
+    "workflow_logs": (logs, "query_workflow_log"),
+    "syslog": (syslog, "query_syslog"),
+    "rest_messages": (rest_messages, "query_rest_messages"),
+    "incidents": (incidents, "query_incidents"),
+}
+
+
+def _pick(function, arguments):
+    """Select the arguments a helper accepts by parameter name."""
+    names = inspect.signature(function).parameters
+    return {name: value for name, value in arguments.items() if name in names}
+
+
+def _plan(query):
+    """
+    Resolve one {"tool": ..., "args": {...}} entry to a Table API read.
+
+    Returns:
+        (tool module, bound arguments, (table, params, sys_id))
+
+    Raises:
+        ValueError: If the tool or its arguments are not recognized
+    """
+    name = query.get("tool", "")
+    if name not in TOOLS:
+        raise ValueError(
+            f"Unknown tool {name!r}. Supported: {', '.join(sorted(TOOLS))}"
+        )
+    module, function_name = TOOLS[name]
+    try:
+        bound = inspect.signature(getattr(module, function_name)).bind(
+            **(query.get("args") or {})
+        )
+    except TypeError as e:
+        raise ValueError(f"Invalid arguments for {name}: {e}")
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    if arguments.pop("instance"):
+        raise ValueError("Set instance on multi_query itself, not per query")
+    params = module._build_params(**_pick(module._build_params, arguments))
+    return module, arguments, (module.TABLE, params, arguments.get("sys_id", ""))
+
+
+def _plan_all(queries):
+    """Plan every query, keeping an error message in place of bad entries."""
+    plans = []
+    for query in queries:
+        try:
+            plans.append(_plan(query))
+        except ValueError as e:
+            plans.append(f"Error: {e}")
+    return plans
+
+
+def _render(queries, outputs):
+    """Join per-query outputs under numbered headers."""
+    sections = []
+    for index, (query, output) in enumerate(zip(queries, outputs), 1):
+        sections.append(f"=== {index}. {query.get('tool', '?')} ===\n{output}")
+    return "\n\n".join(sections)
+
+
+@across_instances
+def query_multi(queries: list, instance: str = "") -> str:
+    """
+    Run several query tools and fetch all of their results in one batched
+    round trip.
+
+    Use this when you need several independent reads at once, e.g. the
+    context, executing, history and log entries of one workflow.
+
+    Args:
+        queries: List of {"tool": name, "args": {...}} entries, where name
+            is one of the query tools (syslog, incidents, workflow_logs, ...)
+            and args are that tool's parameters
+        instance: Named instance to query (default instance if empty), or
+            "all" to run every query on every configured instance
+
+    Returns:
+        Formatted string with one section per query, in order
+    """
+    if not queries:
+        return "No queries given."
+
+    plans = _plan_all(queries)
+    live = [plan for plan in plans if not isinstance(plan, str)]
+    bypass_cache = any(arguments["bypass_cache"] for _, arguments, _ in live)
+    responses = iter(
+        get_client(instance).get_tables([read for _, _, read in live], bypass_cache)
+    )
+
+    outputs = []
+    for plan in plans:
+        if isinstance(plan, str):
+            outputs.append(plan)
+            continue
+        module, arguments, _ = plan
+        outputs.append(
+            module._format_results(
+                next(responses), **_pick(module._format_results, arguments)
+            )
+        )
+    return _render(queries, outputs)
+
+
+@across_instances
+async def query_multi_async(queries: list, instance: str = "") -> str:
+    """Async variant of query_multi for concurrent tool calls."""
+    if not queries:
+        return "No queries given."
+
+    plans = _plan_all(queries)
+    live = [plan for plan in plans if not isinstance(plan, str)]
+    bypass_cache = any(arguments["bypass_cache"] for _, arguments, _ in live)
+    responses = iter(
+        await get_async_client(instance).get_tables(
+            [read for _, _, read in live], bypass_cache
+        )
+    )
+
+    outputs = []
+    for plan in plans:
+        if isinstance(plan, str):
+            outputs.append(plan)
+            continue
+        module, arguments, _ = plan
+        outputs.append(
+            await module._format_results_async(
+                next(responses), **_pick(module._format_results_async, arguments)
+            )
+        )
+    return _render(queries, outputs)
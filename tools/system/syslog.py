@@ -2,72 +2,467 @@
 Query ServiceNow application logs (syslog)
 """
 
-import os
+import asyncio
+import re
+import time
 
-import requests
+from ..client import ALL_INSTANCES, get_async_client, get_client
+from ..fanout import across_instances
+from ..pagination import next_cursor, page_params
+from ..projection import format_extra_fields, projection
+from ..replica import get_replica
+from ..streaming import (
+    aiter_results,
+    iter_results,
+    render_entries,
+    render_entries_async,
+)
 
+TABLE = "syslog"
 
+# Fields rendered by _format_entry
+FIELDS = [
+    "sys_created_on",
+    "level",
+    "source",
+    "message",
+]
+
+EMPTY_MESSAGE = "No syslog entries found matching your criteria."
+
+# Internal level values and their labels
+LEVELS = {"0": "Error", "1": "Warning", "2": "Info", "3": "Debug"}
+
+# Separates sys_created_on from sys_id in a follow cursor token
+CURSOR_SEPARATOR = "|"
+
+# Rows a follow call returns when they are not delivered through on_entries;
+# polling stops there and the cursor resumes after the last one
+FOLLOW_MAX_ROWS = 500
+
+# A "quoted phrase" or a bare term of a search query
+SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def _filters(message_contains, source, level):
+    """Encoded query clauses shared by query_syslog and follow mode."""
+    query_parts = []
+    if message_contains:
+        query_parts.append(f"messageLIKE{message_contains}")
+    if source:
+        query_parts.append(f"sourceLIKE{source}")
+    if level:
+        query_parts.append(f"level={level}")
+    return query_parts
+
+
+def _search_clauses(search):
+    """
+    Translate a search query into messageLIKE clauses for the instance.
+
+    Terms and phrases become substring matches, ANDed unless joined by OR;
+    NOT excludes the next term and a trailing * is dropped. There is no
+    ranking on the instance, so results stay newest first.
+    """
+    clauses = []
+    operator = "AND"
+    for phrase, term in SEARCH_TERM.findall(search):
+        if term in ("AND", "OR", "NOT"):
+            operator = term if operator != "NOT" else operator
+            continue
+        text = phrase or term.rstrip("*").strip("()")
+        if not text:
+            continue
+        if operator == "NOT":
+            clauses.append(f"messageNOT LIKE{text}")
+        elif operator == "OR" and clauses:
+            clauses.append(f"ORmessageLIKE{text}")
+        else:
+            clauses.append(f"messageLIKE{text}")
+        operator = "AND"
+    return clauses
+
+
+def _build_params(
+    message_contains, source, level, limit, minutes_ago, extra_fields, search=""
+):
+    """Build the Table API parameters for a query_syslog call."""
+    query_parts = _filters(message_contains, source, level)
+    query_parts.extend(_search_clauses(search))
+    query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
+    query = "^".join(query_parts)
+
+    params = {
+        "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
+        "sysparm_limit": limit,
+        "sysparm_fields": projection(FIELDS, extra_fields),
+        "sysparm_exclude_reference_link": "true",
+    }
+
+    return params
+
+
+def _read_replica(
+    replica, message_contains, source, level, limit, minutes_ago, search=""
+):
+    """Answer a query_syslog call from the local mirror."""
+    like = {}
+    if message_contains:
+        like["message"] = message_contains
+    if source:
+        like["source"] = source
+    return replica.read(
+        TABLE,
+        minutes_ago=minutes_ago,
+        like=like,
+        equals={"level": level} if level else None,
+        limit=limit,
+        display_value="false",
+        search=search or None,
+    )
+
+
+def _format_entry(entry, extra_fields):
+    """Render one syslog row."""
+    return (
+        f"[{entry.get('sys_created_on')}] "
+        f"{entry.get('level', 'N/A').upper()} | "
+        f"{entry.get('source', 'N/A')}"
+        + format_extra_fields(entry, extra_fields)
+        + f"\n{entry.get('message', 'No message')}\n"
+    )
+
+
+def _format_entries(entries, extra_fields):
+    """Render syslog rows as tool output."""
+    return render_entries(
+        entries,
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+def _format_results(response, extra_fields):
+    """Render a Table API response as tool output."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return _format_entries(iter_results(response), extra_fields)
+
+
+async def _format_results_async(response, extra_fields):
+    """Async variant of _format_results that decodes the body as it arrives."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return await render_entries_async(
+        aiter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+def _use_replica(replica, bypass_cache, minutes_ago, search=""):
+    """
+    Return True if the local mirror can answer a query: it covers the
+    window, and a search needs its full-text index (SQLite builds without
+    FTS5 fall back to the instance's messageLIKE clauses).
+    """
+    if not replica or bypass_cache or not replica.covers(TABLE, minutes_ago):
+        return False
+    return not search or replica.indexed(TABLE, "message")
+
+
+@across_instances
 def query_syslog(
     message_contains: str = "",
     source: str = "",
     level: str = "",
     limit: int = 20,
     minutes_ago: int = 60,
+    extra_fields: str = "",
+    search: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
 ) -> str:
     """
     Query the ServiceNow syslog table for application logs.
 
+    When the local mirror covers the window, message filters are answered
+    from its full-text index instead of a substring scan on the instance.
+
     Args:
         message_contains: Filter by message content (partial match)
         source: Filter by log source (partial match)
         level: Filter by log level (0=Error, 1=Warning, 2=Info, 3=Debug)
         limit: Maximum number of results (default 20)
         minutes_ago: Look back this many minutes (default 60)
+        extra_fields: Comma-separated additional fields to fetch and display
+        search: Full-text query over messages: terms, "phrases", OR, NOT;
+            best matches first when answered from the local mirror
+        bypass_cache: Skip the response cache and local mirror and always
+            query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
 
     Returns:
         Formatted string with syslog entries
     """
-    INSTANCE = os.getenv("SERVICENOW_INSTANCE")
-    USERNAME = os.getenv("SERVICENOW_USERNAME")
-    PASSWORD = os.getenv("SERVICENOW_PASSWORD")
+    replica = get_replica(instance)
+    if _use_replica(replica, bypass_cache, minutes_ago, search):
+        try:
+            results = _read_replica(
+                replica, message_contains, source, level, limit, minutes_ago, search
+            )
+        except ValueError as e:
+            return f"Error: {e}"
+        return _format_entries(results, extra_fields)
 
-    query_parts = []
-    if message_contains:
-        query_parts.append(f"messageLIKE{message_contains}")
-    if source:
-        query_parts.append(f"sourceLIKE{source}")
-    if level:
-        query_parts.append(f"level={level}")
-    query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
-    query = "^".join(query_parts)
+    params = _build_params(
+        message_contains, source, level, limit, minutes_ago, extra_fields, search
+    )
+    response = get_client(instance).get_table(TABLE, params, bypass_cache=bypass_cache)
+    return _format_results(response, extra_fields)
 
-    url = f"{INSTANCE}/api/now/table/syslog"
-    params = {
-        "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
-        "sysparm_limit": limit,
-        "sysparm_fields": "sys_created_on,level,source,message",
-    }
 
-    response = requests.get(
-        url,
-        params=params,
-        auth=(USERNAME, PASSWORD),
-        headers={"Accept": "application/json"},
+@across_instances
+async def query_syslog_async(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    limit: int = 20,
+    minutes_ago: int = 60,
+    extra_fields: str = "",
+    search: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_syslog for concurrent tool calls."""
+    replica = get_replica(instance)
+    if _use_replica(replica, bypass_cache, minutes_ago, search):
+        try:
+            results = await asyncio.to_thread(
+                _read_replica,
+                replica,
+                message_contains,
+                source,
+                level,
+                limit,
+                minutes_ago,
+                search,
+            )
+        except ValueError as e:
+            return f"Error: {e}"
+        return _format_entries(results, extra_fields)
+
+    params = _build_params(
+        message_contains, source, level, limit, minutes_ago, extra_fields, search
     )
+    response = await get_async_client(instance).get_table(
+        TABLE, params, bypass_cache=bypass_cache
+    )
+    return await _format_results_async(response, extra_fields)
 
-    if response.status_code != 200:
-        return f"Error: {response.status_code} - {response.text}"
 
-    results = response.json().get("result", [])
-    if not results:
-        return "No syslog entries found matching your criteria."
-
-    output = []
-    for entry in results:
-        output.append(
-            f"[{entry.get('sys_created_on')}] "
-            f"{entry.get('level', 'N/A').upper()} | "
-            f"{entry.get('source', 'N/A')}\n"
-            f"{entry.get('message', 'No message')}\n"
+def _parse_cursor(cursor):
+    """Split a follow cursor token into (sys_created_on, sys_id), or None."""
+    if not cursor:
+        return None
+    created, separator, sys_id = cursor.partition(CURSOR_SEPARATOR)
+    if not separator or not created or not sys_id:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return created, sys_id
+
+
+def _follow_params(
+    message_contains, source, level, minutes_ago, cursor, limit, extra_fields
+):
+    """
+    Build parameters for one follow poll: the rows after cursor, oldest first.
+
+    Without a cursor the poll starts minutes_ago back.
+    """
+    query_parts = _filters(message_contains, source, level)
+    if not cursor:
+        query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
+    params = page_params(
+        "^".join(query_parts),
+        projection(FIELDS, extra_fields).split(","),
+        "false",
+        limit,
+        cursor,
+    )
+    params["sysparm_exclude_reference_link"] = "true"
+    return params
+
+
+def _follow_output(entries, delivered, cursor, extra_fields):
+    """
+    Render followed rows and the cursor to resume from.
+
+    Rows already delivered through on_entries are only counted.
+    """
+    token = CURSOR_SEPARATOR.join(cursor) if cursor else ""
+    if delivered:
+        return f"{delivered:,} new syslog entries delivered.\nCursor: {token}"
+    if not entries:
+        return f"No new syslog entries.\nCursor: {token}"
+    output = _format_entries(entries, extra_fields)
+    if len(entries) >= FOLLOW_MAX_ROWS:
+        output += (
+            f"\nStopped at {FOLLOW_MAX_ROWS} entries; pass the cursor to continue."
+        )
+    return f"{output}\nCursor: {token}"
+
+
+def _follow_limit(limit, entries, on_entries):
+    """Rows to ask for in the next poll, or 0 once the row cap is reached."""
+    if on_entries:
+        return limit
+    return min(limit, FOLLOW_MAX_ROWS - len(entries))
+
+
+def _check_follow(instance, cursor):
+    """Validate follow arguments, returning the parsed cursor."""
+    if instance == ALL_INSTANCES:
+        raise ValueError("Follow mode reads one instance at a time")
+    return _parse_cursor(cursor)
+
+
+def follow_syslog(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    cursor: str = "",
+    minutes_ago: int = 5,
+    follow_seconds: int = 30,
+    poll_seconds: int = 5,
+    limit: int = 100,
+    extra_fields: str = "",
+    instance: str = "",
+    on_entries=None,
+) -> str:
+    """
+    Follow the syslog table: poll for rows newer than a cursor.
+
+    Each poll asks only for rows after the (sys_created_on, sys_id) cursor,
+    so nothing is downloaded twice. Pass the returned cursor back in to
+    continue where the previous call stopped.
+
+    Args:
+        message_contains: Filter by message content (partial match)
+        source: Filter by log source (partial match)
+        level: Filter by log level (0=Error, 1=Warning, 2=Info, 3=Debug)
+        cursor: Cursor returned by a previous call; empty to start
+            minutes_ago back
+        minutes_ago: Where to start without a cursor (default 5)
+        follow_seconds: Keep polling this long (0 = a single poll)
+        poll_seconds: Wait between polls when caught up
+        limit: Maximum rows per poll
+        extra_fields: Comma-separated additional fields to fetch and display
+        instance: Named instance to follow (default instance if empty)
+        on_entries: Optional callable(rendered entries, total delivered)
+            called as new rows arrive; the result then only counts them.
+            Without it, polling stops after FOLLOW_MAX_ROWS rows.
+
+    Returns:
+        Formatted string with the new entries (or their count) and the
+        cursor to resume from
+    """
+    try:
+        position = _check_follow(instance, cursor)
+        client = get_client(instance)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    deadline = time.monotonic() + follow_seconds
+    entries = []
+    delivered = 0
+    while True:
+        rows_wanted = _follow_limit(limit, entries, on_entries)
+        params = _follow_params(
+            message_contains,
+            source,
+            level,
+            minutes_ago,
+            position,
+            rows_wanted,
+            extra_fields,
+        )
+        response = client.get_table(TABLE, params, bypass_cache=True)
+        if response.status_code != 200:
+            return f"Error: {response.status_code} - {response.text}"
+
+        rows = list(iter_results(response))
+        if rows:
+            position = next_cursor(rows[-1])
+            if on_entries:
+                delivered += len(rows)
+                on_entries(_format_entries(rows, extra_fields), delivered)
+            else:
+                entries.extend(rows)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not _follow_limit(limit, entries, on_entries):
+            break
+        if len(rows) < rows_wanted:
+            time.sleep(min(poll_seconds, remaining))
+
+    return _follow_output(entries, delivered, position, extra_fields)
+
+
+async def follow_syslog_async(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    cursor: str = "",
+    minutes_ago: int = 5,
+    follow_seconds: int = 30,
+    poll_seconds: int = 5,
+    limit: int = 100,
+    extra_fields: str = "",
+    instance: str = "",
+    on_entries=None,
+) -> str:
+    """Async variant of follow_syslog; on_entries is a coroutine function."""
+    try:
+        position = _check_follow(instance, cursor)
+        client = get_async_client(instance)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + follow_seconds
+    entries = []
+    delivered = 0
+    while True:
+        rows_wanted = _follow_limit(limit, entries, on_entries)
+        params = _follow_params(
+            message_contains,
+            source,
+            level,
+            minutes_ago,
+            position,
+            rows_wanted,
+            extra_fields,
         )
-    return "\n---\n".join(output)
+        response = await client.get_table(TABLE, params, bypass_cache=True)
+        if response.status_code != 200:
+            return f"Error: {response.status_code} - {response.text}"
+
+        rows = [row async for row in aiter_results(response)]
+        if rows:
+            position = next_cursor(rows[-1])
+            if on_entries:
+                delivered += len(rows)
+                await on_entries(_format_entries(rows, extra_fields), delivered)
+            else:
+                entries.extend(rows)
+
+        remaining = deadline - loop.time()
+        if remaining <= 0 or not _follow_limit(limit, entries, on_entries):
+            break
+        if len(rows) < rows_wanted:
+            await asyncio.sleep(min(poll_seconds, remaining))
+
+    return _follow_output(entries, delivered, position, extra_fields)
@@ -0,0 +1,281 @@
+"""
+Count ServiceNow application logs (syslog) per time bucket, level and source
+"""
+
+import asyncio
+import math
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from ..aggregate import parse_stats, stats_params
+from ..client import ServiceNowAPIError, get_async_client, get_client
+from ..fanout import across_instances
+from ..pagination import MAX_WORKERS
+from ..timestamps import format_datetime
+from .syslog import EMPTY_MESSAGE, LEVELS, TABLE, _filters
+
+# Bucket widths in minutes tried by the automatic choice, smallest first
+BUCKET_MINUTES = (1, 5, 10, 15, 30, 60, 120, 180, 360, 720, 1440)
+
+# Most buckets (one stats request each) a histogram may have
+MAX_BUCKETS = 48
+
+# Sources named per bucket row
+BUCKET_SOURCES = 3
+
+ERROR_LEVEL = "0"
+
+
+def _spanned(minutes_ago, width):
+    """Most aligned buckets a window can overlap (one more when unaligned)."""
+    return math.ceil(minutes_ago / width) + 1
+
+
+def _bucket_width(minutes_ago, bucket_minutes):
+    """
+    Return the bucket width in minutes.
+
+    Raises:
+        ValueError: If the window or an explicit width needs too many buckets
+    """
+    if minutes_ago <= 0:
+        raise ValueError("minutes_ago must be positive")
+    if bucket_minutes:
+        if _spanned(minutes_ago, bucket_minutes) > MAX_BUCKETS:
+            raise ValueError(
+                f"{bucket_minutes}-minute buckets over {minutes_ago} minutes "
+                f"exceed {MAX_BUCKETS} buckets; use wider buckets"
+            )
+        return bucket_minutes
+    for width in BUCKET_MINUTES:
+        if _spanned(minutes_ago, width) <= MAX_BUCKETS:
+            return width
+    raise ValueError(
+        f"minutes_ago is limited to {BUCKET_MINUTES[-1] * (MAX_BUCKETS - 1)} "
+        "with automatic buckets"
+    )
+
+
+def _bucket_edges(minutes_ago, width, now=None):
+    """
+    UTC bucket boundaries covering the window, aligned to the bucket width.
+
+    Aligned edges give each bucket the same query on every call, so repeated
+    calls within the syslog cache TTL are answered from the response cache.
+    """
+    seconds = width * 60
+    now = now or time.time()
+    end = math.ceil(now / seconds) * seconds
+    count = math.ceil(minutes_ago / width)
+    if end - count * seconds > now - minutes_ago * 60:
+        count += 1  # The end was rounded up past the window's own length
+    return [
+        format_datetime(datetime.fromtimestamp(end - i * seconds, timezone.utc))
+        for i in range(count, -1, -1)
+    ]
+
+
+def _bucket_params(message_contains, source, level, start, end):
+    """Stats API parameters for one bucket, grouped by level and source."""
+    query_parts = _filters(message_contains, source, level)
+    query_parts.append(f"sys_created_on>={start}")
+    query_parts.append(f"sys_created_on<{end}")
+    return stats_params(
+        query="^".join(query_parts),
+        group_by=["level", "source"],
+        display_value="false",
+    )
+
+
+def _requests(message_contains, source, level, minutes_ago, bucket_minutes):
+    """Return (bucket width, bucket starts, stats parameters per bucket)."""
+    width = _bucket_width(minutes_ago, bucket_minutes)
+    edges = _bucket_edges(minutes_ago, width)
+    params = [
+        _bucket_params(message_contains, source, level, start, end)
+        for start, end in zip(edges, edges[1:])
+    ]
+    return width, edges, params
+
+
+def _counts(responses):
+    """
+    Collect stats responses into per-bucket Counters.
+
+    Returns:
+        list of Counter {(level, source): count}
+
+    Raises:
+        ServiceNowAPIError: If any bucket request failed
+    """
+    buckets = []
+    for response in responses:
+        if response.status_code != 200:
+            raise ServiceNowAPIError(response)
+        buckets.append(
+            Counter(
+                {
+                    (group[0], group[1] or "N/A"): stats["count"]
+                    for group, stats in parse_stats(response.json(), "false")
+                    if stats["count"]
+                }
+            )
+        )
+    return buckets
+
+
+def _level_order(level):
+    return (0, int(level)) if level.isdigit() else (1, level)
+
+
+def _row(label, by_level, levels, extra=""):
+    cells = "".join(f"{by_level.get(level, 0):>9,}" for level in levels)
+    return f"{label:<22}{sum(by_level.values()):>9,}{cells}{extra}\n"
+
+
+def _top(counter, limit):
+    common = counter.most_common(limit)
+    text = ", ".join(f"{name} ({count:,})" for name, count in common)
+    rest = len(counter) - len(common)
+    return text + (f", +{rest} more" if rest > 0 else "")
+
+
+def _format_histogram(buckets, edges, width, top_sources):
+    """Render bucket x level counts, top sources per bucket and per window."""
+    total = sum(buckets, Counter())
+    if not total:
+        return EMPTY_MESSAGE
+
+    levels = sorted({level for level, _ in total}, key=_level_order)
+    by_level = defaultdict(int)
+    by_source = defaultdict(lambda: defaultdict(int))
+    for (level, source), count in total.items():
+        by_level[level] += count
+        by_source[source][level] += count
+
+    output = (
+        f"Syslog histogram: {edges[0]} to {edges[-1]} UTC, "
+        f"{width}-minute buckets\n"
+        f"Entries: {sum(by_level.values()):,} ("
+        + ", ".join(
+            f"{LEVELS.get(level, level)} {by_level[level]:,}" for level in levels
+        )
+        + ")\n"
+    )
+    first_error = next(
+        (
+            start
+            for start, counts in zip(edges, buckets)
+            if any(level == ERROR_LEVEL for level, _ in counts)
+        ),
+        None,
+    )
+    if first_error:
+        output += f"First errors in the bucket starting {first_error}\n"
+
+    header = "".join(f"{LEVELS.get(level, level):>9}" for level in levels)
+    output += f"\n{'Bucket (UTC)':<22}{'Total':>9}{header}   Top sources\n"
+    for start, counts in zip(edges, buckets):
+        bucket_levels = defaultdict(int)
+        bucket_sources = Counter()
+        for (level, source), count in counts.items():
+            bucket_levels[level] += count
+            bucket_sources[source] += count
+        output += _row(
+            start, bucket_levels, levels, f"   {_top(bucket_sources, BUCKET_SOURCES)}"
+        )
+
+    sources = sorted(by_source, key=lambda source: -sum(by_source[source].values()))
+    output += f"\n{'Source':<22}{'Total':>9}{header}\n"
+    for source in sources[:top_sources]:
+        output += _row(source[:21], by_source[source], levels)
+    if len(sources) > top_sources:
+        output += f"... {len(sources) - top_sources} more sources\n"
+    return output
+
+
+@across_instances
+def query_syslog_histogram(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    minutes_ago: int = 60,
+    bucket_minutes: int = 0,
+    top_sources: int = 10,
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """
+    Count syslog entries per time bucket, level and source.
+
+    Uses one grouped stats API request per bucket, so no individual log rows
+    are transferred and the whole window is covered regardless of volume.
+
+    Args:
+        message_contains: Filter by message content (partial match)
+        source: Filter by log source (partial match)
+        level: Filter by log level (0=Error, 1=Warning, 2=Info, 3=Debug)
+        minutes_ago: Look back this many minutes (default 60)
+        bucket_minutes: Bucket width in minutes (0 = choose one that gives
+            at most MAX_BUCKETS buckets)
+        top_sources: Number of sources listed for the whole window
+        bypass_cache: Skip the response cache and always query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
+
+    Returns:
+        Formatted string with counts per bucket and level, and per source
+    """
+    try:
+        width, edges, params = _requests(
+            message_contains, source, level, minutes_ago, bucket_minutes
+        )
+    except ValueError as e:
+        return f"Error: {e}"
+
+    client = get_client(instance)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        responses = list(
+            pool.map(
+                lambda bucket: client.get_stats(TABLE, bucket, bypass_cache), params
+            )
+        )
+
+    try:
+        buckets = _counts(responses)
+    except ServiceNowAPIError as e:
+        return f"Error: {e.status_code} - {e.text}"
+    return _format_histogram(buckets, edges, width, top_sources)
+
+
+@across_instances
+async def query_syslog_histogram_async(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    minutes_ago: int = 60,
+    bucket_minutes: int = 0,
+    top_sources: int = 10,
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_syslog_histogram; requests all buckets concurrently."""
+    try:
+        width, edges, params = _requests(
+            message_contains, source, level, minutes_ago, bucket_minutes
+        )
+    except ValueError as e:
+        return f"Error: {e}"
+
+    client = get_async_client(instance)
+    responses = await asyncio.gather(
+        *(client.get_stats(TABLE, bucket, bypass_cache) for bucket in params)
+    )
+
+    try:
+        buckets = _counts(responses)
+    except ServiceNowAPIError as e:
+        return f"Error: {e.status_code} - {e.text}"
+    return _format_histogram(buckets, edges, width, top_sources)
@@ -0,0 +1,225 @@
+"""
+Summarize ServiceNow application logs (syslog) by message template
+"""
+
+import asyncio
+from collections import Counter
+
+from ..client import ServiceNowAPIError, get_async_client, get_client
+from ..fanout import across_instances
+from ..replica import get_replica
+from ..templates import TemplateMiner
+from .syslog import EMPTY_MESSAGE, LEVELS, TABLE, _filters, _read_replica
+
+FIELDS = [
+    "sys_created_on",
+    "level",
+    "source",
+    "message",
+]
+
+# Sources listed per template before the rest are counted
+TOP_SOURCES = 3
+
+# Characters of the sample message shown per template
+SAMPLE_LENGTH = 300
+
+
+class TemplateStats:
+    """First/last seen, sources, levels and a sample for one template."""
+
+    __slots__ = ("first_seen", "last_seen", "sources", "levels", "sample")
+
+    def __init__(self, entry):
+        self.first_seen = self.last_seen = entry.get("sys_created_on") or ""
+        self.sources = Counter()
+        self.levels = Counter()
+        self.sample = (entry.get("message") or "")[:SAMPLE_LENGTH]
+
+    def add(self, entry):
+        created = entry.get("sys_created_on") or ""
+        if created:
+            self.first_seen = min(filter(None, (self.first_seen, created)))
+            self.last_seen = max(self.last_seen, created)
+        self.sources[entry.get("source") or "N/A"] += 1
+        self.levels[entry.get("level") or "N/A"] += 1
+
+
+class TemplateSummary:
+    """Streaming template miner plus per-template stats for syslog rows."""
+
+    def __init__(self):
+        self.miner = TemplateMiner()
+        self.stats = {}  # cluster_id -> TemplateStats
+        self.entries = 0
+
+    def add(self, entry):
+        cluster = self.miner.add(entry.get("message"))
+        if cluster.cluster_id not in self.stats:
+            self.stats[cluster.cluster_id] = TemplateStats(entry)
+        self.stats[cluster.cluster_id].add(entry)
+        self.entries += 1
+
+
+def _mine_replica(replica, message_contains, source, level, max_rows, minutes_ago):
+    """Read the newest max_rows entries from the local mirror and mine them."""
+    summary = TemplateSummary()
+    for entry in _read_replica(
+        replica, message_contains, source, level, max_rows, minutes_ago
+    ):
+        summary.add(entry)
+    return summary
+
+
+def _query(message_contains, source, level, minutes_ago):
+    """Encoded query for the scanned window."""
+    query_parts = _filters(message_contains, source, level)
+    query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
+    return "^".join(query_parts)
+
+
+def _counts(counter, names=None, top=None):
+    """Render 'name (count), ...' from the most common entries."""
+    common = counter.most_common(top)
+    text = ", ".join(
+        f"{(names or {}).get(key, key)} ({count:,})" for key, count in common
+    )
+    rest = len(counter) - len(common)
+    return text + (f", +{rest} more" if rest > 0 else "")
+
+
+def _format_summary(summary, minutes_ago, max_rows, top):
+    """Render the most frequent templates as bounded tool output."""
+    if not summary.entries:
+        return EMPTY_MESSAGE
+
+    clusters = sorted(summary.miner.clusters, key=lambda cluster: -cluster.count)
+    output = (
+        f"Syslog templates (last {minutes_ago} minutes): "
+        f"{summary.entries:,} entries in {len(clusters):,} templates\n"
+    )
+    if summary.entries >= max_rows:
+        output += (
+            f"Scan stopped at max_rows={max_rows:,} (newest entries kept); "
+            "narrow minutes_ago or the filters to cover the whole window\n"
+        )
+    if len(clusters) > top:
+        output += f"Showing the top {top} by count\n"
+
+    for rank, cluster in enumerate(clusters[:top], 1):
+        stats = summary.stats[cluster.cluster_id]
+        output += (
+            f"\n{rank}. {cluster.count:,}x  {cluster.template}\n"
+            f"   Seen: {stats.first_seen} -> {stats.last_seen}\n"
+            f"   Levels: {_counts(stats.levels, LEVELS)}\n"
+            f"   Sources: {_counts(stats.sources, top=TOP_SOURCES)}\n"
+            f"   Sample: {stats.sample}\n"
+        )
+    return output
+
+
+@across_instances
+def query_syslog_templates(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    minutes_ago: int = 60,
+    max_rows: int = 50000,
+    top: int = 20,
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """
+    Summarize syslog entries by message template.
+
+    Entries are streamed page by page, newest first, and clustered by
+    template as they arrive, so tens of thousands of lines reduce to one
+    entry per template with its count, first and last seen, levels, sources
+    and a sample. When max_rows stops the scan, the newest entries are the
+    ones summarized, whether they come from the instance or the mirror.
+
+    Args:
+        message_contains: Filter by message content (partial match)
+        source: Filter by log source (partial match)
+        level: Filter by log level (0=Error, 1=Warning, 2=Info, 3=Debug)
+        minutes_ago: Look back this many minutes (default 60)
+        max_rows: Maximum entries to scan (default 50000)
+        top: Number of templates to show, most frequent first (default 20)
+        bypass_cache: Skip the local mirror and always query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
+
+    Returns:
+        Formatted string with one entry per template
+    """
+    replica = get_replica(instance)
+    if replica and not bypass_cache and replica.covers(TABLE, minutes_ago):
+        summary = _mine_replica(
+            replica, message_contains, source, level, max_rows, minutes_ago
+        )
+        return _format_summary(summary, minutes_ago, max_rows, top)
+
+    summary = TemplateSummary()
+    entries = get_client(instance).iter_table(
+        TABLE,
+        _query(message_contains, source, level, minutes_ago),
+        FIELDS,
+        display_value="false",
+        descending=True,
+    )
+    try:
+        for entry in entries:
+            summary.add(entry)
+            if summary.entries >= max_rows:
+                break
+    except ServiceNowAPIError as e:
+        return f"Error: {e.status_code} - {e.text}"
+
+    return _format_summary(summary, minutes_ago, max_rows, top)
+
+
+@across_instances
+async def query_syslog_templates_async(
+    message_contains: str = "",
+    source: str = "",
+    level: str = "",
+    minutes_ago: int = 60,
+    max_rows: int = 50000,
+    top: int = 20,
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_syslog_templates for concurrent tool calls."""
+    replica = get_replica(instance)
+    if replica and not bypass_cache and replica.covers(TABLE, minutes_ago):
+        # Mining is CPU-bound too, so it runs off the event loop with the read
+        summary = await asyncio.to_thread(
+            _mine_replica,
+            replica,
+            message_contains,
+            source,
+            level,
+            max_rows,
+            minutes_ago,
+        )
+        return _format_summary(summary, minutes_ago, max_rows, top)
+
+    summary = TemplateSummary()
+    entries = get_async_client(instance).iter_table(
+        TABLE,
+        _query(message_contains, source, level, minutes_ago),
+        FIELDS,
+        display_value="false",
+        descending=True,
+    )
+    try:
+        async for entry in entries:
+            summary.add(entry)
+            if summary.entries >= max_rows:
+                break
+    except ServiceNowAPIError as e:
+        return f"Error: {e.status_code} - {e.text}"
+    finally:
+        await entries.aclose()
+
+    return _format_summary(summary, minutes_ago, max_rows, top)
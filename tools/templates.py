@@ -0,0 +1,151 @@
+"""
+Online log template mining (Drain)
+
+Messages are clustered by template as they stream in, so a large log window
+can be summarized in memory proportional to the number of distinct templates
+rather than the number of lines. Each message is split into tokens, obvious
+variables (numbers, hex values, sys_ids) are masked, and a fixed-depth parse
+tree keyed by token count and leading tokens narrows it to a few candidate
+clusters. The message joins the most similar candidate above SIMILARITY,
+whose template then has differing tokens replaced by WILDCARD; otherwise it
+starts a new cluster.
+
+See He et al., "Drain: An Online Log Parsing Approach with Fixed Depth Tree".
+"""
+
+import re
+
+WILDCARD = "<*>"
+
+# Leading tokens used to route a message (tree depth minus the length level)
+PREFIX_TOKENS = 2
+
+# Minimum fraction of matching tokens for a message to join a cluster
+SIMILARITY = 0.4
+
+# Children per tree node before new tokens are routed to the wildcard child
+MAX_CHILDREN = 100
+
+# Tokens beyond this are folded into the last one so stack traces and
+# payload dumps do not each get their own length level
+MAX_TOKENS = 64
+
+# Tokens that are variables on their own: integers, decimals, times, hex,
+# sys_ids and GUIDs
+VARIABLE = re.compile(
+    r"[-+]?\d+(?:[.:,/]\d+)*[a-z%]{0,3}"
+    r"|0x[0-9a-f]+"
+    r"|[0-9a-f]{32}"
+    r"|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
+    re.IGNORECASE,
+)
+
+# Punctuation around a token that does not stop it being a variable
+ENCLOSING = "()[]{}<>,;:.'\"="
+
+
+def _mask(token):
+    """Replace a variable token with WILDCARD, keeping enclosing punctuation."""
+    core = token.strip(ENCLOSING)
+    if core and VARIABLE.fullmatch(core):
+        return token.replace(core, WILDCARD, 1)
+    return token
+
+
+def tokenize(message):
+    """Split a message into tokens with variables masked."""
+    tokens = (message or "").split()
+    if len(tokens) > MAX_TOKENS:
+        tokens = tokens[: MAX_TOKENS - 1] + [WILDCARD]
+    return [_mask(token) for token in tokens]
+
+
+class Cluster:
+    """One log template and the number of messages that matched it."""
+
+    __slots__ = ("cluster_id", "tokens", "count")
+
+    def __init__(self, cluster_id, tokens):
+        self.cluster_id = cluster_id
+        self.tokens = list(tokens)
+        self.count = 0
+
+    @property
+    def template(self):
+        return " ".join(self.tokens)
+
+    def similarity(self, tokens):
+        """Return (fraction of equal tokens, wildcard count) against a message."""
+        same = wildcards = 0
+        for template_token, token in zip(self.tokens, tokens):
+            if template_token == WILDCARD:
+                wildcards += 1
+            elif template_token == token:
+                same += 1
+        return same / len(tokens), wildcards
+
+    def merge(self, tokens):
+        """Replace template tokens that differ from the message with WILDCARD."""
+        for index, (template_token, token) in enumerate(zip(self.tokens, tokens)):
+            if template_token != token:
+                self.tokens[index] = WILDCARD
+
+
+class TemplateMiner:
+    """
+    Streaming Drain parse tree.
+
+    Feed messages with add(); read the clusters back from clusters.
+    """
+
+    def __init__(
+        self,
+        prefix_tokens=PREFIX_TOKENS,
+        similarity=SIMILARITY,
+        max_children=MAX_CHILDREN,
+    ):
+        self.prefix_tokens = prefix_tokens
+        self.threshold = similarity
+        self.max_children = max_children
+        self.root = {}  # token count -> nested {token: ...} -> [Cluster]
+        self.clusters = []
+
+    def _leaf(self, tokens):
+        """Return the candidate cluster list for a message, creating the path."""
+        node = self.root.setdefault(len(tokens), {})
+        depth = min(self.prefix_tokens, len(tokens))
+        for level, token in enumerate(tokens[:depth]):
+            last = level == depth - 1
+            # Tokens with digits are usually variables the mask missed
+            if any(character.isdigit() for character in token):
+                token = WILDCARD
+            if token not in node and len(node) >= self.max_children:
+                token = WILDCARD
+            node = node.setdefault(token, [] if last else {})
+        return node if depth else node.setdefault(WILDCARD, [])
+
+    def add(self, message):
+        """
+        Cluster one message.
+
+        Returns:
+            The Cluster the message was added to
+        """
+        tokens = tokenize(message)
+        candidates = self._leaf(tokens)
+
+        best, best_score = None, (-1.0, -1)
+        for cluster in candidates:
+            score = cluster.similarity(tokens) if tokens else (1.0, 0)
+            if score > best_score:
+                best, best_score = cluster, score
+
+        if best is not None and best_score[0] >= self.threshold:
+            best.merge(tokens)
+        else:
+            best = Cluster(len(self.clusters), tokens)
+            candidates.append(best)
+            self.clusters.append(best)
+
+        best.count += 1
+        return best
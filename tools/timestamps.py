@@ -0,0 +1,133 @@
+"""
+Parsing of ServiceNow date/time fields
+
+Internal date/time values (sysparm_display_value=false, or the "value" half
+of display_value=all) are UTC strings in one fixed format,
+"YYYY-MM-DD HH:MM:SS". Display values use the same format by default but are
+in the integration user's timezone; set SERVICENOW_TIMEZONE to that zone
+(e.g. America/New_York) so display values are converted to UTC. Prefer
+internal values where a record carries both.
+
+Bulk columns are parsed with one numpy.datetime64 conversion. Single values
+are parsed by fixed-position slicing rather than strptime and memoized,
+since many records share timestamps.
+"""
+
+import functools
+import os
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Timezone of display values; empty when it is UTC or unknown
+DISPLAY_TIMEZONE = os.getenv("SERVICENOW_TIMEZONE", "")
+
+
+@functools.lru_cache(maxsize=1)
+def _display_zone():
+    return ZoneInfo(DISPLAY_TIMEZONE) if DISPLAY_TIMEZONE else None
+
+
+def format_datetime(moment):
+    """Format a UTC datetime as an internal ServiceNow value."""
+    return moment.strftime(DATETIME_FORMAT)
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_datetime(value, display=False):
+    """
+    Parse one date/time value.
+
+    Args:
+        value: "YYYY-MM-DD HH:MM:SS" string
+        display: True if the value is a display value (see SERVICENOW_TIMEZONE)
+
+    Returns:
+        naive UTC datetime, or None if the value is empty or not in the format
+    """
+    if (
+        not isinstance(value, str)
+        or len(value) != 19
+        or value[4] != "-"
+        or value[7] != "-"
+        or value[10] != " "
+        or value[13] != ":"
+        or value[16] != ":"
+    ):
+        return None
+    try:
+        moment = datetime(
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            int(value[17:19]),
+        )
+    except ValueError:
+        return None
+
+    zone = _display_zone() if display else None
+    if zone:
+        moment = moment.replace(tzinfo=zone).astimezone(timezone.utc)
+        moment = moment.replace(tzinfo=None)
+    return moment
+
+
+def _utc_offsets(moments, zone):
+    """UTC offset in seconds of each local datetime64[s], one lookup per hour."""
+    hours, inverse = np.unique(moments.astype("datetime64[h]"), return_inverse=True)
+    offsets = np.array(
+        [
+            (
+                0
+                if np.isnat(hour)
+                else zone.utcoffset(hour.astype(datetime)).total_seconds()
+            )
+            for hour in hours
+        ],
+        dtype=np.int64,
+    )
+    return offsets[inverse]
+
+
+def parse_column(values, display=False):
+    """
+    Parse a column of date/time values in one vectorized conversion.
+
+    Args:
+        values: Sequence of "YYYY-MM-DD HH:MM:SS" strings
+        display: True if these are display values (see SERVICENOW_TIMEZONE)
+
+    Returns:
+        datetime64[s] array in UTC, NaT where a value is empty or invalid
+    """
+    values = [value or "" for value in values]
+    try:
+        moments = np.array(values, dtype="datetime64[s]")
+    except ValueError:
+        # Some value is not in the format; fall back to per-value parsing
+        moments = np.array(
+            [parse_datetime(value) or "NaT" for value in values],
+            dtype="datetime64[s]",
+        )
+
+    zone = _display_zone() if display else None
+    if zone and len(moments):
+        moments = moments - _utc_offsets(moments, zone).astype("timedelta64[s]")
+    return moments
+
+
+def hours_between(start, end):
+    """
+    Elapsed hours between two datetime64 columns.
+
+    Returns:
+        float array, NaN where either side is NaT
+    """
+    seconds = (end - start).astype("timedelta64[s]")
+    hours = seconds.astype(np.int64) / 3600
+    return np.where(np.isnat(seconds), np.nan, hours)
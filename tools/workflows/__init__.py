@@ -2,14 +2,18 @@
 Workflow debugging tools for ServiceNow
 """
 
-from .context import query_workflow_context
-from .executing import query_workflow_executing
-from .history import query_workflow_history
-from .logs import query_workflow_log
+from .context import query_workflow_context, query_workflow_context_async
+from .executing import query_workflow_executing, query_workflow_executing_async
+from .history import query_workflow_history, query_workflow_history_async
+from .logs import query_workflow_log, query_workflow_log_async
 
 __all__ = [
     "query_workflow_context",
+    "query_workflow_context_async",
     "query_workflow_executing",
+    "query_workflow_executing_async",
     "query_workflow_history",
+    "query_workflow_history_async",
     "query_workflow_log",
+    "query_workflow_log_async",
 ]
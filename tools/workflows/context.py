@@ -2,60 +2,119 @@
 Query workflow contexts to see workflow executions
 """
 
-import os
+from ..client import get_async_client, get_client
+from ..fanout import across_instances
+from ..projection import format_extra_fields, projection
+from ..streaming import (
+    aiter_results,
+    iter_results,
+    render_entries,
+    render_entries_async,
+)
 
-import requests
+TABLE = "wf_context"
 
+# Fields rendered by _format_entry
+FIELDS = [
+    "sys_created_on",
+    "workflow",
+    "state",
+    "sys_id",
+]
 
-def query_workflow_context(
-    limit: int = 20,
-    minutes_ago: int = 60,
-) -> str:
-    """
-    Query classic workflow contexts to see workflow executions.
+EMPTY_MESSAGE = "No workflow contexts found matching your criteria."
 
-    Args:
-        limit: Maximum number of results (default 20)
-        minutes_ago: Look back this many minutes (default 60)
-
-    Returns:
-        Formatted string with workflow context details
-    """
-    INSTANCE = os.getenv("SERVICENOW_INSTANCE")
-    USERNAME = os.getenv("SERVICENOW_USERNAME")
-    PASSWORD = os.getenv("SERVICENOW_PASSWORD")
 
+def _build_params(limit, minutes_ago, extra_fields):
+    """Build the Table API parameters for a query_workflow_context call."""
     query_parts = []
     query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
     query = "^".join(query_parts)
 
-    url = f"{INSTANCE}/api/now/table/wf_context"
     params = {
         "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
         "sysparm_limit": limit,
         "sysparm_display_value": "true",
+        "sysparm_fields": projection(FIELDS, extra_fields),
+        "sysparm_exclude_reference_link": "true",
     }
 
-    response = requests.get(
-        url,
-        params=params,
-        auth=(USERNAME, PASSWORD),
-        headers={"Accept": "application/json"},
+    return params
+
+
+def _format_entry(entry, extra_fields):
+    """Render one workflow context."""
+    return (
+        f"[{entry.get('sys_created_on')}]\n"
+        f"  Workflow: {entry.get('workflow', 'N/A')}\n"
+        f"  State: {entry.get('state', 'N/A')}\n"
+        f"  Sys ID: {entry.get('sys_id', 'N/A')}"
+        + format_extra_fields(entry, extra_fields)
     )
 
+
+def _format_results(response, extra_fields):
+    """Render a Table API response as tool output."""
     if response.status_code != 200:
         return f"Error: {response.status_code} - {response.text}"
 
-    results = response.json().get("result", [])
-    if not results:
-        return "No workflow contexts found matching your criteria."
-
-    output = []
-    for entry in results:
-        output.append(
-            f"[{entry.get('sys_created_on')}]\n"
-            f"  Workflow: {entry.get('workflow', 'N/A')}\n"
-            f"  State: {entry.get('state', 'N/A')}\n"
-            f"  Sys ID: {entry.get('sys_id', 'N/A')}"
-        )
-    return "\n---\n".join(output)
+    return render_entries(
+        iter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+async def _format_results_async(response, extra_fields):
+    """Async variant of _format_results that decodes the body as it arrives."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return await render_entries_async(
+        aiter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+@across_instances
+def query_workflow_context(
+    limit: int = 20,
+    minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """
+    Query classic workflow contexts to see workflow executions.
+
+    Args:
+        limit: Maximum number of results (default 20)
+        minutes_ago: Look back this many minutes (default 60)
+        extra_fields: Comma-separated additional fields to fetch and display
+        bypass_cache: Skip the response cache and always query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
+
+    Returns:
+        Formatted string with workflow context details
+    """
+    params = _build_params(limit, minutes_ago, extra_fields)
+    response = get_client(instance).get_table(TABLE, params, bypass_cache=bypass_cache)
+    return _format_results(response, extra_fields)
+
+
+@across_instances
+async def query_workflow_context_async(
+    limit: int = 20,
+    minutes_ago: int = 60,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_workflow_context for concurrent tool calls."""
+    params = _build_params(limit, minutes_ago, extra_fields)
+    response = await get_async_client(instance).get_table(
+        TABLE, params, bypass_cache=bypass_cache
+    )
+    return await _format_results_async(response, extra_fields)
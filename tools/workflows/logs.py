@@ -2,33 +2,32 @@
 Query workflow logs to see detailed workflow execution logs and errors
 """
 
-import os
+from ..client import get_async_client, get_client
+from ..fanout import across_instances
+from ..projection import format_extra_fields, projection
+from ..streaming import (
+    aiter_results,
+    iter_results,
+    render_entries,
+    render_entries_async,
+)
 
-import requests
+TABLE = "wf_log"
 
+# Fields rendered by _format_entry
+FIELDS = [
+    "sys_created_on",
+    "level",
+    "workflow_version",
+    "activity",
+    "message",
+]
 
-def query_workflow_log(
-    workflow_name: str = "",
-    level: str = "",
-    limit: int = 20,
-    minutes_ago: int = 1440,
-) -> str:
-    """
-    Query workflow logs to see detailed workflow execution logs and errors.
-
-    Args:
-        workflow_name: Filter by workflow name (partial match)
-        level: Filter by log level (error, warn, info, debug)
-        limit: Maximum number of results (default 20)
-        minutes_ago: Look back this many minutes (default 1440 = 24 hours)
+EMPTY_MESSAGE = "No workflow logs found matching your criteria."
 
-    Returns:
-        Formatted string with workflow logs
-    """
-    INSTANCE = os.getenv("SERVICENOW_INSTANCE")
-    USERNAME = os.getenv("SERVICENOW_USERNAME")
-    PASSWORD = os.getenv("SERVICENOW_PASSWORD")
 
+def _build_params(workflow_name, level, limit, minutes_ago, extra_fields):
+    """Build the Table API parameters for a query_workflow_log call."""
     query_parts = []
     if workflow_name:
         query_parts.append(f"workflow_versionLIKE{workflow_name}")
@@ -37,33 +36,96 @@ def query_workflow_log(
     query_parts.append(f"sys_created_onRELATIVEGT@minute@ago@{minutes_ago}")
     query = "^".join(query_parts)
 
-    url = f"{INSTANCE}/api/now/table/wf_log"
     params = {
         "sysparm_query": f"{query}^ORDERBYDESCsys_created_on",
         "sysparm_limit": limit,
         "sysparm_display_value": "true",
+        "sysparm_fields": projection(FIELDS, extra_fields),
+        "sysparm_exclude_reference_link": "true",
     }
 
-    response = requests.get(
-        url,
-        params=params,
-        auth=(USERNAME, PASSWORD),
-        headers={"Accept": "application/json"},
+    return params
+
+
+def _format_entry(entry, extra_fields):
+    """Render one workflow log entry."""
+    return (
+        f"[{entry.get('sys_created_on')}] {entry.get('level', 'INFO').upper()}\n"
+        f"  Workflow: {entry.get('workflow_version', 'N/A')}\n"
+        f"  Activity: {entry.get('activity', 'N/A')}\n"
+        f"  Message: {entry.get('message', 'N/A')}"
+        + format_extra_fields(entry, extra_fields)
+    )
+
+
+def _format_results(response, extra_fields):
+    """Render a Table API response as tool output."""
+    if response.status_code != 200:
+        return f"Error: {response.status_code} - {response.text}"
+
+    return render_entries(
+        iter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
     )
 
+
+async def _format_results_async(response, extra_fields):
+    """Async variant of _format_results that decodes the body as it arrives."""
     if response.status_code != 200:
         return f"Error: {response.status_code} - {response.text}"
 
-    results = response.json().get("result", [])
-    if not results:
-        return "No workflow logs found matching your criteria."
-
-    output = []
-    for entry in results:
-        output.append(
-            f"[{entry.get('sys_created_on')}] {entry.get('level', 'INFO').upper()}\n"
-            f"  Workflow: {entry.get('workflow_version', 'N/A')}\n"
-            f"  Activity: {entry.get('activity', 'N/A')}\n"
-            f"  Message: {entry.get('message', 'N/A')}"
-        )
-    return "\n---\n".join(output)
+    return await render_entries_async(
+        aiter_results(response),
+        lambda entry: _format_entry(entry, extra_fields),
+        EMPTY_MESSAGE,
+    )
+
+
+@across_instances
+def query_workflow_log(
+    workflow_name: str = "",
+    level: str = "",
+    limit: int = 20,
+    minutes_ago: int = 1440,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """
+    Query workflow logs to see detailed workflow execution logs and errors.
+
+    Args:
+        workflow_name: Filter by workflow name (partial match)
+        level: Filter by log level (error, warn, info, debug)
+        limit: Maximum number of results (default 20)
+        minutes_ago: Look back this many minutes (default 1440 = 24 hours)
+        extra_fields: Comma-separated additional fields to fetch and display
+        bypass_cache: Skip the response cache and always query the instance
+        instance: Named instance to query (default instance if empty), or
+            "all" to query every configured instance
+
+    Returns:
+        Formatted string with workflow logs
+    """
+    params = _build_params(workflow_name, level, limit, minutes_ago, extra_fields)
+    response = get_client(instance).get_table(TABLE, params, bypass_cache=bypass_cache)
+    return _format_results(response, extra_fields)
+
+
+@across_instances
+async def query_workflow_log_async(
+    workflow_name: str = "",
+    level: str = "",
+    limit: int = 20,
+    minutes_ago: int = 1440,
+    extra_fields: str = "",
+    bypass_cache: bool = False,
+    instance: str = "",
+) -> str:
+    """Async variant of query_workflow_log for concurrent tool calls."""
+    params = _build_params(workflow_name, level, limit, minutes_ago, extra_fields)
+    response = await get_async_client(instance).get_table(
+        TABLE, params, bypass_cache=bypass_cache
+    )
+    return await _format_results_async(response, extra_fields)